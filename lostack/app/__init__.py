@@ -121,12 +121,26 @@ def create_app(*args, **kw) -> Flask:
         )
     )
 
+    from app.extensions.docker.container_snapshot import ContainerSnapshot
+    app.container_snapshot = ContainerSnapshot(app.docker_manager.api_client)
+
     from app.extensions.service_manager import init_service_manager
 
     with app.app_context():
         app.docker_handler = init_service_manager(app)
 
         app.docker_manager.modified_callback = app.docker_handler.refresh
+        for handler in app.docker_manager.compose_file_handlers.values():
+            handler.modified_callback = app.docker_handler.refresh
+
+    from app.extensions.events import init_events
+    app.event_bus = init_events(app)
+
+    from app.extensions.log_archive import init_log_archive
+    app.log_archive = init_log_archive(app)
+
+    from app.extensions.docker.stats_sampler import init_stats_sampler
+    app.stats_sampler = init_stats_sampler(app)
 
     setup_user_login(app)
 
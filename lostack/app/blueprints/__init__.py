@@ -2,6 +2,7 @@ from .access import register_blueprint as register_access_blueprint
 from .browser import register_blueprint as register_browser_blueprint
 from .containers import register_blueprint as register_containers_blueprint
 from .depot import register_blueprint as register_depot_blueprint
+from .events import register_blueprint as register_events_blueprint
 from .services import register_blueprint as register_services_blueprint
 from .settings import register_blueprint as register_settings_blueprint
 from .user import register_blueprint as register_user_blueprint 
@@ -12,6 +13,7 @@ def register_blueprints(app):
         register_browser_blueprint,
         register_containers_blueprint,
         register_depot_blueprint,
+        register_events_blueprint,
         register_services_blueprint,
         register_settings_blueprint,
         register_user_blueprint
@@ -17,6 +17,7 @@ from flask import (
 ) 
 from werkzeug.exceptions import NotFound
 from app.extensions.common.file_handler import FileHandler
+from app.extensions.docker.compose_planner import compose_save_validator
 
 class FileBrowser:
     """Flask file browser extension"""
@@ -26,6 +27,8 @@ class FileBrowser:
         self.base_directory = base_directory
         self.url_prefix = url_prefix
         self.file_handler = FileHandler()
+        # Callables (path, content) -> list of issue dicts, run before saving
+        self.save_validators = []
         self.blueprint = None
         self.base_directory = Path(base_directory).resolve()
         
@@ -50,6 +53,13 @@ class FileBrowser:
 
         app.logger.info(f"File browser initialized with base directory: {self.base_directory}")
     
+    def add_save_validator(self, validator) -> None:
+        """
+        Registers a check run before a file is saved. Issues with level
+        'error' block the save unless the request sets force.
+        """
+        self.save_validators.append(validator)
+
     def _create_blueprint(self) -> Blueprint:
         """Create Flask blueprint and routes"""
         self.blueprint = Blueprint(
@@ -231,6 +241,17 @@ class FileBrowser:
         if not self._is_editable_file(full_path):
             return jsonify({'success': False, 'message': 'File type not editable'}), 400
         
+        issues = []
+        for validator in self.save_validators:
+            issues.extend(validator(full_path, filecontent) or [])
+        errors = [i for i in issues if i.get('level') == 'error']
+        if errors and not request.form.get('force'):
+            return jsonify({
+                'success': False,
+                'message': '\n'.join(i['message'] for i in errors),
+                'issues': issues
+            }), 409
+
         # Validators
         file_ext = full_path.suffix.lower().lstrip('.')
         if file_ext in ['yaml', 'yml']:
@@ -364,4 +385,6 @@ def init_filebrowser(app, base_directory:str="/docker", url_prefix:str="/files")
 
 
 def register_blueprint(app) -> Blueprint:
-    return init_filebrowser(app).blueprint
\ No newline at end of file
+    browser = init_filebrowser(app)
+    browser.add_save_validator(compose_save_validator(app))
+    return browser.blueprint
\ No newline at end of file
@@ -5,8 +5,23 @@ from flask import (
     Response,
     current_app,
     jsonify,
-    render_template
+    render_template,
+    request
 )
+from app.extensions.common.stream_metrics import stream_metrics
+from app.extensions.common.pagination import paginate, parse_page_args
+from app.extensions.docker.container_query import (
+    count_states,
+    filter_containers,
+    has_filters,
+    list_groups,
+    parse_query
+)
+from app.extensions.docker.container_snapshot import parse_fields, project
+from app.extensions.docker.log_streamer import log_options_from_args, parse_time_arg
+
+# Arguments that make a containers view a server side slice
+PAGE_ARGS = ('sort', 'order', 'page', 'per_page')
 
 
 def register_blueprint(app:Flask) -> Blueprint:
@@ -22,11 +37,25 @@ def register_blueprint(app:Flask) -> Blueprint:
     @bp.route("/")
     @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
     def containers() -> Response:
-        """Docker container management"""
-        containers = current_app.docker_manager.api_client.containers(all=True)
+        """
+        Docker container management
+        ?q=&state=&group=&image=&label=key[=value]&sort=&order=&page=&per_page=
+        """
+        snapshot = current_app.container_snapshot
+        snapshot.refresh()
+        containers = snapshot.all()
+        query = parse_query(request.args)
+        page, per_page = parse_page_args(request.args)
+        page = paginate(filter_containers(containers, query), page, per_page)
+        # Plain first page views poll with deltas and page in the browser
+        paged = has_filters(query) or any(k in request.args for k in PAGE_ARGS)
         return render_template(
             "containers.html",
-            containers=containers
+            page=page,
+            query=query,
+            container_query=dict(query, page=page.page, per_page=page.per_page) if paged else None,
+            counts=count_states(containers),
+            groups=list_groups(containers)
         )
 
 
@@ -45,15 +74,112 @@ def register_blueprint(app:Flask) -> Blueprint:
         if not act:
             raise ValueError(f"Invalid container action")
 
+        if action in ("logs", "follow"):
+            # Supports ?tail=150&since=10m&until=...&timestamps=1
+            return act(id, **log_options_from_args(request.args))
         return act(id)
 
 
     @bp.route('/api/all')
     @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
     def api_containers() -> Response:
-        """Docker container management"""
-        containers = current_app.docker_manager.api_client.containers(all=True)
-        return jsonify({ 'containers': containers})
+        """
+        Versioned container list
+        ?since=<version>&instance=<id> returns only added / changed / removed containers
+        ?fields=slim or ?fields=Id,State,... projects each container
+        Filter / sort / page arguments match the containers page and return
+        only the matching slice, these are always full (non-delta) responses
+        Supports If-None-Match with the returned ETag
+        """
+        snapshot = current_app.container_snapshot
+        snapshot.refresh()
+        fields = parse_fields(request.args.get('fields'))
+        query = parse_query(request.args)
+        if request.if_none_match.contains(snapshot.etag):
+            response = Response(status=304)
+        elif has_filters(query) or any(k in request.args for k in PAGE_ARGS):
+            containers = snapshot.all()
+            page = paginate(filter_containers(containers, query), *parse_page_args(request.args, 0))
+            response = jsonify({
+                'instance': snapshot.instance,
+                'version': snapshot.version,
+                'delta': False,
+                'containers': [project(c, fields) for c in page.items],
+                'counts': count_states(containers),
+                **page.to_dict()
+            })
+        else:
+            response = jsonify(snapshot.get(
+                request.args.get('since', type=int),
+                fields,
+                request.args.get('instance')
+            ))
+        response.set_etag(snapshot.etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+
+    @bp.route('/api/logs/search')
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def api_log_search() -> Response:
+        """
+        Search the log archive
+        ?q=text&containers=a,b&start=2h&end=...&limit=200
+        """
+        if not current_app.log_archive:
+            return jsonify({'error': 'Log archive is not enabled'}), 404
+        containers = [c.strip() for c in request.args.get('containers', '').split(',') if c.strip()]
+        try:
+            start = parse_time_arg(request.args.get('start'))
+            end = parse_time_arg(request.args.get('end'))
+            limit = min(int(request.args.get('limit', 200)), 5000)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        results = current_app.log_archive.search(
+            request.args.get('q', ''),
+            containers=containers or None,
+            start=start,
+            end=end,
+            limit=limit
+        )
+        return jsonify({
+            'containers': current_app.log_archive.containers(),
+            'results': results
+        })
+
+
+    @bp.route('/api/stats')
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def api_stats() -> Response:
+        """
+        Sampled resource usage for running containers
+        ?points=30 includes the last N samples for sparklines
+        """
+        if not current_app.stats_sampler:
+            return jsonify({'error': 'Stats sampler is not enabled'}), 404
+        try:
+            points = min(int(request.args.get('points', 0) or 0), current_app.stats_sampler.history_size)
+        except ValueError:
+            return jsonify({'error': 'points must be an integer'}), 400
+        return jsonify(current_app.stats_sampler.snapshot(points))
+
+
+    @bp.route('/api/stats/<id>')
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def api_container_stats(id:str) -> Response:
+        """Sampled resource usage and full history for a container"""
+        if not current_app.stats_sampler:
+            return jsonify({'error': 'Stats sampler is not enabled'}), 404
+        if not (stats := current_app.stats_sampler.container(id)):
+            return jsonify({'error': f'No stats for {id}'}), 404
+        return jsonify(stats)
+
+
+    @bp.route('/api/streams')
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def api_stream_metrics() -> Response:
+        """Frame and byte counters for event streams"""
+        return jsonify(stream_metrics.snapshot())
     
 
     app.register_blueprint(bp)
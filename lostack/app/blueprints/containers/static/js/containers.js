@@ -1,29 +1,78 @@
 let autoRefreshInterval = null;
 let containerIdToRemove = null;
 let allContainers = [];
+let containerStats = {};
+let statsInterval = null;
+const STATS_POINTS = 30;
+
+let containersVersion = null;
+let containersInstance = null;
+let containersEtag = null;
+let containerQuery = null;
+let containerPerPage = 0;
+
+function containerDataUrl() {
+    // Paged / filtered views get their slice back, unfiltered views use deltas
+    const params = new URLSearchParams();
+    if (containerQuery) {
+        Object.entries(containerQuery).forEach(([key, value]) => value && params.set(key, value));
+    } else if (containersVersion !== null) {
+        params.set('since', containersVersion);
+        params.set('instance', containersInstance);
+    }
+    const search = params.toString();
+    return search ? `/containers/api/all?${search}` : '/containers/api/all';
+}
 
 async function fetchContainerData() {
-    const response = await fetch('/containers/api/all');
+    // Revalidate with the ETag and only ask for what changed since the held version
+    const url = containerDataUrl();
+    const headers = containersEtag ? { 'If-None-Match': containersEtag } : {};
+    const response = await fetch(url, { headers, cache: 'no-store' });
+    if (response.status === 304) return null;
     if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+    containersEtag = response.headers.get('ETag');
     return await response.json();
 }
 
+function applyContainerData(data) {
+    containersVersion = data.version;
+    containersInstance = data.instance;
+    if (!data.delta) {
+        allContainers = data.containers;
+        return true;
+    }
+    if (!data.changed.length && !data.removed.length) return false;
+    const byId = new Map(allContainers.map(c => [c.Id, c]));
+    data.removed.forEach(id => byId.delete(id));
+    data.changed.forEach(c => byId.set(c.Id, c));
+    allContainers = Array.from(byId.values());
+    return true;
+}
+
 async function refreshData() {
     hideError();
     try {
         const data = await fetchContainerData();
-        allContainers = data.containers;
-        updateSummaryPanel(allContainers);
-        renderContainers(allContainers);
+        if (!data || !applyContainerData(data)) return;
+        updateSummaryPanel(allContainers, data.counts);
+        if (document.getElementById('Search').value) filterContainers();
+        else renderContainers(allContainers);
+        renderAllStats();
     } catch (error) {
         showError('Failed to load container data: ' + error.message);
     }
 }
 
-function updateSummaryPanel(containers) {
-    document.getElementById('runningCount').textContent = containers.filter(c => c.State === 'running').length;
-    document.getElementById('stoppedCount').textContent = containers.filter(c => c.State === 'exited').length;
-    document.getElementById('totalCount').textContent = containers.length;
+function updateSummaryPanel(containers, counts = null) {
+    counts = counts || {
+        running: containers.filter(c => c.State === 'running').length,
+        stopped: containers.filter(c => c.State === 'exited').length,
+        total: containers.length
+    };
+    document.getElementById('runningCount').textContent = counts.running;
+    document.getElementById('stoppedCount').textContent = counts.stopped;
+    document.getElementById('totalCount').textContent = counts.total;
 }
 
 function renderContainers(containers) {
@@ -37,7 +86,11 @@ function renderContainers(containers) {
         return;
     }
 
-    containers.sort((a, b) => a.Names[0].localeCompare(b.Names[0]));
+    if (!containerQuery) {
+        // Delta views hold every container, show the first page of them
+        containers.sort((a, b) => a.Names[0].localeCompare(b.Names[0]));
+        if (containerPerPage) containers = containers.slice(0, containerPerPage);
+    }
     containerGrid.innerHTML = containers.map(container => {
         const names = container.Names.map(n => n.replace('/', '')).join(', ');
         const statusBadge = getStatusBadge(container.State, container.Status);
@@ -61,6 +114,7 @@ function renderContainers(containers) {
     </div>
     <div class="card-body overflow-auto p-0 mx-0 my-0 d-flex flex-column">
         <div class="mt-2">
+            ${container.State === 'running' ? `<div class="mb-3 mx-2 container-stats" id="stats-${container.Id}"></div>` : ''}
             ${imageSection}
             ${networksSection}
             ${portsSection}
@@ -77,6 +131,82 @@ function renderContainers(containers) {
 }
 
 
+async function refreshStats() {
+    try {
+        const response = await fetch(`/containers/api/stats?points=${STATS_POINTS}`);
+        if (!response.ok) {
+            // Sampler disabled, stop polling
+            if (response.status === 404 && statsInterval) clearInterval(statsInterval);
+            return null;
+        }
+        const data = await response.json();
+        containerStats = data.containers;
+        renderAllStats();
+        return data;
+    } catch (error) {
+        return null;
+    }
+}
+
+async function setupStats() {
+    const data = await refreshStats();
+    if (data) statsInterval = setInterval(refreshStats, Math.max(data.interval, 1) * 1000);
+}
+
+function renderAllStats() {
+    document.querySelectorAll('.container-stats').forEach(element => {
+        const stats = containerStats[element.id.replace('stats-', '')];
+        element.innerHTML = stats ? renderStats(stats) : '';
+    });
+}
+
+function formatStatBytes(bytes) {
+    if (bytes === null || bytes === undefined) return '-';
+    const units = ['B', 'KiB', 'MiB', 'GiB', 'TiB'];
+    let i = 0;
+    while (bytes >= 1024 && i < units.length - 1) { bytes /= 1024; i++; }
+    return `${bytes.toFixed(i ? 1 : 0)} ${units[i]}`;
+}
+
+function renderSparkline(values, color) {
+    const points = (values || []).map(v => v === null ? 0 : v);
+    if (points.length < 2) return '';
+    const width = 80, height = 18;
+    const max = Math.max(...points) || 1;
+    const step = width / (points.length - 1);
+    const path = points.map((v, i) => `${(i * step).toFixed(1)},${(height - v / max * height).toFixed(1)}`).join(' ');
+    return `<svg width="${width}" height="${height}" class="ms-2"><polyline fill="none" stroke="${color}" stroke-width="1.5" points="${path}"/></svg>`;
+}
+
+function renderStats(stats) {
+    const history = stats.history || {};
+    const cpu = stats.cpu === null ? '-' : `${stats.cpu.toFixed(1)}%`;
+    const memory = stats.memory_limit
+        ? `${formatStatBytes(stats.memory)} / ${formatStatBytes(stats.memory_limit)}`
+        : formatStatBytes(stats.memory);
+    const rows = [
+        ['cpu', 'CPU', cpu, history.cpu, '#0d6efd'],
+        ['memory', 'Memory', memory, history.memory, '#6f42c1'],
+        ['arrow-down-up', 'Network', `${formatStatBytes(stats.net_rx)}/s in, ${formatStatBytes(stats.net_tx)}/s out`, history.net_rx, '#198754'],
+        ['hdd', 'Disk', `${formatStatBytes(stats.block_read)}/s read, ${formatStatBytes(stats.block_write)}/s write`, history.block_write, '#fd7e14'],
+    ];
+    return `
+<h6 class="small fw-bold text-muted mb-2">
+    <i class="bi bi-activity me-1 text-secondary"></i>Resources
+</h6>
+<div class="small text-muted">
+    ${rows.map(([icon, label, value, series, color]) => `
+    <div class="ms-2 me-2 d-flex align-items-center justify-content-between mb-1">
+        <div>
+            <i class="bi bi-${icon} me-2 text-secondary"></i>
+            <span class="text-primary">${label}</span>
+            <code class="ms-2">${value}</code>
+        </div>
+        ${renderSparkline(series, color)}
+    </div>`).join('')}
+</div>`;
+}
+
 function renderImage(image) {
     return `
 <div class="mb-3 mx-2">
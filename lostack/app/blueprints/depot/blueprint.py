@@ -3,11 +3,16 @@ from flask import (
     current_app,
     render_template,
     Response,
-    Blueprint
+    Blueprint,
+    jsonify,
+    request
 )
 import os
+import time
 from queue import Queue
+from app.extensions.common.pagination import DEFAULT_PER_PAGE, Page, paginate, parse_page_args
 from app.extensions.common.stream_handler import StreamHandler
+from app.extensions.depot_bundle import BundleError
 
 
 def stream_depot_package_install(package_name: os.PathLike) -> Response:
@@ -27,6 +32,14 @@ def stream_remove_package(package_db_id: int) -> Response:
         package_db_id
     )
 
+def format_sync_status(status:dict) -> dict:
+    """Depot sync status with readable times for the depot page"""
+    status = dict(status)
+    for key in ("started", "finished", "next"):
+        if status.get(key):
+            status[key] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(status[key]))
+    return status
+
 def register_blueprint(app:Flask) -> Blueprint:
 
     bp = blueprint = Blueprint(
@@ -37,32 +50,181 @@ def register_blueprint(app:Flask) -> Blueprint:
     )
 
 
+    def depot_page_data() -> dict:
+        """Memoized depot page data, see DepotManager.page_data"""
+        PackageEntry = current_app.models.PackageEntry
+        return current_app.docker_handler.depot_handler.page_data(
+            lambda: [name for (name,) in current_app.db.session.query(PackageEntry.name)]
+        )
+
+    def depot_page(data:dict, args, installed:bool=False, default_per_page:int=DEFAULT_PER_PAGE) -> Page:
+        """One page of available packages matching ?q=&group=&tag=, best match first"""
+        depot_handler = current_app.docker_handler.depot_handler
+        found = depot_handler.search_packages(
+            args.get("q", ""),
+            group=args.get("group") or None,
+            tag=args.get("tag") or None,
+            names=None if installed else data["available"]
+        )
+        page = paginate(found["results"], *parse_page_args(args, default_per_page))
+        page.facets = found["facets"]
+        return page
+
+
     @bp.route("/")
     @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
     def depot() -> Response:
-        """Show depot page"""
-        all_packages = current_app.docker_handler.depot_handler.packages.keys()
-        installed_packages = [s.name for s in current_app.models.PackageEntry.query.all()]
-        available_packages = [s for s in all_packages if not s in installed_packages]
-        depot_data = current_app.docker_handler.depot_handler.format_packages_for_depot_page(available_packages)
-        # Passes pre-formatted data / arguments to template:
-        # Pre-processing litterally halved the size of the template file
-        # I wasted so much time writing all that jinja filtering 
-        # trying to process the data directly lol
-        # {
-        #     'packages': processed_packages,
-        #     'groups': dict(sorted(group_counts.items())),
-        #     'tags': dict(sorted(tag_counts.items())),
-        #     'total_count': len(processed_packages)
-        # }
+        """Show depot page, the first page of packages is rendered inline, the rest scroll in"""
+        depot_data = depot_page_data()
+        page = depot_page(depot_data, request.args)
         return render_template(
             "depot.html",
-            **depot_data,
+            page=page,
+            packages=depot_data["packages"],
+            validation=depot_data["validation"],
+            groups=depot_data["groups"],
+            tags=depot_data["tags"],
+            total_count=depot_data["total_count"],
             depot_repo=current_app.config.get("DEPOT_URL"),
-            depot_branch=current_app.config.get("DEPOT_BRANCH")
+            depot_branch=current_app.config.get("DEPOT_BRANCH"),
+            sync_status=format_sync_status(current_app.docker_handler.depot_handler.sync_status)
+        )
+
+
+    @bp.route("/packages")
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def depot_packages() -> Response:
+        """
+        Package card fragment for infinite scroll
+        ?q=&group=&tag=&page=&per_page=
+        X-Total-Count / X-Next-Page headers describe the result set
+        Supports If-None-Match with the returned ETag
+        """
+        depot_data = depot_page_data()
+        if request.if_none_match.contains(depot_data["etag"]):
+            response = Response(status=304)
+        else:
+            page = depot_page(depot_data, request.args)
+            response = Response(render_template(
+                "depot_cards.html",
+                page=page,
+                packages=depot_data["packages"],
+                validation=depot_data["validation"]
+            ))
+            response.headers["X-Total-Count"] = str(page.total)
+            if page.has_next:
+                response.headers["X-Next-Page"] = str(page.page + 1)
+        response.set_etag(depot_data["etag"])
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+
+    @bp.route("/api/search")
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def api_search() -> Response:
+        """
+        Ranked depot search with prefix and typo tolerant matching
+        ?q=&group=&tag=&installed=1&page=&per_page=
+        Installed packages are left out unless installed=1
+        """
+        depot_handler = current_app.docker_handler.depot_handler
+        depot_data = depot_page_data()
+        if request.if_none_match.contains(depot_data["etag"]):
+            response = Response(status=304)
+        else:
+            page = depot_page(
+                depot_data,
+                request.args,
+                installed=request.args.get("installed") == "1",
+                default_per_page=0
+            )
+            results = []
+            for result in page.items:
+                entry = depot_handler._page_entry(result["name"]) or {}
+                results.append({
+                    **result,
+                    **{k: entry.get(k) for k in ("title", "description", "group", "tags", "image")}
+                })
+            response = jsonify({
+                "results": results,
+                "facets": page.facets,
+                **page.to_dict()
+            })
+        response.set_etag(depot_data["etag"])
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+
+    @bp.route("/api/validation")
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def api_validation() -> Response:
+        """
+        Latest depot package validation results
+        ?package=name for one package, ?invalid=1 for packages with errors only
+        """
+        validator = current_app.docker_handler.depot_handler.validator
+        results = validator.results
+        if request.args.get("package"):
+            result = results.get(request.args["package"])
+            if result is None:
+                return jsonify({"error": "Package not validated"}), 404
+            return jsonify(result)
+        if request.args.get("invalid") == "1":
+            results = {name: r for name, r in results.items() if not r["valid"]}
+        return jsonify({"version": validator.version, "results": results})
+
+
+    @bp.route("/api/sources")
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def api_sources() -> Response:
+        """Depot sources highest priority first, with their sync state and shadowed packages"""
+        depot_handler = current_app.docker_handler.depot_handler
+        return jsonify({
+            "sources": depot_handler.source_status(),
+            "conflicts": depot_handler.conflicts,
+            "sync": depot_handler.sync_status,
+        })
+
+
+    @bp.route("/bundle/export")
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def depot_bundle_export() -> Response:
+        """
+        Offline bundle of packages and their images, streamed as a tar
+        ?packages=a,b
+        """
+        names = [n.strip() for n in request.args.get("packages", "").split(",") if n.strip()]
+        if not names:
+            return jsonify({"error": "No packages given"}), 400
+        try:
+            chunks = current_app.docker_handler.depot_handler.export_bundle(
+                current_app.docker_manager.api_client,
+                names
+            )
+        except BundleError as e:
+            return jsonify({"error": str(e)}), 400
+        filename = f"lostack-bundle-{names[0] if len(names) == 1 else len(names)}.tar"
+        return Response(
+            chunks,
+            mimetype="application/x-tar",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
 
 
+    @bp.route("/bundle/import", methods=["POST"])
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def depot_bundle_import() -> Response:
+        """Imports a bundle sent as the raw request body, loading its images into Docker"""
+        try:
+            result = current_app.docker_handler.depot_handler.import_bundle(
+                current_app.docker_manager.api_client,
+                request.stream
+            )
+        except BundleError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(result)
+
+
     @bp.route("/update/stream")
     @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
     def depot_update() -> Response:
@@ -95,6 +257,23 @@ def register_blueprint(app:Flask) -> Blueprint:
             )
 
 
+    @bp.route('/launch/batch/stream')
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def depot_launch_batch() -> Response:
+        """
+        Installs several packages as one operation, see ServiceManager.install_depot_packages
+        ?packages=a,b
+        """
+        names = [n.strip() for n in request.args.get("packages", "").split(",") if n.strip()]
+        if not names:
+            return StreamHandler.message_completion_stream("No packages given")
+        return StreamHandler.generic_context_stream(
+            current_app.docker_handler.install_depot_packages,
+            current_app._get_current_object(),
+            names
+        )
+
+
     @bp.route('/remove/<int:service_id>/stream')
     @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
     def depot_remove(service_id:int) -> Response:
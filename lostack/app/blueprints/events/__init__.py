@@ -0,0 +1 @@
+from .blueprint import register_blueprint
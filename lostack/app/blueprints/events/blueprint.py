@@ -0,0 +1,67 @@
+import json
+from flask import (
+    Flask,
+    Blueprint,
+    Response,
+    current_app,
+    jsonify
+)
+from app.extensions.common.file_watcher import get_file_watcher
+from app.extensions.common.stream_handler import StreamHandler
+
+# Seconds between keepalive comments on an idle stream
+HEARTBEAT_INTERVAL = 15
+# Client reconnect delay in milliseconds
+RETRY_INTERVAL = 3000
+
+
+def register_blueprint(app:Flask) -> Blueprint:
+    bp = blueprint = Blueprint(
+        'events',
+        __name__,
+        url_prefix="/events"
+    )
+
+
+    @bp.route("/stream")
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def stream() -> Response:
+        """
+        Single Server-Sent Events channel for live state
+        Pushes `container` (Engine state / health changes) and `package`
+        (PackageEntry insert / update / delete) events. A `resync` event
+        means events were dropped and the client should reload its data.
+        """
+        subscription = current_app.event_bus.subscribe()
+
+        def generator():
+            try:
+                yield f"retry: {RETRY_INTERVAL}\n\n"
+                while True:
+                    event = subscription.get(timeout=HEARTBEAT_INTERVAL)
+                    if subscription.overflowed:
+                        subscription.overflowed = False
+                        yield "event: resync\ndata: {}\n\n"
+                    if event is None:
+                        yield ": keepalive\n\n"
+                        continue
+                    yield (
+                        f"id: {event.id}\n"
+                        f"event: {event.type}\n"
+                        f"data: {json.dumps(event.data)}\n\n"
+                    )
+            finally:
+                subscription.close()
+
+        return StreamHandler.create_response(generator)
+
+
+    @bp.route("/api/watcher")
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def watcher_stats() -> Response:
+        """Watch, subscription and event counters for the shared file watcher"""
+        return jsonify(get_file_watcher().stats())
+
+
+    app.register_blueprint(bp)
+    return bp
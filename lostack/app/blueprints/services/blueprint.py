@@ -3,6 +3,7 @@ from flask import (
     Flask,
     Blueprint,
     Response,
+    abort,
     current_app,
     render_template,
     request,
@@ -12,8 +13,29 @@ from flask import (
     jsonify
 )
 
+from app.extensions.common.pagination import Page, paginate, parse_page_args
+from app.extensions.docker.compose_planner import check_compose
+from app.extensions.docker.compose_resolver import ComposeResolveError
+from app.extensions.docker.log_streamer import log_options_from_args
 from .forms import PackageEntryForm, populate_package_entry_form
 
+SERVICE_SORTS = {
+    "name": "name",
+    "display": "display_name",
+    "port": "port",
+    "enabled": "enabled",
+}
+
+
+def _service_state(service, containers:dict) -> str:
+    """up when every container runs, down when none do, partial otherwise"""
+    names = service.docker_services
+    running = sum(1 for n in names if (containers.get(n) or {}).get("State") == "running")
+    if names and running == len(names):
+        return "up"
+    return "partial" if running else "down"
+
+
 def register_blueprint(app:Flask) -> Blueprint:
 
     bp = blueprint = Blueprint(
@@ -27,26 +49,72 @@ def register_blueprint(app:Flask) -> Blueprint:
     @bp.route("/")
     @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
     def services() -> Response:
-        """List all installed Packages groups"""
-        services = current_app.models.PackageEntry.query.order_by(
-            current_app.models.PackageEntry.name
-        ).all()
-
-        all_names = []
-        for s in services:
-            for n in [
-                _n.strip()
-                for _n in s.service_names.split(",")
-                if _n.strip()
-            ]:
-                all_names.append(n)
-        container_names = all_names
-
-        containers = current_app.docker_manager.get_services_info(container_names)
+        """
+        List installed Package groups
+        ?q=&enabled=on|off&core=yes|no&state=up|partial|down&sort=&order=&page=&per_page=
+        """
+        PackageEntry = current_app.models.PackageEntry
+        query = {
+            "q": request.args.get("q", "").strip(),
+            "enabled": request.args.get("enabled", ""),
+            "core": request.args.get("core", ""),
+            "state": request.args.get("state", ""),
+            "sort": request.args.get("sort") if request.args.get("sort") in SERVICE_SORTS else "name",
+            "order": "desc" if request.args.get("order") == "desc" else "asc",
+        }
+
+        entries = PackageEntry.query
+        if query["q"]:
+            pattern = f"%{query['q']}%"
+            entries = entries.filter(
+                PackageEntry.name.ilike(pattern)
+                | PackageEntry.display_name.ilike(pattern)
+                | PackageEntry.service_names.ilike(pattern)
+            )
+        if query["enabled"] in ("on", "off"):
+            entries = entries.filter(PackageEntry.enabled == (query["enabled"] == "on"))
+        if query["core"] in ("yes", "no"):
+            entries = entries.filter(PackageEntry.core_service == (query["core"] == "yes"))
+        column = getattr(PackageEntry, SERVICE_SORTS[query["sort"]])
+        entries = entries.order_by(column.desc() if query["order"] == "desc" else column.asc())
+
+        # Container state comes from the shared snapshot, not a fresh Engine call
+        snapshot = current_app.container_snapshot
+        snapshot.refresh()
+        by_name = {c["Names"][0].strip("/"): c for c in snapshot.all() if c.get("Names")}
+
+        page, per_page = parse_page_args(request.args, 24)
+        if query["state"]:
+            # Depends on containers so it can't be pushed into SQL
+            matched = [e for e in entries.all() if _service_state(e, by_name) == query["state"]]
+            page = paginate(matched, page, per_page)
+        else:
+            total = entries.count()
+            if per_page:
+                page = min(page, max((total + per_page - 1) // per_page, 1))
+                items = entries.offset((page - 1) * per_page).limit(per_page).all()
+            else:
+                page, items = 1, entries.all()
+            page = Page(items, page, per_page, total)
+
+        containers = {
+            name: by_name.get(name)
+            for service in page.items
+            for name in service.docker_services
+        }
+
+        counts = {
+            "core": PackageEntry.query.filter_by(core_service=True).count(),
+            "total": PackageEntry.query.count(),
+            "disabled": PackageEntry.query.filter_by(enabled=False).count(),
+        }
 
         return render_template(
             "services.html",
-            services=services,
+            services=page.items,
+            page=page,
+            query=query,
+            counts=counts,
             containers=containers,
         )
     
@@ -89,6 +157,40 @@ def register_blueprint(app:Flask) -> Blueprint:
         return render_template("service_form.html", form=form, service=service, action="Edit")
 
 
+    @bp.route("/api/<int:service_id>/compose")
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def service_compose(service_id):
+        """Effective compose config of a service's containers, extends and variables resolved"""
+        service = current_app.models.PackageEntry.query.get_or_404(service_id)
+        compose_file = "/docker/docker-compose.yml" if service.core_service else "/docker/lostack-compose.yml"
+        handler = current_app.docker_manager.compose_file_handlers.get(compose_file)
+        try:
+            effective = handler.get_effective_services()
+        except ComposeResolveError as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+        return jsonify({
+            "success": True,
+            "file": compose_file,
+            "services": {
+                name: effective[name]
+                for name in service.docker_services
+                if name in effective
+            }
+        })
+
+
+    @bp.route("/api/<int:service_id>/plan")
+    @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
+    def service_plan(service_id):
+        """Validation issues and the actions `up` would take, without calling compose"""
+        service = current_app.models.PackageEntry.query.get_or_404(service_id)
+        compose_file = "/docker/docker-compose.yml" if service.core_service else "/docker/lostack-compose.yml"
+        return jsonify({
+            "file": compose_file,
+            **check_compose(current_app._get_current_object(), compose_file, targets=service.docker_services)
+        })
+
+
     @bp.route("/action/<int:service_id>/toggle", methods=["POST"])
     @app.permission_required(app.models.PERMISSION_ENUM.ADMIN)
     def service_toggle(service_id):
@@ -199,7 +301,7 @@ def register_blueprint(app:Flask) -> Blueprint:
         service = current_app.models.PackageEntry.query.get_or_404(service_id)
         docker_service_names = service.docker_services
 
-        if not action in ["up", "stop", "remove", "logs"]:
+        if not action in ["up", "stop", "remove", "logs", "follow"]:
             abort(404)
             
         if action in ["up", "stop"]:
@@ -219,6 +321,13 @@ def register_blueprint(app:Flask) -> Blueprint:
                 current_app._get_current_object(),
                 docker_service_names,
             )
+        elif action in ["logs", "follow"]:
+            # All containers in the group, merged in timestamp order
+            act = {
+                "logs": current_app.docker_manager.stream_api_logs,
+                "follow": current_app.docker_manager.stream_api_follow,
+            }.get(action)
+            return act(docker_service_names, **log_options_from_args(request.args))
         else:
             raise ValueError("How did we even get here?")
 
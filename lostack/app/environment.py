@@ -1,4 +1,5 @@
 from app.extensions.common.label_extractor import LabelExtractor as labext 
+from app.extensions.depot_source import parse_depot_sources
 
 
 LOG_CONFIG = {
@@ -49,6 +50,11 @@ ENV_DEFAULTS = {
     "DEPOT_DIR"                     : "/appdata/LoStack-Depot",
     "DEPOT_DIR_DEV"                 : "/docker/LoStack-Depot",
     "DEPOT_DEV_MODE"                : "false",
+    "DEPOT_SHALLOW"                 : "false", # Depth 1 clone of DEPOT_BRANCH, packages/ only
+    "DEPOT_BUNDLE_DIR"              : "/appdata/LoStack-Bundles", # Imported offline bundles, empty to disable
+    "DEPOT_SOURCES"                 : "", # Extra depots, name=git url or /dir[#branch][@priority], comma separated
+    "DEPOT_CACHE_FILE"              : "/appdata/lostack-depot-cache.pickle", # Empty to disable
+    "DEPOT_SYNC_INTERVAL"           : "21600", # Seconds between background syncs, 0 for startup only
     "TRUSTED_PROXY_IPS"             : "172.*",
     "DOMAIN_NAME"                   : "lostack.internal",
     "SABLIER_URL"                   : "http://sablier:10000",
@@ -66,6 +72,15 @@ ENV_DEFAULTS = {
     "SQLALCHEMY_TRACK_MODIFICATIONS": "false",
     "DEBUG"                         : "false",
     "TIMEZONE"                      : "US/Pacific",
+    "STREAM_GZIP"                   : "true",
+    "STREAM_BATCH_INTERVAL"         : "0.05",
+    "LOG_ARCHIVE_ENABLED"           : "false",
+    "LOG_ARCHIVE_DIR"               : "/appdata/lostack-logs",
+    "LOG_ARCHIVE_MAX_MB"            : "2048",
+    "LOG_ARCHIVE_MAX_AGE_DAYS"      : "14",
+    "STATS_ENABLED"                 : "true",
+    "STATS_INTERVAL"                : "5",
+    "STATS_HISTORY"                 : "120",
     "LOG_CONFIG"                    : LOG_CONFIG,
     "ADMIN_GROUP"                   : "admins",
     "GROUPS_HEADER"                 : "Remote-Groups",
@@ -78,11 +93,22 @@ ENV_DEFAULTS = {
 
 ENV_PARSING = {
     "DEPOT_DEV_MODE" : labext.parse_boolean,
+    "DEPOT_SHALLOW" : labext.parse_boolean,
+    "DEPOT_SYNC_INTERVAL" : float,
+    "DEPOT_SOURCES" : parse_depot_sources,
     "SQLALCHEMY_POOL_SIZE" : int,
     "SQLALCHEMY_MAX_OVERFLOW" : int,
     "SQLALCHEMY_POOL_RECYCLE" : int,
     "SQLALCHEMY_TRACK_MODIFICATIONS" : labext.parse_boolean,
-    "DEBUG" : labext.parse_boolean
+    "DEBUG" : labext.parse_boolean,
+    "STREAM_GZIP" : labext.parse_boolean,
+    "STREAM_BATCH_INTERVAL" : float,
+    "LOG_ARCHIVE_ENABLED" : labext.parse_boolean,
+    "LOG_ARCHIVE_MAX_MB" : int,
+    "LOG_ARCHIVE_MAX_AGE_DAYS" : float,
+    "STATS_ENABLED" : labext.parse_boolean,
+    "STATS_INTERVAL" : float,
+    "STATS_HISTORY" : int
 }
 
 ENV_NON_REQUIRED  = [
@@ -0,0 +1,178 @@
+"""
+Shared filesystem watcher.
+A single watchdog Observer serves every subscriber. Directories are only
+scheduled once, subscriptions are matched by exact file path or by glob
+under a directory, and callbacks run on a small worker pool.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from watchdog.events import (
+    EVENT_TYPE_CREATED,
+    EVENT_TYPE_DELETED,
+    EVENT_TYPE_MODIFIED,
+    EVENT_TYPE_MOVED,
+    FileSystemEventHandler
+)
+from watchdog.observers import Observer
+
+DEFAULT_WORKERS = 2
+
+# Open / close events carry no content change
+WATCHED_EVENT_TYPES = {
+    EVENT_TYPE_CREATED,
+    EVENT_TYPE_DELETED,
+    EVENT_TYPE_MODIFIED,
+    EVENT_TYPE_MOVED
+}
+
+
+class Subscription:
+    """A callback for one file, or for files matching a glob under a directory"""
+    def __init__(self, path:str, callback, pattern:str|None=None, recursive:bool=False):
+        self.path = path
+        self.callback = callback
+        self.pattern = pattern
+        self.recursive = recursive
+        self.is_file = pattern is None and not os.path.isdir(path)
+        self.directory = os.path.dirname(path) if self.is_file else path
+
+    def matches(self, path:str) -> bool:
+        if self.is_file:
+            return path == self.path
+        if not path.startswith(self.directory + os.sep):
+            return False
+        relative = path[len(self.directory) + 1:]
+        if not self.recursive and os.sep in relative:
+            return False
+        if self.pattern is None:
+            return True
+        return fnmatch(os.path.basename(relative), self.pattern) or fnmatch(relative, self.pattern)
+
+
+class FileWatcher(FileSystemEventHandler):
+    def __init__(self, workers:int=DEFAULT_WORKERS):
+        self.logger = logging.getLogger(__name__ + ".FileWatcher")
+        self.lock = threading.Lock()
+        self.observer = Observer()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="FileWatcher")
+        self.subscriptions = []
+        self.watches = {} # directory -> (ObservedWatch, recursive)
+        self.started = False
+        self.events_received = 0
+        self.events_dispatched = 0
+        self.callback_errors = 0
+
+    def subscribe(
+        self,
+        path:os.PathLike,
+        callback,
+        pattern:str|None=None,
+        recursive:bool=False
+    ) -> Subscription:
+        """
+        Calls callback(event) for changes to a file, or to files under a
+        directory matching `pattern` (any file if None).
+        """
+        subscription = Subscription(os.path.realpath(path), callback, pattern, recursive)
+        with self.lock:
+            self.subscriptions.append(subscription)
+            self._ensure_watch(subscription.directory, subscription.recursive)
+            if not self.started:
+                self.observer.start()
+                self.started = True
+        self.logger.info(f"Watching {subscription.path}" + (f" for {pattern}" if pattern else ""))
+        return subscription
+
+    def unsubscribe(self, subscription:Subscription) -> None:
+        with self.lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+            self._prune_watches()
+
+    def _covering_watch(self, directory:str, recursive:bool) -> str|None:
+        """An existing watch that already reports events for this directory"""
+        for watched, (_, watched_recursive) in self.watches.items():
+            if watched == directory and (watched_recursive or not recursive):
+                return watched
+            if watched_recursive and directory.startswith(watched + os.sep):
+                return watched
+        return None
+
+    def _ensure_watch(self, directory:str, recursive:bool) -> None:
+        if self._covering_watch(directory, recursive):
+            return
+        # Replace watches the new one covers, e.g. a non-recursive watch of the same dir
+        for watched in list(self.watches):
+            if watched == directory or (recursive and watched.startswith(directory + os.sep)):
+                self.observer.unschedule(self.watches.pop(watched)[0])
+        watch = self.observer.schedule(self, directory, recursive=recursive)
+        self.watches[directory] = (watch, recursive)
+
+    def _prune_watches(self) -> None:
+        """Unschedules directories no subscription needs anymore"""
+        needed = {}
+        for subscription in self.subscriptions:
+            recursive = needed.get(subscription.directory, False) or subscription.recursive
+            needed[subscription.directory] = recursive
+        for watched in list(self.watches):
+            if not any(
+                d == watched or (self.watches[watched][1] and d.startswith(watched + os.sep))
+                for d in needed
+            ):
+                self.observer.unschedule(self.watches.pop(watched)[0])
+
+    def on_any_event(self, event) -> None:
+        if event.is_directory or event.event_type not in WATCHED_EVENT_TYPES:
+            return
+        self.events_received += 1
+        paths = {event.src_path, getattr(event, "dest_path", None)} - {None, ""}
+        with self.lock:
+            matched = [
+                s for s in self.subscriptions
+                if any(s.matches(p) for p in paths)
+            ]
+        for subscription in matched:
+            self.events_dispatched += 1
+            self.executor.submit(self._run_callback, subscription, event)
+
+    def _run_callback(self, subscription:Subscription, event) -> None:
+        try:
+            subscription.callback(event)
+        except Exception as e:
+            self.callback_errors += 1
+            self.logger.error(f"Error handling file event for {subscription.path} - {e}")
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "watches": len(self.watches),
+                "subscriptions": len(self.subscriptions),
+                "events_received": self.events_received,
+                "events_dispatched": self.events_dispatched,
+                "callback_errors": self.callback_errors,
+            }
+
+    def stop(self) -> None:
+        if self.started:
+            self.observer.stop()
+            self.observer.join(timeout=5)
+        self.executor.shutdown(wait=False)
+
+
+_file_watcher = None
+_file_watcher_lock = threading.Lock()
+
+
+def get_file_watcher() -> FileWatcher:
+    """Process wide watcher, created on first use"""
+    global _file_watcher
+    with _file_watcher_lock:
+        if _file_watcher is None:
+            _file_watcher = FileWatcher()
+            atexit.register(_file_watcher.stop)
+        return _file_watcher
@@ -0,0 +1,67 @@
+"""Page arguments and list slicing shared by paginated views"""
+
+import math
+
+DEFAULT_PER_PAGE = 48
+MAX_PER_PAGE = 500
+
+
+class Page:
+    """One page of results plus the numbers needed to render page links"""
+    def __init__(self, items:list, page:int, per_page:int, total:int):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def pages(self) -> int:
+        if not self.per_page:
+            return 1
+        return max(math.ceil(self.total / self.per_page), 1)
+
+    @property
+    def has_prev(self) -> bool:
+        return self.page > 1
+
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.pages
+
+    def iter_pages(self, window:int=2):
+        """Page numbers around the current page, None marks a gap"""
+        last = 0
+        for number in range(1, self.pages + 1):
+            if number in (1, self.pages) or abs(number - self.page) <= window:
+                if last and number - last > 1:
+                    yield None
+                yield number
+                last = number
+
+    def to_dict(self) -> dict:
+        return {
+            "page": self.page,
+            "per_page": self.per_page,
+            "pages": self.pages,
+            "total": self.total,
+        }
+
+
+def parse_page_args(args, default_per_page:int=DEFAULT_PER_PAGE) -> tuple[int, int]:
+    """Reads page / per_page from request args, per_page=0 disables paging"""
+    page = max(args.get("page", 1, type=int) or 1, 1)
+    per_page = args.get("per_page", default_per_page, type=int)
+    if per_page is None or per_page < 0:
+        per_page = default_per_page
+    return page, min(per_page, MAX_PER_PAGE)
+
+
+def paginate(items:list, page:int, per_page:int) -> Page:
+    """Slices an already filtered and sorted list"""
+    total = len(items)
+    if not per_page:
+        return Page(items, 1, 0, total)
+    pages = max(math.ceil(total / per_page), 1)
+    page = min(page, pages)
+    start = (page - 1) * per_page
+    return Page(items[start:start + per_page], page, per_page, total)
@@ -21,8 +21,8 @@ class RunBase:
         self.work_dir = work_dir
 
     def run(self) -> Queue:
-        oldcwd = os.getcwd()
         self.status = None
+        self.returncode = None
         try:
             def pipe_output(pipe, tag) -> None:
                 for line in iter(pipe.readline, ''):
@@ -30,9 +30,10 @@ class RunBase:
                     self.queue.put_nowait(msg)
                 pipe.close()
 
-            os.chdir(self.work_dir)
+            # cwd rather than os.chdir, runs happen on background threads
             process = subprocess.Popen(
                 self.call,
+                cwd=self.work_dir,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
@@ -48,12 +49,11 @@ class RunBase:
                 )
             stdout_thread.start()
             stderr_thread.start()
-            process.wait()
+            self.returncode = process.wait()
             stdout_thread.join()
             stderr_thread.join()
         except Exception as e:
             self.status = e
-        os.chdir(oldcwd)
         if self.complete_at_end:
             self.queue.put_nowait("__COMPLETE__")
         if self.status:
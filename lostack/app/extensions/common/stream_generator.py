@@ -2,13 +2,80 @@
 
 import queue
 import threading
+import time
 import logging
+from .stream_metrics import stream_metrics
 
+# Lines arriving within this window are sent together in one frame
+BATCH_INTERVAL = 0.05
+# Upper bounds for a single frame
+BATCH_MAX_LINES = 256
+BATCH_MAX_BYTES = 64 * 1024
 
-def stream_generator(target, args=(), kwargs={}):
-    """Runs an action as a thread, yields output queue contents to a generator"""
+
+class StreamQueue(queue.Queue):
+    """
+    Result queue that the consuming generator closes when the client goes away.
+    Bounded producers use put_blocking so a slow client pushes back on them.
+    """
+    def __init__(self, maxsize:int=0):
+        queue.Queue.__init__(self, maxsize)
+        self.closed = threading.Event()
+        self._close_callbacks = []
+
+    def on_close(self, callback) -> None:
+        """Register a callback to run when the consumer closes the stream"""
+        if self.closed.is_set():
+            callback()
+            return
+        self._close_callbacks.append(callback)
+
+    def close(self) -> None:
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        for callback in self._close_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.debug(f"Error running stream close callback - {e}")
+
+    def put_blocking(self, item, poll:float=0.5) -> bool:
+        """Waits for room in the queue. Returns False if the stream was closed."""
+        while not self.closed.is_set():
+            try:
+                self.put(item, timeout=poll)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+def format_frame(lines:list[str]) -> str:
+    """Formats a list of lines as a single multi-line SSE frame"""
+    return "".join(
+        "data: " + part + "\n"
+        for line in lines
+        for part in str(line).split("\n")
+    ) + "\n"
+
+
+def stream_generator(
+    target,
+    args=(),
+    kwargs={},
+    batch_interval:float=BATCH_INTERVAL,
+    max_lines:int=BATCH_MAX_LINES,
+    max_bytes:int=BATCH_MAX_BYTES,
+    queue_size:int=0
+):
+    """
+    Runs an action as a thread, yields output queue contents to a generator.
+    Lines are batched into multi-line frames to cut down on tiny writes.
+    Set queue_size to bound the queue for producers that support backpressure.
+    """
     def generator():
-        result_queue = queue.Queue()
+        result_queue = StreamQueue(queue_size)
         kw = kwargs.copy()
         kw.update({"result_queue": result_queue})
         thread = threading.Thread(
@@ -18,17 +85,41 @@ def stream_generator(target, args=(), kwargs={}):
             daemon=False
         )
         thread.start()
-        while thread.is_alive():
+        try:
+            yield from _drain(thread, result_queue)
+        finally:
+            result_queue.close()
+
+    def _drain(thread, result_queue):
+        done = False
+        while not done:
             try:
                 line = result_queue.get(timeout=0.5)
+            except queue.Empty:
+                if thread.is_alive():
+                    continue
+                break # Thread finished and queue is drained
+
+            batch, size = [], 0
+            deadline = time.monotonic() + batch_interval
+            while True:
                 if line == "__COMPLETE__":
-                    result_queue.task_done()
+                    done = True
                     break
-                yield "data: "+line+"\n\n"
-                # logging.info(line)
-                result_queue.task_done()
-            except queue.Empty:
-                continue
-            except GeneratorExit:
-                break
-    return generator
\ No newline at end of file
+                batch.append(line)
+                size += len(line)
+                if len(batch) >= max_lines or size >= max_bytes:
+                    break
+                try:
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0:
+                        line = result_queue.get(timeout=remaining)
+                    else:
+                        line = result_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                stream_metrics.record_lines(len(batch))
+                yield format_frame(batch)
+    return generator
@@ -2,29 +2,84 @@
 
 import time
 import logging
-from flask import Response
-from .stream_generator import stream_generator
+import zlib
+from flask import Response, current_app, has_request_context, request
+from .stream_generator import stream_generator, BATCH_INTERVAL
+from .stream_metrics import stream_metrics
+
+GZIP_LEVEL = 6
 
 class StreamHandler:
     """Handler for websocket stream generation"""
     
     @staticmethod
-    def create_response(generator_func, mimetype='text/event-stream'):
+    def create_response(generator_func, mimetype='text/event-stream', compress=None):
         """Standard response wrapper for all streaming endpoints"""
+        headers = {
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'X-Accel-Buffering': 'no',
+        }
+        if compress is None:
+            compress = StreamHandler._client_accepts_gzip()
+        if compress:
+            headers['Content-Encoding'] = 'gzip'
+            headers['Vary'] = 'Accept-Encoding'
         return Response(
-            generator_func(),
+            StreamHandler._metered(generator_func(), compress),
             mimetype=mimetype,
-            headers={
-                'Cache-Control': 'no-cache',
-                'Connection': 'keep-alive',
-            }
+            headers=headers
         )
+
+    @staticmethod
+    def _client_accepts_gzip() -> bool:
+        """Check app config and request headers to see if gzip can be used"""
+        if not has_request_context():
+            return False
+        if not current_app.config.get("STREAM_GZIP", False):
+            return False
+        return 'gzip' in request.accept_encodings
+
+    @staticmethod
+    def _batch_interval() -> float:
+        """Get the frame batching window from app config"""
+        if not has_request_context():
+            return BATCH_INTERVAL
+        return current_app.config.get("STREAM_BATCH_INTERVAL", BATCH_INTERVAL)
+
+    @staticmethod
+    def _metered(frames, compress:bool=False):
+        """
+        Counts frames and bytes sent, optionally gzips each frame.
+        Each frame is sync flushed so the client can decode it immediately.
+        """
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+        stream_metrics.stream_opened()
+        try:
+            for frame in frames:
+                data = frame.encode('utf-8') if isinstance(frame, str) else frame
+                size = len(data)
+                if compressor:
+                    data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                stream_metrics.record_frame(size, len(data))
+                yield data
+            if compressor:
+                yield compressor.flush()
+        finally:
+            frames.close()
+            stream_metrics.stream_closed()
     
     @staticmethod
-    def generic_stream(action, target, *args, **kw):
+    def generic_stream(action, target, *args, queue_size=0, **kw):
         """Generic streaming handler"""
 
-        stream = stream_generator(action, (target, *args), kw)
+        stream = stream_generator(
+            action,
+            (target, *args),
+            kw,
+            batch_interval=StreamHandler._batch_interval(),
+            queue_size=queue_size
+        )
         
         def generator():
             for message in stream(): 
@@ -35,12 +90,18 @@ class StreamHandler:
         return StreamHandler.create_response(generator)
 
     @staticmethod
-    def generic_context_stream(action, app, target, *args, force_sync=True, **kw):
+    def generic_context_stream(action, app, target, *args, force_sync=True, queue_size=0, **kw):
         """Generic streaming handler"""
         if force_sync:
             kw.update({"complete":False})
             
-        stream = stream_generator(action, (target, *args), kw)
+        stream = stream_generator(
+            action,
+            (target, *args),
+            kw,
+            batch_interval=StreamHandler._batch_interval(),
+            queue_size=queue_size
+        )
         
         def generator():
             for message in stream(): 
@@ -75,13 +136,18 @@ class StreamHandler:
         return StreamHandler.create_response(generator)
 
     @staticmethod
-    def create_stream(action, context=False):
-        """Factory function to create docker streaming functions"""
+    def create_stream(action, context=False, queue_size=0, force_sync=True):
+        """
+        Factory function to create docker streaming functions
+        Set queue_size for actions that apply backpressure (log streams)
+        Context streams sync services after the action unless force_sync is False
+        """
         if context:
             def stream_func(app, *args, **kw):
                 print(action, app, *args)
-                return StreamHandler.generic_context_stream(action, app, *args, **kw)
+                kw.setdefault("force_sync", force_sync)
+                return StreamHandler.generic_context_stream(action, app, *args, queue_size=queue_size, **kw)
         else:
             def stream_func(*args, **kw):
-                return StreamHandler.generic_stream(action, *args, **kw)
+                return StreamHandler.generic_stream(action, *args, queue_size=queue_size, **kw)
         return stream_func
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""Counters for data sent through event streams"""
+
+import threading
+
+
+class StreamMetrics:
+    """Thread safe counters for streamed responses"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.streams_opened = 0
+        self.streams_active = 0
+        self.frames_sent = 0
+        self.lines_sent = 0
+        self.bytes_sent = 0 # Uncompressed payload
+        self.wire_bytes_sent = 0 # After compression
+
+    def stream_opened(self) -> None:
+        with self._lock:
+            self.streams_opened += 1
+            self.streams_active += 1
+
+    def stream_closed(self) -> None:
+        with self._lock:
+            self.streams_active -= 1
+
+    def record_lines(self, count:int) -> None:
+        with self._lock:
+            self.lines_sent += count
+
+    def record_frame(self, size:int, wire_size:int) -> None:
+        with self._lock:
+            self.frames_sent += 1
+            self.bytes_sent += size
+            self.wire_bytes_sent += wire_size
+
+    def snapshot(self) -> dict:
+        """Get a consistent copy of all counters"""
+        with self._lock:
+            return {
+                "streams_opened": self.streams_opened,
+                "streams_active": self.streams_active,
+                "frames_sent": self.frames_sent,
+                "lines_sent": self.lines_sent,
+                "bytes_sent": self.bytes_sent,
+                "wire_bytes_sent": self.wire_bytes_sent,
+            }
+
+
+stream_metrics = StreamMetrics()
@@ -0,0 +1,227 @@
+"""
+Offline depot bundles.
+A bundle is an uncompressed tar of bundle.json, the package directories
+(packages/<name>/...) and one `docker save` archive per image
+(images/<n>.tar). Exports are streamed out while the tar is written and
+imports stream each image archive straight into `docker load`, so neither
+holds a whole archive in memory. Imported packages land in the bundle
+depot source and their images are already local when they are installed.
+"""
+
+import io
+import json
+import logging
+import os
+import queue
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+from pathlib import Path, PurePosixPath
+from .depot_source import PACKAGE_COMPOSE
+from .docker.image_pull import ensure_image
+
+BUNDLE_MANIFEST = "bundle.json"
+BUNDLE_FORMAT = 1
+CHUNK_SIZE = 1 << 20
+# Chunks buffered between the tar writer thread and the response
+_BUFFERED_CHUNKS = 16
+
+logger = logging.getLogger(__name__)
+
+
+class BundleError(ValueError):
+    pass
+
+
+def package_images(package:dict) -> list[str]:
+    """Images used by a package's services, in order, without duplicates"""
+    images = []
+    for service in (package.get("services") or {}).values():
+        image = (service or {}).get("image")
+        if image and image not in images:
+            images.append(image)
+    return images
+
+
+class _QueueWriter:
+    """File object handing tar output to the reading generator, blocks while it is full"""
+    def __init__(self, chunks:queue.Queue, cancelled:threading.Event):
+        self.chunks = chunks
+        self.cancelled = cancelled
+
+    def write(self, data:bytes) -> int:
+        while True:
+            if self.cancelled.is_set():
+                raise BundleError("Bundle export cancelled")
+            try:
+                self.chunks.put(bytes(data), timeout=1)
+                return len(data)
+            except queue.Full:
+                continue
+
+
+def export_bundle(api_client, packages:dict[str:tuple[Path, dict]]):
+    """
+    Returns a generator yielding a bundle of `packages` ({name: (package dir,
+    package data)}). Raises BundleError before anything is streamed if a
+    package can't be bundled.
+    """
+    images = []
+    for name, (_, package) in packages.items():
+        for image in package_images(package):
+            if "$" in image:
+                # Only resolved at install time, there is no image to save
+                raise BundleError(f"Package {name} uses an interpolated image reference {image}")
+            if image not in images:
+                images.append(image)
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "created": time.time(),
+        "packages": {name: {"images": package_images(package)} for name, (_, package) in packages.items()},
+        "images": {image: f"images/{index}.tar" for index, image in enumerate(images)},
+    }
+    return _stream_bundle(api_client, packages, manifest)
+
+
+def _stream_bundle(api_client, packages:dict[str:tuple[Path, dict]], manifest:dict):
+    """
+    Writes the tar on a thread and yields it. Each image is saved to a
+    temporary file first, tar needs its size before the data, then copied
+    into the stream.
+    """
+    chunks = queue.Queue(_BUFFERED_CHUNKS)
+    cancelled = threading.Event()
+
+    def write() -> None:
+        try:
+            with tarfile.open(fileobj=_QueueWriter(chunks, cancelled), mode="w|", bufsize=CHUNK_SIZE) as tar:
+                data = json.dumps(manifest, indent=2).encode()
+                info = tarfile.TarInfo(BUNDLE_MANIFEST)
+                info.size, info.mtime = len(data), manifest["created"]
+                tar.addfile(info, io.BytesIO(data))
+                for name, (package_dir, _) in packages.items():
+                    tar.add(package_dir, arcname=f"packages/{name}")
+                for image, member in manifest["images"].items():
+                    ensure_image(api_client, image)
+                    with tempfile.TemporaryFile() as spool:
+                        for chunk in api_client.get_image(image, chunk_size=CHUNK_SIZE):
+                            spool.write(chunk)
+                        info = tarfile.TarInfo(member)
+                        info.size, info.mtime = spool.tell(), time.time()
+                        spool.seek(0)
+                        tar.addfile(info, spool)
+                    logger.info(f"Added {image} to bundle")
+        except Exception as e:
+            if not cancelled.is_set():
+                logger.error(f"Bundle export failed - {e}")
+                chunks.put(e)
+        else:
+            chunks.put(None)
+
+    writer = threading.Thread(target=write, daemon=True, name="BundleExport")
+    writer.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        # Client went away, stop the writer
+        cancelled.set()
+
+
+def _load_image(api_client, fileobj, image:str, result_queue:queue.Queue|None) -> None:
+    """Streams one image archive into `docker load`"""
+    data = iter(lambda: fileobj.read(CHUNK_SIZE), b"")
+    for status in api_client.load_image(data):
+        if "error" in status:
+            raise BundleError(f"Could not load {image} - {status['error']}")
+        if result_queue is not None and status.get("stream"):
+            result_queue.put_nowait(status["stream"].strip())
+
+
+def _member_parts(member:tarfile.TarInfo) -> tuple[str]:
+    path = PurePosixPath(member.name)
+    if path.is_absolute() or ".." in path.parts or not (member.isfile() or member.isdir()):
+        raise BundleError(f"Refusing unsafe bundle member {member.name}")
+    return path.parts
+
+
+def import_bundle(
+    api_client,
+    stream,
+    bundle_dir:os.PathLike,
+    result_queue:queue.Queue|None=None
+) -> dict:
+    """
+    Reads a bundle from a file-like `stream` in one pass. Images are loaded
+    as they arrive, packages are staged and moved into bundle_dir/packages
+    once the whole bundle has been read.
+    """
+    bundle_dir = Path(bundle_dir)
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".import-", dir=bundle_dir))
+    manifest = None
+    loaded = []
+    try:
+        with tarfile.open(fileobj=stream, mode="r|") as tar:
+            for member in tar:
+                parts = _member_parts(member)
+                if member.name == BUNDLE_MANIFEST:
+                    try:
+                        manifest = json.load(tar.extractfile(member))
+                    except ValueError as e:
+                        raise BundleError(f"Invalid {BUNDLE_MANIFEST} - {e}")
+                    if not isinstance(manifest, dict):
+                        raise BundleError(f"{BUNDLE_MANIFEST} must be an object")
+                    if manifest.get("format") != BUNDLE_FORMAT:
+                        raise BundleError(f"Unsupported bundle format {manifest.get('format')}")
+                    for key in ("packages", "images"):
+                        if not isinstance(manifest.get(key), dict):
+                            raise BundleError(f"{BUNDLE_MANIFEST} has no {key} mapping")
+                    if not all(isinstance(n, str) and isinstance(m, str) for n, m in manifest["images"].items()):
+                        raise BundleError("Bundle manifest has invalid image entries")
+                    if any(len(PurePosixPath(n).parts) != 1 or n in (".", "..") for n in manifest["packages"]):
+                        raise BundleError("Bundle manifest has invalid package names")
+                elif manifest is None:
+                    raise BundleError(f"{BUNDLE_MANIFEST} must be the first bundle member")
+                elif parts[0] == "packages" and len(parts) > 1 and parts[1] in manifest["packages"]:
+                    target = staging.joinpath(*parts)
+                    if member.isdir():
+                        target.mkdir(parents=True, exist_ok=True)
+                        continue
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    with open(target, "wb") as f:
+                        shutil.copyfileobj(tar.extractfile(member), f, CHUNK_SIZE)
+                elif parts[0] == "images" and member.isfile():
+                    image = next((i for i, m in manifest["images"].items() if m == member.name), None)
+                    if image is None:
+                        raise BundleError(f"{member.name} isn't listed in the bundle manifest")
+                    if result_queue is not None:
+                        result_queue.put_nowait(f"Loading {image}")
+                    _load_image(api_client, tar.extractfile(member), image, result_queue)
+                    loaded.append(image)
+                else:
+                    raise BundleError(f"Unexpected bundle member {member.name}")
+        if manifest is None:
+            raise BundleError(f"Bundle has no {BUNDLE_MANIFEST}")
+        for name in manifest["packages"]:
+            if not (staging / "packages" / name / PACKAGE_COMPOSE).is_file():
+                raise BundleError(f"Bundle package {name} has no {PACKAGE_COMPOSE}")
+        packages_dir = bundle_dir / "packages"
+        packages_dir.mkdir(exist_ok=True)
+        for name in manifest["packages"]:
+            target = packages_dir / name
+            if target.exists():
+                shutil.rmtree(target)
+            os.replace(staging / "packages" / name, target)
+    except tarfile.TarError as e:
+        raise BundleError(f"Invalid bundle archive - {e}")
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return {"packages": sorted(manifest["packages"]), "images": loaded}
@@ -1,15 +1,32 @@
 import logging
 import os
+import pickle
 import queue
+import threading
+import time
+import uuid
 import yaml
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from .git import RepoManager
-from app.extensions.common.label_extractor import LabelExtractor as labext
+from .depot_bundle import BundleError, export_bundle, import_bundle
+from .depot_search import DepotSearchIndex, EMPTY_INDEX
+from .depot_validator import DepotValidator, InstallEnvironment
+from .depot_source import (
+    BUNDLE_SOURCE,
+    BUNDLE_SOURCE_PRIORITY,
+    DEFAULT_SOURCE,
+    DepotSource
+)
+from app.extensions.common.file_watcher import get_file_watcher
 from app.extensions.common.stream_handler import StreamHandler
 
+# Quiet period before applying queued changes, a git pull lands as one batch
+RESCAN_DEBOUNCE = 1.0
+# Bump when the cached structures change shape
+CACHE_VERSION = 4
+
 
 def load_yaml(file:os.PathLike, required_sections:list[str]=[], encoding='utf-8',) -> dict:
     """Loads a YAML file into a Python dict"""
@@ -28,141 +45,381 @@ def load_yaml(file:os.PathLike, required_sections:list[str]=[], encoding='utf-8'
     return data    
 
 
-class DepotManager(FileSystemEventHandler):
+class DepotManager:
+    """
+    Catalog of depot packages merged from every configured source.
+    The default depot (DEPOT_URL / DEPOT_DIR) is joined by DEPOT_SOURCES,
+    when sources share a package name the highest priority wins, ties go to
+    the source listed first.
+    """
     def __init__(self, app, modified_callback=None):
+        self.app = app
         self.path = Path(app.config["DEPOT_DIR"]).resolve()
         self.dev_mode = app.config["DEPOT_DEV_MODE"]
         self.modified_callback = modified_callback
+        self.sources = self._create_sources(app.config)
+        self.sources_by_name = {source.name: source for source in self.sources}
+        # Merged view, replaced whole on every change so readers never see a partial update
         self.packages = {}
+        self.package_sources = {} # package name -> DepotSource it is taken from
+        self.conflicts = {} # package name -> names of lower priority sources that also have it
+        self.search_index = EMPTY_INDEX
+        self.validator = DepotValidator()
+        # Bumped when packages change / are installed or removed, keys the page memo
+        self.version = 0
+        self.installed_version = 0
+        # Distinguishes versions across restarts so stale ETags never match
+        self.instance = uuid.uuid4().hex[:8]
+        self._page_data = (None, None)
+        self.cache_file = app.config.get("DEPOT_CACHE_FILE")
+        self._pending = defaultdict(set) # source name -> package names
+        self._pending_lock = threading.Lock()
+        self._rescan_timer = None
+        self._merge_lock = threading.Lock()
+        self.sync_interval = app.config.get("DEPOT_SYNC_INTERVAL", 0)
+        # Replaced whole on each change, read by the depot page
+        self.sync_status = {"state": "idle"}
+        self._sync_lock = threading.Lock()
+        self._sync_stopped = threading.Event()
+        self.sync_thread = None
+        self.watches = {} # source name -> file watcher subscription
         self.logger = logging.getLogger(__name__ + f'.DepotManager.{self.path}')
 
-        self.repo_manager = RepoManager(
-            self.path,
-            repo_url = app.config["DEPOT_URL"],
-            branch = app.config["DEPOT_BRANCH"],
-        )
+        # Serve the last known depot straight away, git runs in the background
+        self._load_cache()
+        self._apply(self._scan_sources(pull=False))
         if not self.dev_mode:
-            self.logger.info("Ensuring depot is up to date...")
-            self._update_repo()
+            self.start_sync()
+        self.logger.info(f"Initialized Depot Handler with {len(self.sources)} sources")
+
+    def _create_sources(self, config:dict) -> list[DepotSource]:
+        """Default depot plus DEPOT_SOURCES, highest priority first"""
+        sources = [DepotSource(
+            DEFAULT_SOURCE,
+            self.path,
+            priority = 0,
+            repo_url = config.get("DEPOT_URL"),
+            branch = config.get("DEPOT_BRANCH"),
+            shallow = config.get("DEPOT_SHALLOW", False),
+        )]
+        for spec in config.get("DEPOT_SOURCES") or []:
+            if spec["name"] in {s.name for s in sources}:
+                raise ValueError(f"Duplicate depot source name {spec['name']}")
+            sources.append(DepotSource(
+                spec["name"],
+                # Git sources are checked out next to the default depot
+                spec.get("path") or self.path.with_name(f"{self.path.name}-{spec['name']}"),
+                priority = spec["priority"],
+                repo_url = spec.get("url"),
+                branch = spec.get("branch") or config.get("DEPOT_BRANCH"),
+                shallow = config.get("DEPOT_SHALLOW", False),
+            ))
+        if config.get("DEPOT_BUNDLE_DIR"):
+            sources.append(DepotSource(
+                BUNDLE_SOURCE,
+                config["DEPOT_BUNDLE_DIR"],
+                priority = BUNDLE_SOURCE_PRIORITY,
+            ))
+        # sorted is stable, so equal priorities keep their configured order
+        return sorted(sources, key=lambda s: -s.priority)
+
+    def _watch(self, source:DepotSource) -> None:
+        """Subscribes to a source's changes once its directory exists"""
+        if source.name not in self.watches and source.path.is_dir():
+            self.watches[source.name] = get_file_watcher().subscribe(
+                source.path,
+                partial(self.on_modified, source),
+                pattern="*.yml",
+                recursive=True
+            )
+
+    def start_sync(self) -> None:
+        """Syncs now, then every DEPOT_SYNC_INTERVAL seconds if set"""
+        self.sync_thread = threading.Thread(target=self._sync_loop, daemon=True, name="DepotSync")
+        self.sync_thread.start()
 
-        self.observer = Observer()
-        self.observer.schedule(self, str(self.path), recursive=True)
-        self.observer.start()
-        self._scan()
-        self.logger.info(f"Initialized Depot Handler")
+    def stop_sync(self) -> None:
+        self._sync_stopped.set()
 
-    def _update_repo(self, result_queue=None) -> [None]:
-        """Clone / pull depo git repo on background thread, pipes output to logs/stdout"""
+    def _sync_loop(self) -> None:
+        while not self._sync_stopped.is_set():
+            self.sync()
+            if not self.sync_interval:
+                break
+            self.sync_status = {**self.sync_status, "next": time.time() + self.sync_interval}
+            self._sync_stopped.wait(self.sync_interval)
+
+    def _scan_sources(self, result_queue=None, pull:bool=True) -> dict:
+        """
+        Syncs (pull) or just rescans every source concurrently, so adding
+        sources doesn't add up their sync times.
+        Returns {source name: (changed, dirty)}, see DepotSource.rescan
+        """
         if result_queue is None:
             result_queue = queue.Queue()
-        if self.dev_mode:
+        with ThreadPoolExecutor(max_workers=len(self.sources), thread_name_prefix="DepotSource") as pool:
+            futures = {
+                source.name: (
+                    pool.submit(source.sync, result_queue) if pull else pool.submit(source.scan)
+                )
+                for source in self.sources
+            }
+        for source in self.sources:
+            self._watch(source)
+        return {name: future.result() for name, future in futures.items()}
+
+    def sync(self, result_queue=None) -> bool:
+        """
+        Clones / pulls every depot source in parallel then merges them, the new
+        catalog replaces the old in one swap. Returns False if any source
+        failed or a sync was already running.
+        """
+        if result_queue is None:
+            result_queue = queue.Queue()
+        if not self._sync_lock.acquire(blocking=False):
+            result_queue.put_nowait("Depot sync already running")
+            return False
+        try:
+            started = time.time()
+            self.sync_status = {**self.sync_status, "state": "syncing", "started": started}
+            self.logger.info(f"Syncing {len(self.sources)} depot sources...")
+            self._apply(self._scan_sources(result_queue))
+            errors = [
+                f"{source.name}: {source.sync_status['error']}"
+                for source in self.sources if source.sync_status.get("error")
+            ]
+            ok = not errors
+            finished = time.time()
+            self.sync_status = {
+                "state": "ok" if ok else "error",
+                "started": started,
+                "finished": finished,
+                "duration": round(finished - started, 2),
+                "error": "; ".join(errors) or None,
+                "packages": len(self.packages),
+                "sources": {source.name: source.sync_status for source in self.sources},
+            }
+            self.logger.info(f"Depot sync {'finished' if ok else 'failed'} in {finished - started:.1f}s")
+            result_queue.put_nowait(f"Depot sync {'finished' if ok else 'failed'} in {finished - started:.1f}s")
+            return ok
+        finally:
+            self._sync_lock.release()
+
+    def _apply(self, results:dict) -> set[str]:
+        """
+        Merges sources after they changed, rebuilds the search index and saves
+        the cache as needed. Returns the merged package names that changed.
+        """
+        changed = {name for changed, _ in results.values() for name in changed}
+        if changed or (any(s.packages for s in self.sources) and self.search_index is EMPTY_INDEX):
+            self._merge()
+            self._rebuild_search_index()
+            self.version += 1
+            self.validate_packages()
+        if any(dirty for _, dirty in results.values()):
+            self._save_cache()
+        return changed
+
+    def _merge(self) -> None:
+        """Builds the merged catalog, the first source (by priority) with a package wins"""
+        with self._merge_lock:
+            packages, package_sources, conflicts = {}, {}, {}
+            for source in self.sources:
+                for name, data in source.packages.items():
+                    if name in packages:
+                        conflicts.setdefault(name, []).append(source.name)
+                        continue
+                    packages[name] = data
+                    package_sources[name] = source
+            self.package_sources = package_sources
+            self.conflicts = conflicts
+            self.packages = packages
+        if conflicts:
+            self.logger.info(f"{len(conflicts)} depot packages are provided by more than one source")
+
+    def _load_cache(self) -> None:
+        """Seeds each source from the cache written by the last run"""
+        if not self.cache_file or not os.path.isfile(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "rb") as f:
+                cache = pickle.load(f)
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable depot cache - {e}")
             return
-        return self.repo_manager.ensure_repo(result_queue)
+        if cache.get("version") != CACHE_VERSION:
+            return
+        for name, state in cache["sources"].items():
+            if name in self.sources_by_name:
+                self.sources_by_name[name].load_cache_state(state)
+
+    def _save_cache(self) -> None:
+        if not self.cache_file:
+            return
+        cache = {
+            "version": CACHE_VERSION,
+            "sources": {source.name: source.cache_state() for source in self.sources},
+        }
+        temp_file = f"{self.cache_file}.tmp"
+        try:
+            with open(temp_file, "wb") as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_file, self.cache_file)
+        except OSError as e:
+            self.logger.warning(f"Could not write depot cache - {e}")
 
     def stream_update_repo(self) -> "Reponse":
         """Get flask response object to stream depot update to websocket"""
         if self.dev_mode:
             return StreamHandler.message_completion_stream("CAN'T UPDATE IN DEV MODE")
-        def _update_repo(result_queue):
-            return self.repo_manager.ensure_repo(result_queue)
+        def _update_repo(target, result_queue):
+            return self.sync(result_queue)
         return StreamHandler.generic_stream(_update_repo, [])
     
-    def on_modified(self, event) -> None:
-        if not event.src_path.endswith(".yml"):
-            return # Ignore non YAML files
-        self.logger.info(f"Depot compose file modified: {event.src_path}")
-        self._scan()
+    def on_modified(self, source:DepotSource, event) -> None:
+        """Shared watcher callback for YAML files in a depot source, queues the packages touched"""
+        names = {
+            name for name in (
+                source.package_for_path(p)
+                for p in (event.src_path, getattr(event, "dest_path", None)) if p
+            ) if name
+        }
+        if not names:
+            return
+        with self._pending_lock:
+            self._pending[source.name].update(names)
+            if self._rescan_timer:
+                self._rescan_timer.cancel()
+            self._rescan_timer = threading.Timer(RESCAN_DEBOUNCE, self._apply_pending)
+            self._rescan_timer.daemon = True
+            self._rescan_timer.start()
+
+    def _apply_pending(self) -> None:
+        with self._pending_lock:
+            pending, self._pending = self._pending, defaultdict(set)
+            self._rescan_timer = None
+        changed = self._apply({
+            name: self.sources_by_name[name].rescan(names)
+            for name, names in pending.items()
+        })
+        if changed:
+            self.logger.info(f"Reloaded depot packages: {', '.join(sorted(changed))}")
         if self.modified_callback:
-            self.modified_callback(event.src_path)
-
-    def _scan(self) -> dict[str:dict]:
-        """Scans and loads depot"""
-        self.logger.info(f"Scanning depot directory: {self.path}")
-        packages = {}
-        with os.scandir(os.path.join(os.path.abspath(str(self.path)), "packages")) as it:
-            for entry in it:
-                if os.path.isfile(entry.path):
-                    continue
-                if os.path.isdir(entry.path):
-                    package_name = entry.name
-                    package_compose = os.path.join(os.path.abspath(entry.path), "docker-compose.yml")
-                    if os.path.isfile(package_compose):
-                        packages[package_name] = load_yaml(Path(package_compose))
-        self.logger.info(f"Found {len(packages)} packages in depot directory: {self.path}")
-        self.packages = packages
+            for name in changed:
+                source = self.package_sources.get(name)
+                if source:
+                    self.modified_callback(str(source.package_path(name)))
 
-    def format_packages_for_depot_page(self, package_names:list[str]) -> dict:
-        """Collects and formats packages for depot page"""
-        packages = {}
-        for package_name in package_names:
-            if package_name not in self.packages:
-                continue
+    def export_bundle(self, api_client, package_names:list[str]):
+        """Streams an offline bundle of the named packages and their images"""
+        missing = [name for name in package_names if name not in self.packages]
+        if missing:
+            raise BundleError(f"Unknown depot packages: {', '.join(missing)}")
+        return export_bundle(api_client, {
+            name: (self.package_sources[name].package_path(name).parent, self.packages[name])
+            for name in package_names
+        })
+
+    def import_bundle(self, api_client, stream, result_queue=None) -> dict:
+        """Loads a bundle's images and adds its packages to the bundle source"""
+        source = self.sources_by_name.get(BUNDLE_SOURCE)
+        if source is None:
+            raise BundleError("Bundles are disabled, set DEPOT_BUNDLE_DIR")
+        result = import_bundle(api_client, stream, source.path, result_queue)
+        self._watch(source)
+        self._apply({source.name: source.rescan(set(result["packages"]))})
+        return result
 
-            package_services = self.packages[package_name].get("services")
+    def rescan_packages(self, names:set[str]) -> set[str]:
+        """Reloads the named packages in every source, returns those added, changed or removed"""
+        return self._apply({source.name: source.rescan(names) for source in self.sources})
 
-            primary_config = package_services[package_name]
-            primary_labels = labext.normalize_labels(primary_config.get('labels', {}))
-            primary_group = primary_labels.get('lostack.group', package_name)
+    def _rebuild_search_index(self) -> None:
+        """Indexes every package's page entry and swaps the new index in"""
+        entries = {}
+        for name in list(self.packages):
+            try:
+                entry = self._page_entry(name)
+            except Exception:
+                continue # Logged when the entry was first built
+            if entry is not None:
+                entries[name] = entry
+        self.search_index = DepotSearchIndex(entries)
+        self.logger.info(f"Indexed {len(self.search_index)} depot packages for search")
 
-            packages[package_name] = primary_config.copy()
-            packages[package_name]['dependencies'] = {}
+    def search_packages(
+        self,
+        query:str="",
+        group:str|None=None,
+        tag:str|None=None,
+        names:set[str]|None=None
+    ) -> dict:
+        """Ranked depot search, see DepotSearchIndex.search"""
+        return self.search_index.search(query, group=group, tag=tag, names=names)
 
-            for service_name, service_config in package_services.items():
-                if service_name == package_name or service_name in package_names:
-                    continue
-                service_labels = labext.normalize_labels(service_config.get('labels', {}))
-                service_group = service_labels.get('lostack.group', service_name)
+    def installed_changed(self) -> None:
+        """Drops the memoized page data after a package is installed or removed"""
+        self.installed_version += 1
+        # Collisions with installed services changed
+        self.validate_packages()
 
-                if service_group == primary_group:
-                    packages[package_name]['dependencies'][service_name] = service_config.copy()
+    def validate_packages(self) -> None:
+        """Re-validates the catalog in the background, see DepotValidator"""
+        def load() -> tuple[dict, InstallEnvironment]:
+            packages = {}
+            for name, data in self.packages.items():
+                key = self.package_sources[name].package_files.get(name)
+                if key:
+                    packages[name] = (key[2], data)
+            docker_manager = getattr(self.app, "docker_manager", None)
+            return packages, InstallEnvironment(docker_manager.compose_file_handlers if docker_manager else None)
+        self.validator.schedule(load)
 
-        packages = {p: packages[p] for p in sorted(packages.keys())}
-        packages = self._preprocess_packages_data_for_depot_page(packages)
-        return packages
+    def page_data(self, load_installed:callable) -> dict:
+        """
+        format_packages_for_depot_page for every package that isn't installed,
+        memoized until the depot or the installed packages change.
+        `load_installed` returns the installed package names.
+        """
+        key = (self.version, self.installed_version, self.validator.version)
+        cached_key, data = self._page_data
+        if cached_key == key:
+            return data
+        installed = set(load_installed())
+        available = [name for name in self.packages if name not in installed]
+        data = {
+            **self.format_packages_for_depot_page(available),
+            'available': frozenset(available),
+            'validation': self.validator.results,
+            'etag': f"{self.instance}-{'-'.join(map(str, key))}",
+        }
+        self._page_data = (key, data)
+        return data
 
-    def _preprocess_packages_data_for_depot_page(self, packages:dict) -> dict:
-        """Process packages data to reduce template complexity"""
+    def format_packages_for_depot_page(self, package_names:list[str]) -> dict:
+        """Collects and formats packages for depot page"""
+        package_names = set(package_names)
         processed_packages = {}
         group_counts = defaultdict(int)
         tag_counts = defaultdict(int)
-        
-        for package_name, package_data in packages.items():
-            labels = package_data.get('labels', [])
-            
-            # Pre-process labels (was messy/expensive in jinja)
-            group = labext.get_by_prefix(labels, 'homepage.group')
-            description = labext.get_by_prefix(labels, 'homepage.description')
-            details = labext.get_by_prefix(labels, 'lostack.details')
-            tags = labext.get_tags(labels)
-            service_port = labext.get_lostack_port(labels)
-            
-            # Data for template
-            processed_package = {
-                'name': package_name,
-                'title': package_name.replace('-', ' ').replace('_', ' ').title(),
-                'image': package_data.get('image'),
-                'volumes': package_data.get('volumes', []),
-                'dependencies': package_data.get('dependencies', {}),
-                'labels': labels,
-                'group': group,
-                'description': description,
-                'details': details,
-                'tags': tags,
-                'service_port': service_port,
-                
-                'search_data': {
-                    'name': package_name.lower(),
-                    'title': package_name.replace('-', ' ').replace('_', ' ').title().lower(),
-                    'description': (description or '').lower(),
-                    'group': (group or '').lower(),
-                    'tags': ','.join(tag.lower() for tag in tags)
+
+        for package_name in sorted(package_names):
+            entry = self._page_entry(package_name)
+            if entry is None:
+                continue
+            if package_names.intersection(entry['dependencies']):
+                # Services that are themselves listed packages aren't shown as dependencies
+                entry = {
+                    **entry,
+                    'dependencies': {
+                        n: c for n, c in entry['dependencies'].items()
+                        if n not in package_names
+                    }
                 }
-            }
-            
-            processed_packages[package_name] = processed_package
-            if group: group_counts[group] += 1
-            for tag in tags: tag_counts[tag] += 1
-        
+            processed_packages[package_name] = entry
+            if entry['group']: group_counts[entry['group']] += 1
+            for tag in entry['tags']: tag_counts[tag] += 1
+
         return {
             'packages': processed_packages,
             'groups': dict(sorted(group_counts.items())),
@@ -170,6 +427,23 @@ class DepotManager(FileSystemEventHandler):
             'total_count': len(processed_packages)
         }
 
+    def _page_entry(self, package_name:str) -> dict|None:
+        """Preprocessed page data for a package, from the source it is taken from"""
+        source = self.package_sources.get(package_name)
+        return source.page_entry(package_name) if source else None
+
+    def source_status(self) -> list[dict]:
+        """Per source state for the depot page / API"""
+        return [{
+            "name": source.name,
+            "location": source.location,
+            "priority": source.priority,
+            "git": source.repo_manager is not None,
+            "packages": len(source.packages),
+            "shadowed": sorted(n for n, names in self.conflicts.items() if source.name in names),
+            "sync": source.sync_status,
+        } for source in self.sources]
+
     def get_package_data(self, package_name:str) -> dict:
         """
         Get data for a given package
@@ -0,0 +1,172 @@
+"""
+In-memory full-text index over depot packages.
+Built from the depot page entries whenever packages change and swapped in
+whole, so searches never see a half built index. Supports ranked prefix and
+typo tolerant matching plus group / tag facet counts.
+"""
+
+import bisect
+import re
+from collections import defaultdict
+
+# Field weights, a hit in the name outranks one in the description
+FIELD_WEIGHTS = {
+    "name": 8.0,
+    "title": 6.0,
+    "tags": 4.0,
+    "group": 3.0,
+    "image": 2.0,
+    "description": 1.0,
+}
+PREFIX_FACTOR = 0.6
+FUZZY_FACTOR = 0.4
+# Shorter words only match exactly or by prefix
+FUZZY_MIN_LENGTH = 4
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text:str|None) -> list[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def _deletes(token:str) -> set[str]:
+    """The token with each single character removed"""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _within_one_edit(a:str, b:str) -> bool:
+    """True for one insertion, deletion, substitution or adjacent swap"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diff) == 1 or (
+            len(diff) == 2 and diff[1] == diff[0] + 1
+            and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+        )
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class DepotSearchIndex:
+    """Immutable inverted index, build a new one to reflect changes"""
+    def __init__(self, entries:dict[str:dict]):
+        postings = defaultdict(dict) # token -> {package: weight}
+        deletes = defaultdict(set) # token prefix with one character removed -> tokens
+        self.groups = {}
+        self.tags = {}
+        self.tag_labels = {} # lowercase tag -> first spelling seen, for facets
+        for name, entry in entries.items():
+            self.groups[name] = entry.get("group") or None
+            self.tags[name] = tuple(entry.get("tags") or ())
+            for tag in self.tags[name]:
+                self.tag_labels.setdefault(tag.lower(), tag)
+            fields = {
+                "name": [name.lower(), *tokenize(name)],
+                "title": tokenize(entry.get("title")),
+                "tags": [t for tag in self.tags[name] for t in tokenize(tag)],
+                "group": tokenize(entry.get("group")),
+                "image": tokenize(entry.get("image")),
+                "description": tokenize(entry.get("description")),
+            }
+            for field, tokens in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for token in tokens:
+                    if postings[token].get(name, 0) < weight:
+                        postings[token][name] = weight
+        for token in postings:
+            # Prefixes too, so a typo in a partly typed word still matches
+            for length in range(FUZZY_MIN_LENGTH, len(token) + 1):
+                prefix = token[:length]
+                for deleted in _deletes(prefix) | {prefix}:
+                    deletes[deleted].add(token)
+        self.postings = dict(postings)
+        self.deletes = dict(deletes)
+        self.vocabulary = sorted(self.postings)
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    def _prefixed(self, prefix:str) -> list[str]:
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + "\uffff", start)
+        return self.vocabulary[start:end]
+
+    def _fuzzy(self, token:str) -> set[str]:
+        candidates = set()
+        for deleted in _deletes(token) | {token}:
+            candidates |= self.deletes.get(deleted, set())
+        lengths = (len(token) - 1, len(token), len(token) + 1)
+        return {
+            c for c in candidates
+            if not c.startswith(token) and any(_within_one_edit(token, c[:n]) for n in lengths)
+        }
+
+    def _match(self, token:str) -> dict[str:float]:
+        """Best score per package for one query token"""
+        scores = dict(self.postings.get(token, {}))
+        for other in self._prefixed(token):
+            if other == token:
+                continue
+            for name, weight in self.postings[other].items():
+                scores[name] = max(scores.get(name, 0), weight * PREFIX_FACTOR)
+        if len(token) >= FUZZY_MIN_LENGTH:
+            for other in self._fuzzy(token):
+                for name, weight in self.postings[other].items():
+                    scores[name] = max(scores.get(name, 0), weight * FUZZY_FACTOR)
+        return scores
+
+    def search(
+        self,
+        query:str="",
+        group:str|None=None,
+        tag:str|None=None,
+        names:set[str]|None=None
+    ) -> dict:
+        """
+        Packages matching every word of `query`, best first, restricted to
+        `names` if given. Group facets are counted ignoring the group filter
+        and tag facets ignoring the tag filter, so counts show what picking
+        another value would return.
+        """
+        candidates = set(self.groups) if names is None else set(names) & set(self.groups)
+        scores = {name: 0.0 for name in candidates}
+        for token in dict.fromkeys(tokenize(query)):
+            matches = self._match(token)
+            scores = {name: score + matches[name] for name, score in scores.items() if name in matches}
+            if not scores:
+                break
+
+        tag = tag.lower() if tag else None
+        in_group = lambda name: not group or self.groups[name] == group
+        has_tag = lambda name: not tag or any(t.lower() == tag for t in self.tags[name])
+
+        group_counts = defaultdict(int)
+        tag_counts = defaultdict(int) # lowercase tag -> count, matching the filter
+        results = []
+        for name, score in scores.items():
+            if has_tag(name) and self.groups[name]:
+                group_counts[self.groups[name]] += 1
+            if in_group(name):
+                for t in {t.lower() for t in self.tags[name]}:
+                    tag_counts[t] += 1
+            if in_group(name) and has_tag(name):
+                results.append((name, score))
+        results.sort(key=lambda r: (-r[1], r[0]))
+        return {
+            "results": [{"name": name, "score": round(score, 2)} for name, score in results],
+            "facets": {
+                "groups": dict(sorted(group_counts.items())),
+                "tags": {self.tag_labels[t]: count for t, count in sorted(tag_counts.items())},
+            },
+        }
+
+
+EMPTY_INDEX = DepotSearchIndex({})
@@ -0,0 +1,307 @@
+"""
+One source of depot packages, a git checkout or a local directory laid out
+as packages/<name>/docker-compose.yml. DepotManager merges any number of
+these into a single catalog by priority.
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+import yaml
+from pathlib import Path
+from .git import RepoManager
+from app.extensions.common.label_extractor import LabelExtractor as labext
+
+PACKAGE_COMPOSE = "docker-compose.yml"
+DEFAULT_SOURCE = "default"
+BUNDLE_SOURCE = "bundles"
+# Extra sources outrank the default depot unless given a priority
+EXTRA_SOURCE_PRIORITY = 10
+# Imported bundles outrank both, their images are already local
+BUNDLE_SOURCE_PRIORITY = 20
+
+
+def parse_depot_sources(value:str|list) -> list[dict]:
+    """
+    DEPOT_SOURCES, comma or newline separated `name=location[#branch][@priority]`.
+    Locations starting with / . or ~ are local directories, anything else is
+    cloned with git. Higher priorities win when sources share a package name.
+    e.g. internal=https://git.lan/depot.git#main@50, mine=/srv/depot@100
+    """
+    if isinstance(value, list):
+        return value
+    sources = []
+    for item in (value or "").replace("\n", ",").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, location = item.partition("=")
+        if not sep or not name.strip() or not location.strip():
+            raise ValueError(f"Invalid depot source '{item}', expected name=location")
+        location = location.strip()
+        priority = EXTRA_SOURCE_PRIORITY
+        rest, sep, suffix = location.rpartition("@")
+        if sep and suffix.lstrip("-").isdigit():
+            location, priority = rest, int(suffix)
+        branch = None
+        if "#" in location:
+            location, branch = location.rsplit("#", 1)
+        local = location.startswith(("/", ".", "~"))
+        sources.append({
+            "name": name.strip(),
+            "priority": priority,
+            "path" if local else "url": os.path.expanduser(location) if local else location,
+            "branch": branch,
+        })
+    return sources
+
+
+def preprocess_package_for_depot_page(package_name:str, package_data:dict) -> dict:
+    """Process package data to reduce template complexity"""
+    labels = package_data.get('labels', [])
+
+    # Pre-process labels (was messy/expensive in jinja)
+    group = labext.get_by_prefix(labels, 'homepage.group')
+    description = labext.get_by_prefix(labels, 'homepage.description')
+    details = labext.get_by_prefix(labels, 'lostack.details')
+    icon = labext.get_by_prefix(labels, 'homepage.icon')
+    tags = labext.get_tags(labels)
+    service_port = labext.get_lostack_port(labels)
+
+    # Data for template
+    return {
+        'name': package_name,
+        'title': package_name.replace('-', ' ').replace('_', ' ').title(),
+        'image': package_data.get('image'),
+        'volumes': package_data.get('volumes', []),
+        'dependencies': package_data.get('dependencies', {}),
+        'labels': labels,
+        'group': group,
+        'description': description,
+        'details': details,
+        'icon': icon,
+        'tags': tags,
+        'service_port': service_port,
+    }
+
+
+class DepotSource:
+    def __init__(
+        self,
+        name:str,
+        path:os.PathLike,
+        priority:int=0,
+        repo_url:str|None=None,
+        branch:str|None=None,
+        shallow:bool=False
+    ):
+        self.name = name
+        self.path = Path(path).resolve()
+        self.priority = priority
+        self.repo_manager = None
+        if repo_url:
+            self.repo_manager = RepoManager(
+                self.path,
+                repo_url = repo_url,
+                branch = branch or "main",
+                shallow = shallow,
+                sparse_paths = ["packages"],
+            )
+        # Replaced whole on every change so readers never see a partial update
+        self.packages = {}
+        self.package_files = {} # package name -> (mtime_ns, size, sha256) of its compose file
+        self.page_entries = {} # package name -> preprocessed depot page entry
+        # Replaced whole on each change, read by the depot page
+        self.sync_status = {"state": "idle"}
+        self._scan_lock = threading.Lock()
+        self.logger = logging.getLogger(__name__ + f'.DepotSource.{name}')
+
+    @property
+    def location(self) -> str:
+        return self.repo_manager.repo_url if self.repo_manager else str(self.path)
+
+    def head(self) -> str|None:
+        return self.repo_manager.head() if self.repo_manager else None
+
+    def package_path(self, name:str) -> Path:
+        return self.path / "packages" / name / PACKAGE_COMPOSE
+
+    def package_for_path(self, path:os.PathLike) -> str|None:
+        """Package name for packages/<name>/docker-compose.yml, None for any other file"""
+        try:
+            parts = Path(path).relative_to(self.path).parts
+        except ValueError:
+            return None
+        if len(parts) == 3 and parts[0] == "packages" and parts[2] == PACKAGE_COMPOSE:
+            return parts[1]
+        return None
+
+    def cache_state(self) -> dict:
+        return {
+            "path": str(self.path),
+            "head": self.head(),
+            "packages": self.packages,
+            "package_files": self.package_files,
+            "page_entries": self.page_entries,
+        }
+
+    def load_cache_state(self, state:dict) -> None:
+        """
+        Seeds packages from a previous run. Entries are still checked against
+        each file's mtime and size by the scan, after a change of git HEAD
+        every file is re-hashed instead.
+        """
+        if state.get("path") != str(self.path):
+            return
+        package_files = state["package_files"]
+        if state.get("head") != self.head():
+            package_files = {name: (None, None, key[2]) for name, key in package_files.items()}
+        self.packages = state["packages"]
+        self.package_files = package_files
+        self.page_entries = state["page_entries"]
+        self.logger.info(f"Loaded {len(self.packages)} packages from depot cache")
+
+    def _read_package(self, name:str) -> tuple[tuple|None, dict|None]:
+        """
+        Returns the (mtime_ns, size, sha256) key and data of a package, data is
+        None when the compose file is unchanged since it was last read.
+        """
+        path = self.package_path(name)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None, None
+        previous = self.package_files.get(name)
+        if previous and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+            return previous, None
+        data = path.read_bytes()
+        key = (stat.st_mtime_ns, stat.st_size, hashlib.sha256(data).hexdigest())
+        if previous and previous[2] == key[2]:
+            return key, None
+        try:
+            return key, yaml.safe_load(data)
+        except yaml.YAMLError as e:
+            raise yaml.YAMLError(f"Error parsing YAML file: {e}")
+
+    def rescan(self, names:set[str]) -> tuple[set[str], bool]:
+        """
+        Reloads only the named packages. Returns those added, changed or
+        removed, and whether any file key changed (worth re-caching).
+        """
+        changed_key = False
+        with self._scan_lock:
+            packages = dict(self.packages)
+            package_files = dict(self.package_files)
+            page_entries = dict(self.page_entries)
+            changed = set()
+            for name in names:
+                try:
+                    key, data = self._read_package(name)
+                except (OSError, yaml.YAMLError) as e:
+                    self.logger.error(f"Error loading depot package {name}, keeping previous version - {e}")
+                    continue
+                if key is None:
+                    if packages.pop(name, None) is not None:
+                        changed.add(name)
+                    package_files.pop(name, None)
+                    page_entries.pop(name, None)
+                    continue
+                if key != package_files.get(name):
+                    changed_key = True
+                package_files[name] = key
+                if data is not None:
+                    packages[name] = data
+                    page_entries.pop(name, None)
+                    changed.add(name)
+            self.package_files = package_files
+            self.page_entries = page_entries
+            self.packages = packages
+        # Build page data now so it lands in the cache with the packages
+        for name in changed:
+            try:
+                self.page_entry(name)
+            except Exception as e:
+                self.logger.error(f"Error preparing depot page data for {name} - {e}")
+        return changed, bool(changed) or changed_key
+
+    def scan(self) -> tuple[set[str], bool]:
+        """Rescans every package on disk or previously known, see rescan"""
+        names = set(self.packages)
+        packages_dir = self.path / "packages"
+        if not packages_dir.is_dir():
+            self.logger.info(f"No depot checkout at {self.path} yet")
+            return set(), False
+        with os.scandir(packages_dir) as it:
+            for entry in it:
+                if entry.is_dir():
+                    names.add(entry.name)
+        result = self.rescan(names)
+        self.logger.info(f"Found {len(self.packages)} packages in depot directory: {self.path}")
+        return result
+
+    def sync(self, result_queue:queue.Queue) -> tuple[set[str], bool]:
+        """Clones / pulls a git source then rescans it, see rescan"""
+        started = time.time()
+        self.sync_status = {**self.sync_status, "state": "syncing", "started": started}
+        ok, error, result = True, None, (set(), False)
+        try:
+            if self.repo_manager:
+                result_queue.put_nowait(f"Syncing depot source {self.name} from {self.location}")
+                ok = self.repo_manager.ensure_repo(result_queue)
+                if not ok:
+                    error = "git exited with an error"
+            result = self.scan()
+        except Exception as e:
+            ok = False
+            error = str(e)
+            self.logger.error(f"Error syncing depot source {self.name} - {e}")
+        finished = time.time()
+        self.sync_status = {
+            "state": "ok" if ok else "error",
+            "started": started,
+            "finished": finished,
+            "duration": round(finished - started, 2),
+            "error": error,
+            "head": self.head(),
+            "packages": len(self.packages),
+        }
+        return result
+
+    def page_entry(self, package_name:str) -> dict|None:
+        """Preprocessed page data for a package, built once per version of its compose file"""
+        entry = self.page_entries.get(package_name)
+        if entry is not None:
+            return entry
+        package = self.packages.get(package_name)
+        if package is None:
+            return None
+
+        package_services = package.get("services")
+
+        primary_config = package_services[package_name]
+        primary_labels = labext.normalize_labels(primary_config.get('labels', {}))
+        primary_group = primary_labels.get('lostack.group', package_name)
+
+        package_data = primary_config.copy()
+        package_data['dependencies'] = {}
+
+        for service_name, service_config in package_services.items():
+            if service_name == package_name:
+                continue
+            service_labels = labext.normalize_labels(service_config.get('labels', {}))
+            service_group = service_labels.get('lostack.group', service_name)
+
+            if service_group == primary_group:
+                package_data['dependencies'][service_name] = service_config.copy()
+
+        entry = {
+            **preprocess_package_for_depot_page(package_name, package_data),
+            'source': self.name,
+        }
+        # Dict assignment is atomic, a concurrent rescan at worst drops the entry again
+        if self.packages.get(package_name) is package:
+            self.page_entries[package_name] = entry
+        return entry
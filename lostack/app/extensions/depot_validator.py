@@ -0,0 +1,204 @@
+"""
+Depot package validation.
+Lints every depot package in parallel after each sync, so broken packages
+are flagged on the depot page instead of failing at install time. Checks
+on the package alone are cached per compose file hash, checks against the
+installed services per (hash, installed compose digests).
+"""
+
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.extensions.common.label_extractor import LabelExtractor as labext
+from app.extensions.docker.compose_planner import (
+    ERROR,
+    WARNING,
+    issue,
+    ports_overlap,
+    published_ports
+)
+
+REQUIRED_LABELS = ("lostack.group", "lostack.port", "lostack.primary")
+VALIDATION_WORKERS = 4
+
+# Docker image reference grammar: [registry[:port]/]path[:tag][@digest]
+_COMPONENT = r"[a-z0-9]+(?:(?:[._]|__|-+)[a-z0-9]+)*"
+_IMAGE_RE = re.compile(
+    r"^(?:(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]*[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]*[a-zA-Z0-9])?)*"
+    r"|\[[0-9a-fA-F:]+\])(?::[0-9]+)?/)?"
+    rf"{_COMPONENT}(?:/{_COMPONENT})*"
+    r"(?::[\w][\w.-]{0,127})?"
+    r"(?:@[A-Za-z][A-Za-z0-9]*(?:[-_+.][A-Za-z][A-Za-z0-9]*)*:[0-9a-fA-F]{32,})?$"
+)
+
+
+def lint_package(name:str, package:dict) -> list[dict]:
+    """Checks that depend only on the package's own compose file"""
+    issues = []
+    services = (package or {}).get("services")
+    if not isinstance(services, dict) or not services:
+        return [issue(ERROR, "no-services", None, "Package has no services")]
+    if name not in services:
+        issues.append(issue(ERROR, "no-primary-service", name, f"No service named after the package ({name})"))
+    for service_name, service in services.items():
+        if not isinstance(service, dict):
+            issues.append(issue(ERROR, "invalid-service", service_name, f"Service {service_name} is not a mapping"))
+            continue
+        image = service.get("image")
+        if not image and not service.get("build"):
+            issues.append(issue(ERROR, "no-image", service_name, f"Service {service_name} has neither image nor build"))
+        elif image and "$" not in image:
+            # Interpolated references are only known at install time
+            if not _IMAGE_RE.match(image):
+                issues.append(issue(ERROR, "invalid-image", service_name, f"Invalid image reference {image}"))
+            elif ":" not in image.rsplit("/", 1)[-1] and "@" not in image:
+                issues.append(issue(WARNING, "unpinned-image", service_name, f"Image {image} has no tag"))
+        try:
+            published_ports(service)
+        except ValueError:
+            issues.append(issue(ERROR, "invalid-port", service_name, f"Service {service_name} has an invalid port mapping"))
+
+    primary = services.get(name)
+    if isinstance(primary, dict):
+        labels = labext.normalize_labels(primary.get("labels", {}))
+        for label in REQUIRED_LABELS:
+            if label not in labels:
+                issues.append(issue(ERROR, "missing-label", name, f"Primary service is missing the {label} label"))
+        if "lostack.primary" in labels and not labext.parse_boolean(labels["lostack.primary"]):
+            issues.append(issue(ERROR, "not-primary", name, "Primary service has lostack.primary set to false"))
+        port = labels.get("lostack.port")
+        if port is not None and not str(port).isdigit():
+            issues.append(issue(ERROR, "invalid-label", name, f"lostack.port must be a port number, got {port}"))
+    return issues
+
+
+class InstallEnvironment:
+    """Service names and published ports of the installed compose files"""
+    def __init__(self, compose_handlers:dict|None=None):
+        self.services = {} # service / container name -> compose file
+        self.ports = [] # ((host ip, port, protocol), owner)
+        digests = []
+        for compose_file, handler in (compose_handlers or {}).items():
+            digests.append(f"{compose_file}:{handler.digest}")
+            for name, service in (handler.content.get("services") or {}).items():
+                service = service or {}
+                self.services[name] = compose_file
+                self.services[service.get("container_name") or name] = compose_file
+                try:
+                    self.ports.extend((port, f"{name} ({compose_file})") for port in published_ports(service))
+                except ValueError:
+                    continue
+        self.digest = "|".join(sorted(digests))
+
+
+def check_environment(name:str, package:dict, environment:InstallEnvironment) -> list[dict]:
+    """Collisions between a package and the installed services"""
+    services = (package or {}).get("services")
+    if not isinstance(services, dict) or name in environment.services:
+        return [] # Broken (reported by lint) or already installed
+    issues = []
+    for service_name, service in services.items():
+        if not isinstance(service, dict):
+            continue
+        for candidate in {service_name, service.get("container_name") or service_name}:
+            if candidate in environment.services:
+                issues.append(issue(
+                    ERROR, "service-collision", service_name,
+                    f"{candidate} is already defined in {environment.services[candidate]}"
+                ))
+        try:
+            ports = published_ports(service)
+        except ValueError:
+            continue
+        for port in ports:
+            clash = next((owner for other, owner in environment.ports if ports_overlap(port, other)), None)
+            if clash:
+                issues.append(issue(
+                    ERROR, "port-conflict", service_name,
+                    f"Host port {port[1]}/{port[2]} is already published by {clash}"
+                ))
+    return issues
+
+
+class DepotValidator:
+    """
+    Validates depot packages off the request path. Results are replaced
+    whole once a run finishes, a run requested while one is in progress is
+    started again when it ends.
+    """
+    def __init__(self, workers:int=VALIDATION_WORKERS):
+        self.workers = workers
+        self.results = {} # package name -> {"hash", "valid", "issues"}
+        self.version = 0
+        self._lint_cache = {} # (package name, hash) -> issues
+        self._environment_cache = {} # (package name, hash, environment digest) -> issues
+        self._lock = threading.Lock()
+        self._running = False
+        self._pending = None
+        self.logger = logging.getLogger(__name__ + ".DepotValidator")
+
+    def _validate_one(self, name:str, digest:str, package:dict, environment:InstallEnvironment) -> dict:
+        lint = self._lint_cache.get((name, digest))
+        if lint is None:
+            lint = self._lint_cache[(name, digest)] = lint_package(name, package)
+        key = (name, digest, environment.digest)
+        conflicts = self._environment_cache.get(key)
+        if conflicts is None:
+            conflicts = self._environment_cache[key] = check_environment(name, package, environment)
+        issues = lint + conflicts
+        return {
+            "hash": digest,
+            "valid": not any(i["level"] == ERROR for i in issues),
+            "issues": issues,
+        }
+
+    def validate(self, packages:dict[str:tuple[str, dict]], environment:InstallEnvironment) -> dict:
+        """Validates {name: (compose file hash, package data)} in parallel and swaps the results in"""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="DepotValidate") as pool:
+            futures = {
+                name: pool.submit(self._validate_one, name, digest, package, environment)
+                for name, (digest, package) in packages.items()
+            }
+            results = {}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    self.logger.error(f"Error validating depot package {name} - {e}")
+        # Forget hashes no package has any more
+        live = {(name, digest) for name, (digest, _) in packages.items()}
+        self._lint_cache = {k: i for k, i in self._lint_cache.items() if k in live}
+        self._environment_cache = {
+            k: i for k, i in self._environment_cache.items()
+            if k[:2] in live and k[2] == environment.digest
+        }
+        self.results = results
+        self.version += 1
+        invalid = sum(not r["valid"] for r in results.values())
+        self.logger.info(f"Validated {len(results)} depot packages, {invalid} with errors")
+        return results
+
+    def schedule(self, load:callable) -> None:
+        """
+        Validates in the background. `load` returns the (packages, environment)
+        arguments of validate and is called when the run starts.
+        """
+        with self._lock:
+            self._pending = load
+            if self._running:
+                return
+            self._running = True
+        threading.Thread(target=self._run, daemon=True, name="DepotValidator").start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                load, self._pending = self._pending, None
+                if load is None:
+                    self._running = False
+                    return
+            try:
+                self.validate(*load())
+            except Exception as e:
+                self.logger.error(f"Depot validation failed - {e}")
@@ -5,13 +5,16 @@ class DockerActionBase:
     def __init__(self, base_cmd):
         self.base_cmd = base_cmd
 
-    def execute(self, services:str|list[str], result_queue, complete=True):
+    def execute(self, services:str|list[str], result_queue, complete=True) -> bool:
+        """Runs the command, returns True if it exited cleanly"""
         if isinstance(services, str):
             services = [services]
         result_queue.put_nowait(f"Running {' '.join(self.base_cmd)} on services: {services}")
 
-        return RunBase(
+        runner = RunBase(
             [*self.base_cmd, *services],
             result_queue,
             complete=complete
-        ).run()
\ No newline at end of file
+        )
+        runner.run()
+        return runner.returncode == 0
\ No newline at end of file
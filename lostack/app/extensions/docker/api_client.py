@@ -2,11 +2,13 @@ import docker
 import logging
 import traceback
 from queue import Queue
+from .log_streamer import LogStreamer, DEFAULT_LOG_TAIL
 
 class DockerApiHandler:
     def __init__(self):
         self.api_client = docker.APIClient()
         self.logger = logging.getLogger(__name__ + ".DockerApiHandler")
+        self.api_log_streamer = LogStreamer(self.api_client)
 
     def get_services_info(
         self,
@@ -41,7 +43,7 @@ class DockerApiHandler:
         result_queue:Queue=None,
         complete:bool=True
     ) -> None:
-        actions = "start", "stop", "kill", "restart", "logs"
+        actions = "start", "stop", "kill", "restart"
         if not action in actions:
             raise ValueError("Invalid API action")
         
@@ -78,5 +80,8 @@ class DockerApiHandler:
     def api_restart(self,container_id:str,result_queue:Queue=None, complete:bool=True) -> None:
         return self._handle_api_action("restart", container_id, result_queue, complete=complete)
 
-    def api_logs(self,container_id:str,result_queue:Queue=None, complete:bool=True) -> None:
-        return self._handle_api_action("logs", container_id, result_queue, complete=complete)
\ No newline at end of file
+    def api_logs(self,container_id:str,result_queue:Queue=None, complete:bool=True, tail=DEFAULT_LOG_TAIL, **options) -> None:
+        return self.api_log_streamer.execute(container_id, result_queue, complete, follow=False, tail=tail, **options)
+
+    def api_follow(self,container_id:str,result_queue:Queue=None, complete:bool=True, tail=DEFAULT_LOG_TAIL, **options) -> None:
+        return self.api_log_streamer.execute(container_id, result_queue, complete, follow=True, tail=tail, **options)
\ No newline at end of file
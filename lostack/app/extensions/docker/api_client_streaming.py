@@ -1,6 +1,7 @@
 from flask import Response
 from queue import Queue
 from .api_client import DockerApiHandler
+from .shell_streaming import LOG_QUEUE_SIZE
 from app.extensions.common.stream_handler import StreamHandler
 
 class DockerApiHandlerStreaming(DockerApiHandler):
@@ -11,4 +12,5 @@ class DockerApiHandlerStreaming(DockerApiHandler):
         self.stream_api_stop : Response = StreamHandler.create_stream(self.api_stop)
         self.stream_api_kill : Response = StreamHandler.create_stream(self.api_kill)
         self.stream_api_restart : Response = StreamHandler.create_stream(self.api_restart)
-        self.stream_api_logs : Response = StreamHandler.create_stream(self.api_logs)
\ No newline at end of file
+        self.stream_api_logs : Response = StreamHandler.create_stream(self.api_logs, queue_size=LOG_QUEUE_SIZE)
+        self.stream_api_follow : Response = StreamHandler.create_stream(self.api_follow, queue_size=LOG_QUEUE_SIZE)
\ No newline at end of file
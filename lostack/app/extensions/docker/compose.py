@@ -4,12 +4,14 @@ import os
 import traceback
 from .compose_file_manager import ComposeFileManager
 from .compose_actions import DockerComposeActions
+from .log_streamer import LogStreamer, DEFAULT_LOG_TAIL
 
 
 class DockerComposeHandler(ComposeFileManager):
     def __init__(self, file:os.PathLike, modified_callback=None):
         ComposeFileManager.__init__(self, file, modified_callback)
         self.logger = logging.getLogger(__name__ + ".DockerComposeHandler")
+        self.log_streamer = LogStreamer(docker.APIClient())
 
     def _handle_compose_action(
         self,
@@ -17,8 +19,8 @@ class DockerComposeHandler(ComposeFileManager):
         container_id:str|list[str],
         result_queue=None,
         complete=True
-    ) -> None:
-        
+    ) -> bool:
+        """Runs a compose action, returns True if it succeeded"""
         actions = list(DockerComposeActions.ACTIONS.keys())
         if not action in actions:
             raise ValueError("Invalid API action")
@@ -28,9 +30,10 @@ class DockerComposeHandler(ComposeFileManager):
             result_queue.put_nowait(msg)
         self.logger.info(msg)
 
+        ok = False
         try:
             act = DockerComposeActions.ACTIONS[action]
-            act(
+            ok = act(
                 container_id,
                 result_queue, 
                 compose_file = self.file, # From compose file manager mixin
@@ -47,33 +50,53 @@ class DockerComposeHandler(ComposeFileManager):
         
         if complete and result_queue:
             result_queue.put_nowait("__COMPLETE__")
+        return ok
 
-    def compose_up(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> None:
+    def compose_up(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> bool:
         return self._handle_compose_action("up", container_id, result_queue, complete=complete)
 
-    def compose_start(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> None:
+    def compose_start(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> bool:
         return self._handle_compose_action("start", container_id, result_queue, complete=complete)
 
-    def compose_stop(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> None:
+    def compose_stop(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> bool:
         return self._handle_compose_action("stop", container_id, result_queue, complete=complete)
 
-    def compose_down(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> None:
+    def compose_down(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> bool:
         return self._handle_compose_action("down", container_id, result_queue, complete=complete)
 
-    def compose_kill(self, container_id:str|list[str], result_queue:bool=None,complete:bool=True) -> None:
+    def compose_kill(self, container_id:str|list[str], result_queue:bool=None,complete:bool=True) -> bool:
         return self._handle_compose_action("kill", container_id, result_queue, complete=complete)
 
-    def compose_logs(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> None:
-        return self._handle_compose_action("logs", container_id, result_queue, complete=complete)
+    def _handle_compose_log_stream(
+        self,
+        services:str|list[str],
+        result_queue=None,
+        complete=True,
+        follow=False,
+        **options
+    ) -> None:
+        """Stream logs for compose services from the Engine API"""
+        if isinstance(services, str):
+            services = [services]
+        self.logger.info(f"Streaming logs for {services}")
+        try:
+            containers = self.log_streamer.find_service_containers(services)
+        except Exception as e:
+            containers = services
+            self.logger.info(f"Error resolving service containers for {services} - {e}")
+        return self.log_streamer.execute(containers, result_queue, complete, follow=follow, **options)
+
+    def compose_logs(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True,tail=DEFAULT_LOG_TAIL,**options) -> None:
+        return self._handle_compose_log_stream(container_id, result_queue, complete, follow=False, tail=tail, **options)
 
-    def compose_follow(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> None:
-        return self._handle_compose_action("follow", container_id, result_queue, complete=complete)
+    def compose_follow(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True,tail=DEFAULT_LOG_TAIL,**options) -> None:
+        return self._handle_compose_log_stream(container_id, result_queue, complete, follow=True, tail=tail, **options)
 
-    def compose_restart(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> None:
+    def compose_restart(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> bool:
         return self._handle_compose_action("restart", container_id, result_queue, complete=complete)
 
-    def compose_rm(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> None:
+    def compose_rm(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> bool:
         return self._handle_compose_action("rm", container_id, result_queue, complete=complete)
 
-    def compose_run(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> None:
+    def compose_run(self,container_id:str|list[str],result_queue:bool=None,complete:bool=True) -> bool:
         return self._handle_compose_action("run", container_id, result_queue, complete=complete)
\ No newline at end of file
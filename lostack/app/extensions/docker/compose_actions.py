@@ -15,8 +15,6 @@ _COMMANDS = {
     "stop": ["stop"],
     "down": ["down"],
     "kill": ["kill", "-s"],
-    "logs": ["logs", "--tail", "150"],
-    "follow": ["logs", "--follow", "--tail", "150"],
     "restart": ["restart"],
     "run": ["run"],
     "rm" : ["rm"]
@@ -28,8 +26,6 @@ docker_compose_start = _create_docker_action(_COMMANDS["start"])
 docker_compose_stop = _create_docker_action(_COMMANDS["stop"])
 docker_compose_down = _create_docker_action(_COMMANDS["down"])
 docker_compose_kill = _create_docker_action(_COMMANDS["kill"])
-docker_compose_logs = _create_docker_action(_COMMANDS["logs"])
-docker_compose_follow = _create_docker_action(_COMMANDS["follow"])
 docker_compose_restart = _create_docker_action(_COMMANDS["restart"])
 docker_compose_rm = _create_docker_action(_COMMANDS["rm"])
 docker_compose_run = _create_docker_action(_COMMANDS["run"])
@@ -41,8 +37,6 @@ class DockerComposeActions:
     stop = docker_compose_stop
     down = docker_compose_down
     kill = docker_compose_kill
-    logs = docker_compose_logs
-    follow = docker_compose_follow
     restart = docker_compose_restart
     rm = docker_compose_rm
     run = docker_compose_run
@@ -52,8 +46,6 @@ class DockerComposeActions:
         "stop": docker_compose_stop,
         "down": docker_compose_down,
         "kill": docker_compose_kill,
-        "logs": docker_compose_logs,
-        "follow": docker_compose_follow,
         "restart": docker_compose_restart,
         "rm": docker_compose_rm,
         "run": docker_compose_run
@@ -0,0 +1,124 @@
+"""
+Line preserving compose document.
+Service blocks are located with PyYAML node marks so single services can be
+added, replaced or removed by rewriting only their lines. Comments, anchors,
+`extends` and formatting everywhere else are left untouched.
+"""
+
+import yaml
+
+DEFAULT_INDENT = 2
+
+
+class ComposeEditError(ValueError):
+    """The document can't be edited in place, callers fall back to a full dump"""
+
+
+def _last_line(node:yaml.Node) -> int:
+    """Last line (0 based) holding content of a node, ignoring trailing comments"""
+    if isinstance(node, yaml.ScalarNode):
+        # Block scalars end on the line after their content
+        end = node.end_mark
+        return end.line - 1 if end.column == 0 and end.line > node.start_mark.line else end.line
+    if isinstance(node, yaml.MappingNode):
+        children = [n for pair in node.value for n in pair]
+    else:
+        children = list(node.value)
+    if not children or node.flow_style:
+        return node.end_mark.line
+    return max(_last_line(child) for child in children)
+
+
+class ServiceBlock:
+    """Line range [start, end) of one service, including comments directly above it"""
+    def __init__(self, name:str, start:int, end:int, key_line:int):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.key_line = key_line
+
+
+class ComposeDocument:
+    def __init__(self, text:str):
+        self.lines = text.splitlines(keepends=True)
+        if self.lines and not self.lines[-1].endswith("\n"):
+            self.lines[-1] += "\n"
+        self.parsed = False
+        self._parse()
+
+    @property
+    def text(self) -> str:
+        return "".join(self.lines)
+
+    def _parse(self) -> None:
+        if self.parsed:
+            return
+        try:
+            root = yaml.compose(self.text)
+        except yaml.YAMLError as e:
+            raise ComposeEditError(f"Could not parse compose document - {e}")
+        if not isinstance(root, yaml.MappingNode):
+            raise ComposeEditError("Compose document is not a mapping")
+        services = None
+        for key, value in root.value:
+            if isinstance(key, yaml.ScalarNode) and key.value == "services":
+                services = (key, value)
+        if services is None:
+            raise ComposeEditError("Compose document has no services section")
+        key, value = services
+
+        self.parsed = True
+        self.blocks = {}
+        self.services_line = key.start_mark.line
+        self.indent = key.start_mark.column + DEFAULT_INDENT
+        if isinstance(value, yaml.ScalarNode) and value.value in ("", "~", "null"):
+            # `services:` with nothing under it yet
+            self.services_end = self.services_line + 1
+            return
+        if not isinstance(value, yaml.MappingNode) or value.flow_style:
+            raise ComposeEditError("Services section is not a block mapping")
+
+        self.indent = value.value[0][0].start_mark.column if value.value else self.indent
+        previous_end = self.services_line + 1
+        for service_key, service_value in value.value:
+            key_line = service_key.start_mark.line
+            start = key_line
+            # Comments directly above a service belong to it
+            while start > previous_end and self.lines[start - 1].lstrip().startswith("#"):
+                start -= 1
+            end = _last_line(service_value) + 1
+            self.blocks[service_key.value] = ServiceBlock(service_key.value, start, end, key_line)
+            previous_end = end
+        self.services_end = previous_end
+
+    def _render(self, name:str, config:dict) -> list[str]:
+        rendered = yaml.dump({name: config}, default_flow_style=False, sort_keys=False)
+        prefix = " " * self.indent
+        return [prefix + line if line.strip() else line for line in rendered.splitlines(keepends=True)]
+
+    def _replace(self, start:int, end:int, lines:list[str]) -> None:
+        self.lines[start:end] = lines
+        # Re-parsed on the next edit, a single edit never parses twice
+        self.parsed = False
+
+    def has_service(self, name:str) -> bool:
+        self._parse()
+        return name in self.blocks
+
+    def set_service(self, name:str, config:dict) -> None:
+        """Replaces a service's lines, or appends the service to the end of the section"""
+        self._parse()
+        lines = self._render(name, config)
+        block = self.blocks.get(name)
+        if block:
+            # Keep the comments above the service
+            self._replace(block.key_line, block.end, lines)
+        else:
+            self._replace(self.services_end, self.services_end, lines)
+
+    def remove_service(self, name:str) -> None:
+        self._parse()
+        block = self.blocks.get(name)
+        if not block:
+            raise KeyError(f"Service '{name}' not found in compose document")
+        self._replace(block.start, block.end, [])
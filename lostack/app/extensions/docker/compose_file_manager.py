@@ -1,18 +1,51 @@
 """Handler to manager a compose file and mirror compose file contents as data"""
 
 import atexit
+import copy
+import errno
+import hashlib
 import logging
 import os
+import shutil
+import threading
 import yaml
 from pathlib import Path
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from types import MappingProxyType
+from app.extensions.common.file_watcher import get_file_watcher
+from app.extensions.common.label_extractor import LabelExtractor
+from .compose_document import ComposeDocument, ComposeEditError
+from .compose_resolver import get_compose_resolver
 
+# Quiet period after the last filesystem event before a reload
+RELOAD_DEBOUNCE = 0.5
 
-def write_compose(compose_file_path: os.PathLike, compose_data: dict) -> None:
-    yaml_content = yaml.dump(compose_data, default_flow_style=False, sort_keys=False)
+
+def content_digest(data:bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def dump_compose(compose_data:dict) -> str:
+    return yaml.dump(compose_data, default_flow_style=False, sort_keys=False)
+
+
+def write_compose(compose_file_path: os.PathLike, compose_data: dict) -> str:
+    """Writes compose data, returns the YAML written"""
+    yaml_content = dump_compose(compose_data)
     with open(compose_file_path, 'w') as f:
         f.write(yaml_content)
+    return yaml_content
+
+def parse_yaml(content:str|bytes, required_sections:list[str]=[]) -> dict:
+    """Parses YAML text into a Python dict"""
+    try:
+        data = yaml.safe_load(content)
+    except yaml.YAMLError as e:
+        raise yaml.YAMLError(f"Error parsing YAML file: {e}")
+    for sect in required_sections:
+        if not isinstance(data, dict) or not sect in data:
+            raise KeyError(f"YAML file missing expected key {sect}")
+    return data
+
 
 def load_yaml(file:os.PathLike, required_sections:list[str]=[], encoding='utf-8',) -> dict:
     """Loads a YAML file into a Python dict"""
@@ -21,60 +54,239 @@ def load_yaml(file:os.PathLike, required_sections:list[str]=[], encoding='utf-8'
         raise FileNotFoundError(f"YAML file doesn't exist - {file}")
     if not os.path.isfile(file):
         raise IsADirectoryError(f"Expected YAML file, found dir - {file}")
-    try:
-        with open(file, 'r', encoding=encoding) as f:
-            data = yaml.safe_load(f)
-    except yaml.YAMLError as e:
-        raise yaml.YAMLError(f"Error parsing YAML file: {e}")
-    for sect in required_sections:
-        if not sect in data:
-            raise KeyError(f"YAML file missing expected key {sect}")
-    return data    
+    with open(file, 'r', encoding=encoding) as f:
+        return parse_yaml(f.read(), required_sections)
+
+
+class ComposeIndex:
+    """
+    Read only lookups over a compose file's services, built once per load.
+    Services without a lostack.group label form a group of their own name.
+    """
+    def __init__(self, services:dict|None):
+        labels = {}
+        service_group = {}
+        groups = {}
+        primary = {}
+        images = {}
+        for name, config in (services or {}).items():
+            if not isinstance(config, dict):
+                continue
+            normalized = LabelExtractor.normalize_labels(config.get("labels", {}))
+            group = normalized.get("lostack.group", name)
+            labels[name] = MappingProxyType(normalized)
+            service_group[name] = group
+            groups.setdefault(group, []).append(name)
+            if config.get("image"):
+                images.setdefault(config["image"], []).append(name)
+            try:
+                if LabelExtractor.parse_boolean(normalized.get("lostack.primary", "false")):
+                    primary.setdefault(group, name)
+            except ValueError:
+                pass
+        self.labels = MappingProxyType(labels) # service -> normalized labels
+        self.service_group = MappingProxyType(service_group) # service -> group
+        self.groups = MappingProxyType({g: tuple(n) for g, n in groups.items()}) # group -> services
+        self.primary = MappingProxyType(primary) # group -> service labelled lostack.primary
+        self.images = MappingProxyType({i: tuple(n) for i, n in images.items()}) # image -> services
+
+    def group_members(self, group_name:str) -> tuple[str]:
+        return self.groups.get(group_name, ())
+
+
+class ComposeSnapshot:
+    """
+    One loaded or written version of a compose file. Never mutated after
+    creation, the manager swaps in a new snapshot instead, so readers can
+    hold one without locking and always see content, text and index agree.
+    """
+    __slots__ = ("content", "text", "digest", "index", "services")
+
+    def __init__(self, content:dict|None, text:str|None=None, digest:str|None=None):
+        services = (content or {}).get("services") or {}
+        self.content = content
+        self.text = text
+        self.digest = digest
+        self.index = ComposeIndex(services)
+        self.services = tuple(services.keys())
+
+
+EMPTY_SNAPSHOT = ComposeSnapshot(None)
 
 
-class ComposeFileManager(FileSystemEventHandler):
+class ComposeFileManager:
     """
     Object to handle compose file updates and reload automatically on change
     """
     def __init__(self, file:os.PathLike, modified_callback=None):
         self.file = Path(file).resolve()
         self.modified_callback = modified_callback
-        self.content = None
-        self.services = []
+        # Replaced whole on every load or write, see ComposeSnapshot
+        self.snapshot = EMPTY_SNAPSHOT
         self.logger = logging.getLogger(__name__ + f'.ComposeManager.{self.file}')
-        self.observer = Observer()
-        self.observer.schedule(self, str(self.file.parent), recursive=False)
-        self.observer.start()
+        # Serializes writers, readers use the current snapshot
+        self._file_lock = threading.RLock()
+        self._reload_timer = None
+        self._reload_timer_lock = threading.Lock()
         self._load()
+        self.watch = get_file_watcher().subscribe(self.file, self.on_file_event)
         self.logger.info(f"Initialized Compose File handler for {self.file}")
 
         atexit.register(self._exit)
 
-    def on_modified(self, event) -> None:
-        if event.is_directory:
-            return
-        if Path(event.src_path).resolve() == self.file:
-            self.logger.info(f"Compose file modified: {event.src_path}")
-            self.logger.info(f"Reloading...")
-            self._load()
-            self.logger.info(f"Done updating compose services")
-            if self.modified_callback:
-                self.modified_callback()
-
-    def _load(self) -> dict:
-        self.logger.info(f"Reloading compose file at {self.file}")
-        self.content = load_yaml(self.file, ["services"])
-        self.services = list(self.content.get("services", {}).keys())
-        self.logger.info(f"Found services - {self.services} in {str(self.file)}")
-        return self.content
+    @property
+    def content(self) -> dict|None:
+        return self.snapshot.content
+
+    @property
+    def services(self) -> tuple[str]:
+        return self.snapshot.services
+
+    @property
+    def index(self) -> ComposeIndex:
+        return self.snapshot.index
+
+    @property
+    def text(self) -> str|None:
+        return self.snapshot.text
+
+    @property
+    def digest(self) -> str|None:
+        return self.snapshot.digest
+
+    def on_file_event(self, event) -> None:
+        """Shared watcher callback, includes editors saving by rename onto the file"""
+        self._schedule_reload()
+
+    def _schedule_reload(self) -> None:
+        """Restarts the debounce timer so a burst of events causes one reload"""
+        with self._reload_timer_lock:
+            if self._reload_timer:
+                self._reload_timer.cancel()
+            self._reload_timer = threading.Timer(RELOAD_DEBOUNCE, self._reload_if_changed)
+            self._reload_timer.daemon = True
+            self._reload_timer.start()
+
+    def _reload_if_changed(self) -> None:
+        with self._file_lock:
+            try:
+                data = self.file.read_bytes()
+            except OSError as e:
+                self.logger.warning(f"Could not read compose file - {e}")
+                return
+            if content_digest(data) == self.digest:
+                # Our own write or a save without changes
+                self.logger.debug(f"Compose file unchanged, skipping reload")
+                return
+            self.logger.info(f"Compose file modified: {self.file}")
+            try:
+                self._load(data)
+            except Exception as e:
+                self.logger.error(f"Error reloading compose file - {e}")
+                return
+        self.logger.info(f"Done updating compose services")
+        if self.modified_callback:
+            self.modified_callback()
+
+    def _load(self, data:bytes|None=None) -> dict:
+        with self._file_lock:
+            self.logger.info(f"Reloading compose file at {self.file}")
+            if data is None:
+                data = self.file.read_bytes()
+            self.snapshot = ComposeSnapshot(
+                parse_yaml(data, ["services"]),
+                data.decode("utf-8"),
+                content_digest(data)
+            )
+            self.logger.info(f"Found services - {list(self.services)} in {str(self.file)}")
+            return self.content
 
     def write(self, content:dict) -> None:
         self.logger.info(f"Writing compose file at {self.file}")
         if not content:
             raise ValueError("No content in compose file.")
-        self.content = content
-        write_compose(self.file, content)
-        # No need to reload, FileSystemEventHandler will catch the change
+        # Callers may keep modifying their dict, the snapshot gets its own
+        content = copy.deepcopy(content)
+        with self._file_lock:
+            self._write_text(dump_compose(content), content)
+
+    def _write_text(self, yaml_content:str, content:dict) -> None:
+        with self._file_lock:
+            previous = self.snapshot
+            # Swapped before writing so the watcher recognises the events as our own
+            self.snapshot = ComposeSnapshot(
+                content,
+                yaml_content,
+                content_digest(yaml_content.encode("utf-8"))
+            )
+            try:
+                self._replace_file(yaml_content)
+            except Exception:
+                # The file on disk is unchanged
+                self.snapshot = previous
+                raise
+
+    def _replace_file(self, yaml_content:str) -> None:
+        """Writes a temp file and renames it over the compose file, a crash never leaves it truncated"""
+        temp_file = self.file.with_name(f".{self.file.name}.tmp")
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write(yaml_content)
+                f.flush()
+                os.fsync(f.fileno())
+            if self.file.exists():
+                shutil.copymode(self.file, temp_file)
+            os.replace(temp_file, self.file)
+        except OSError as e:
+            temp_file.unlink(missing_ok=True)
+            if not self.file.exists() or e.errno not in (errno.EBUSY, errno.EXDEV):
+                raise
+            # Bind mounted file, it can only be rewritten in place
+            self.logger.warning(f"Could not replace {self.file}, writing in place - {e}")
+            with open(self.file, 'w', encoding='utf-8') as f:
+                f.write(yaml_content)
+
+    def edit_services(self, updates:dict[str:dict]|None=None, removals:list[str]|None=None) -> None:
+        """
+        Adds or replaces `updates` and removes `removals`, rewriting only those
+        service blocks so the rest of the file keeps its comments and layout.
+        Falls back to re-dumping the whole file if the edit can't be made in place.
+        """
+        updates = copy.deepcopy(updates or {})
+        removals = removals or []
+        with self._file_lock:
+            snapshot = self.snapshot
+            expected = dict(snapshot.content.get("services") or {})
+            for name in removals:
+                expected.pop(name, None)
+            expected.update(updates)
+
+            try:
+                document = ComposeDocument(snapshot.text)
+                for name in removals:
+                    if document.has_service(name):
+                        document.remove_service(name)
+                for name, config in updates.items():
+                    document.set_service(name, config)
+                yaml_content = document.text
+                content = parse_yaml(yaml_content, ["services"])
+                if (content.get("services") or {}) != expected:
+                    raise ComposeEditError("Edited document doesn't match the expected services")
+            except (ComposeEditError, yaml.YAMLError, KeyError) as e:
+                self.logger.warning(f"Rewriting whole compose file, in-place edit failed - {e}")
+                content = {**snapshot.content, "services": expected}
+                yaml_content = dump_compose(content)
+
+            self.logger.info(f"Updating services in {self.file}")
+            self._write_text(yaml_content, content)
+
+    def remove_services(self, service_names:list[str]) -> list[str]:
+        """Removes services from the file, returns the names that were present"""
+        with self._file_lock:
+            removed = [name for name in service_names if name in self.services]
+            if removed:
+                self.edit_services(removals=removed)
+            return removed
 
     def check_if_service_exists(self, service_name:str) -> bool:
         """Check if a service is defined in compose file. Returns True if it exists.""" 
@@ -91,27 +303,24 @@ class ComposeFileManager(FileSystemEventHandler):
         return result
 
     def get_service_group_details(self, group_names:str, result:dict = {}) -> dict[str:dict]:
-        services = self.content['services']     
+        """
+        Gets each named primary service's config with the other services
+        of its group under 'dependencies'.
+        """
+        snapshot = self.snapshot
+        services = snapshot.content['services']
+        index = snapshot.index
 
         for group_name in group_names:
             if group_name not in services:
                 continue
 
-            primary_config = services[group_name]
-            primary_labels = LabelExtractor.normalize_labels(primary_config.get('labels', {}))
-            primary_group = primary_labels.get('lostack.group', group_name)
-
-            result[group_name] = primary_config.copy()
-            result[group_name]['dependencies'] = {}
-
-            for service_name, service_config in services.items():
-                if service_name == group_name or service_name in group_names:
-                    continue
-                service_labels = LabelExtractor.normalize_labels(service_config.get('labels', {}))
-                service_group = service_labels.get('lostack.group', service_name)
-
-                if service_group == primary_group:
-                    result[group_name]['dependencies'][service_name] = service_config.copy()
+            result[group_name] = services[group_name].copy()
+            result[group_name]['dependencies'] = {
+                service_name: services[service_name].copy()
+                for service_name in index.group_members(index.service_group.get(group_name, group_name))
+                if service_name != group_name and service_name not in group_names
+            }
 
         return result
 
@@ -120,50 +329,69 @@ class ComposeFileManager(FileSystemEventHandler):
         Gets data for a given Sablier group.
         Returns a dict of dicts mapped by package name.
         """
-        for name, config in self.content.get("services", {}).items():
-            labels = config.get("labels", [])
-            for label in labels:
-                if label.startswith("lostack.group="):
-                    _, value = label.split("=", 1)
-                    if value.strip() == group_name:
-                        result[name] = config
+        snapshot = self.snapshot
+        services = snapshot.content.get("services", {})
+        for name in snapshot.index.group_members(group_name):
+            result[name] = services[name]
         return result
 
+    def get_effective_services(self) -> dict[str:dict]:
+        """Services with extends, override files and variables resolved, cached by the resolver"""
+        return get_compose_resolver(self.file.parent).resolve(self.file).get("services") or {}
+
+    def get_service_labels(self, service_name:str) -> dict:
+        """Normalized labels for a service, empty if it doesn't exist"""
+        return self.index.labels.get(service_name, {})
+
+    def get_services_by_image(self, image:str) -> tuple[str]:
+        return self.index.images.get(image, ())
+
     def update_services(self, services_data:dict[str:dict]) -> None:
         """
         Updates services from a dict in form {name:{:}, name2:{:}, ...}.
         Raises an error if a service doesn't exist already
         """ 
-        # Ensure services exists first
-        for name, config in services_data.items():
-            if not self.check_if_service_exists(name):
-                raise KeyError(f"Service '{name}' not found in compose data")
-        # Update services
-        for name, config in services_data.items():
-            self.content["services"][name].update(config)
+        with self._file_lock:
+            snapshot = self.snapshot
+            # Ensure services exists first
+            for name, config in services_data.items():
+                if name not in snapshot.services:
+                    raise KeyError(f"Service '{name}' not found in compose data")
+            services = dict(snapshot.content["services"])
+            for name, config in services_data.items():
+                services[name] = {**services[name], **copy.deepcopy(config)}
+            self._swap_content({**snapshot.content, "services": services})
     
     def add_services_from_package_data(self, package_data: dict, save=True) -> None:
         """Adds services to compose data. Raises an error if services already exist."""
         if self.content is None:
             raise ValueError(f"File content is None!")
-
-        if "services" not in self.content or self.content.get("services") is None:
-            self.content["services"] = {}
         if "services" not in package_data or package_data.get("services") is None:
             raise ValueError(f"No service data found in services")
 
-        existing = set(self.content["services"].keys())
-        incoming = set(package_data["services"].keys())
-        conflict = existing.intersection(incoming)
+        with self._file_lock:
+            snapshot = self.snapshot
+            existing = set(snapshot.services)
+            incoming = set(package_data["services"].keys())
+            conflict = existing.intersection(incoming)
+
+            if conflict:
+                raise KeyError(f"Service(s) already exist in compose: {', '.join(conflict)}")
 
-        if conflict:
-            raise KeyError(f"Service(s) already exist in compose: {', '.join(conflict)}")
+            if save:
+                self.edit_services(updates=package_data["services"])
+                return
 
-        for name, config in package_data["services"].items():
-            self.content["services"][name] = config
-        
-        if save:
-            self.save()
+            services = {**(snapshot.content.get("services") or {}), **copy.deepcopy(package_data["services"])}
+            self._swap_content({**snapshot.content, "services": services})
+
+    def _swap_content(self, content:dict) -> None:
+        """
+        Replaces content without writing, until save() the file text and
+        digest stay those of the file on disk
+        """
+        with self._file_lock:
+            self.snapshot = ComposeSnapshot(content, self.snapshot.text, self.snapshot.digest)
 
     def save(self) -> None:
         """
@@ -175,6 +403,8 @@ class ComposeFileManager(FileSystemEventHandler):
         self.write(self.content)
 
     def _exit(self) -> None:
-        self.logger.info("Stopping observer")
-        self.observer.stop()
-        self.observer.join(timeout=5)
\ No newline at end of file
+        with self._reload_timer_lock:
+            if self._reload_timer:
+                self._reload_timer.cancel()
+        self.logger.info("Stopping file watch")
+        get_file_watcher().unsubscribe(self.watch)
\ No newline at end of file
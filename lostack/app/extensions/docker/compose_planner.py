@@ -0,0 +1,286 @@
+"""
+Compose validation and dry-run planning without the Engine.
+Checks an effective compose model (see compose_resolver) for conflicts with
+itself, the other managed compose files and the cached container list,
+then works out what `docker compose up` would do to each service.
+"""
+
+import os
+import yaml
+from app.extensions.common.label_extractor import LabelExtractor as labext
+from .compose_resolver import ComposeResolveError, get_compose_resolver
+
+ERROR = "error"
+WARNING = "warning"
+
+# Published ranges wider than this are checked by their first port only
+_MAX_PORT_RANGE = 1024
+_WILDCARD_IPS = {"", "0.0.0.0", "::", "[::]"}
+
+
+def issue(level:str, code:str, service:str|None, message:str) -> dict:
+    return {"level": level, "code": code, "service": service, "message": message}
+
+
+def _port_range(value) -> list[int]:
+    value = str(value)
+    if "-" in value:
+        start, end = (int(v) for v in value.split("-", 1))
+        if end - start > _MAX_PORT_RANGE:
+            end = start
+        return list(range(start, end + 1))
+    return [int(value)]
+
+
+def published_ports(service:dict) -> list[tuple[str, int, str]]:
+    """(host ip, host port, protocol) for every published port of a service"""
+    published = []
+    for port in service.get("ports") or []:
+        if isinstance(port, dict):
+            if port.get("published") in (None, ""):
+                continue
+            host_ip = port.get("host_ip", "")
+            ports = _port_range(port["published"])
+            protocol = port.get("protocol", "tcp")
+        else:
+            spec, _, protocol = str(port).partition("/")
+            protocol = protocol or "tcp"
+            if spec.startswith("["):
+                # [::1]:8080:80
+                host_ip, _, spec = spec[1:].partition("]:")
+            else:
+                host_ip = ""
+            parts = spec.split(":")
+            if len(parts) < 2:
+                continue # Container port only, the Engine picks the host port
+            if len(parts) == 3:
+                host_ip = parts[0]
+            if not parts[-2]:
+                continue
+            ports = _port_range(parts[-2])
+        published.extend((host_ip, p, protocol) for p in ports)
+    return published
+
+
+def ports_overlap(a:tuple, b:tuple) -> bool:
+    return a[1:] == b[1:] and (a[0] in _WILDCARD_IPS or b[0] in _WILDCARD_IPS or a[0] == b[0])
+
+
+def _container_service(container:dict) -> str|None:
+    return (container.get("Labels") or {}).get("com.docker.compose.service")
+
+
+def _container_name(container:dict) -> str:
+    return container["Names"][0].lstrip("/")
+
+
+def _normalize_image(image:str|None) -> str|None:
+    if not image:
+        return image
+    for prefix in ("docker.io/library/", "docker.io/", "library/"):
+        if image.startswith(prefix):
+            image = image[len(prefix):]
+            break
+    if ":" not in image.rsplit("/", 1)[-1] and "@" not in image:
+        image += ":latest"
+    return image
+
+
+def _compose_labels(labels:dict|list|None) -> dict[str:str]:
+    """Labels as compose hands them to the Engine, YAML booleans become true / false"""
+    if isinstance(labels, dict):
+        return {
+            key: ("true" if value else "false") if isinstance(value, bool) else "" if value is None else str(value)
+            for key, value in labels.items()
+        }
+    return labext.normalize_labels(labels)
+
+
+def _named_volumes(service:dict) -> list[str]:
+    names = []
+    for volume in service.get("volumes") or []:
+        if isinstance(volume, dict):
+            if volume.get("type", "volume") == "volume" and volume.get("source"):
+                names.append(volume["source"])
+            continue
+        source, sep, _ = str(volume).partition(":")
+        if sep and source and not source.startswith(("/", ".", "~", "$")):
+            names.append(source)
+    return names
+
+
+def validate(model:dict, containers:list[dict], others:dict[str:dict]|None=None) -> list[dict]:
+    """
+    Reports problems `docker compose up` would fail on.
+    `others` maps other managed compose files to their effective models,
+    their services are expected to share the host with this one.
+    """
+    issues = []
+    services = model.get("services") or {}
+    networks = set(model.get("networks") or {}) | {"default"}
+    volumes = set(model.get("volumes") or {})
+
+    # Everything compose manages, so running copies of them don't count as conflicts
+    managed = set(services)
+    claimed_ports = [] # (port, owner)
+    claimed_names = {} # container name -> owner
+    for source, other in (others or {}).items():
+        for name, service in (other.get("services") or {}).items():
+            managed.add(name)
+            owner = f"{name} ({os.path.basename(source)})"
+            claimed_ports.extend((port, owner) for port in published_ports(service))
+            claimed_names[service.get("container_name") or name] = owner
+
+    for container in containers:
+        if _container_service(container) in managed or _container_name(container) in managed:
+            continue
+        owner = f"container {_container_name(container)}"
+        claimed_names.setdefault(_container_name(container), owner)
+        for port in container.get("Ports") or []:
+            if port.get("PublicPort"):
+                claimed_ports.append(((port.get("IP", ""), port["PublicPort"], port.get("Type", "tcp")), owner))
+
+    for name, service in services.items():
+        if not isinstance(service, dict):
+            issues.append(issue(ERROR, "invalid-service", name, f"Service {name} is not a mapping"))
+            continue
+        if not service.get("image") and not service.get("build"):
+            issues.append(issue(ERROR, "no-image", name, f"Service {name} has neither image nor build"))
+
+        container_name = service.get("container_name") or name
+        if container_name in claimed_names:
+            issues.append(issue(
+                ERROR, "duplicate-container-name", name,
+                f"Container name {container_name} is already used by {claimed_names[container_name]}"
+            ))
+        else:
+            claimed_names[container_name] = name
+
+        for port in published_ports(service):
+            clash = next((owner for other, owner in claimed_ports if ports_overlap(port, other)), None)
+            if clash:
+                issues.append(issue(
+                    ERROR, "port-conflict", name,
+                    f"Host port {port[1]}/{port[2]} is already published by {clash}"
+                ))
+            claimed_ports.append((port, name))
+
+        if not service.get("network_mode"):
+            service_networks = service.get("networks") or []
+            for network in service_networks:
+                if network not in networks:
+                    issues.append(issue(ERROR, "missing-network", name, f"Network {network} is not defined"))
+
+        for volume in _named_volumes(service):
+            if volume not in volumes:
+                issues.append(issue(ERROR, "missing-volume", name, f"Named volume {volume} is not defined"))
+
+        for dependency in service.get("depends_on") or []:
+            if dependency not in services:
+                issues.append(issue(ERROR, "missing-dependency", name, f"Depends on undefined service {dependency}"))
+    return issues
+
+
+def _with_dependencies(services:dict, targets:list[str]) -> list[str]:
+    """Targets plus everything they depend on, dependencies first"""
+    ordered = []
+    def visit(name:str, path:tuple) -> None:
+        if name in ordered or name in path or name not in services:
+            return
+        for dependency in (services[name] or {}).get("depends_on") or []:
+            visit(dependency, path + (name,))
+        ordered.append(name)
+    for target in targets:
+        visit(target, ())
+    return ordered
+
+
+def plan(model:dict, containers:list[dict], targets:list[str]|None=None) -> list[dict]:
+    """The action `docker compose up` would take per service: create, recreate, start or none"""
+    services = model.get("services") or {}
+    by_service = {}
+    for container in containers:
+        by_service.setdefault(_container_service(container) or _container_name(container), container)
+
+    actions = []
+    for name in _with_dependencies(services, targets or list(services)):
+        service = services[name] or {}
+        container = by_service.get(name) or by_service.get(service.get("container_name"))
+        if container is None:
+            action, reason = "create", "No container exists"
+        elif service.get("image") and _normalize_image(service["image"]) != _normalize_image(container.get("Image")):
+            action, reason = "recreate", f"Image changed from {container.get('Image')} to {service['image']}"
+        elif any(
+            (container.get("Labels") or {}).get(key) != value
+            for key, value in _compose_labels(service.get("labels")).items()
+        ):
+            action, reason = "recreate", "Labels changed"
+        elif container.get("State") != "running":
+            action, reason = "start", f"Container is {container.get('State')}"
+        else:
+            action, reason = "none", "Up to date"
+        actions.append({
+            "service": name,
+            "action": action,
+            "reason": reason,
+            "container": _container_name(container) if container else None,
+            "dependency": bool(targets) and name not in targets,
+        })
+    return actions
+
+
+def check_compose(
+    app,
+    compose_file:os.PathLike,
+    document:dict|None=None,
+    targets:list[str]|None=None
+) -> dict:
+    """
+    Validates a managed compose file, or unsaved `document` content for it,
+    against the other managed files and the cached containers, and plans `up`.
+    """
+    handlers = app.docker_manager.compose_file_handlers
+    path = os.path.realpath(compose_file)
+    try:
+        model = get_compose_resolver(os.path.dirname(path)).resolve(path, document)
+    except ComposeResolveError as e:
+        return {
+            "valid": False,
+            "issues": [issue(ERROR, "resolve", None, str(e))],
+            "plan": []
+        }
+
+    others = {}
+    for other_file, handler in handlers.items():
+        if os.path.realpath(other_file) == path:
+            continue
+        try:
+            others[other_file] = {"services": handler.get_effective_services()}
+        except ComposeResolveError:
+            continue
+
+    app.container_snapshot.refresh()
+    containers = app.container_snapshot.all()
+    issues = validate(model, containers, others)
+    return {
+        "valid": not any(i["level"] == ERROR for i in issues),
+        "issues": issues,
+        "plan": plan(model, containers, targets)
+    }
+
+
+def compose_save_validator(app):
+    """File browser save hook, rejects edits to managed compose files that fail validation"""
+    managed = {os.path.realpath(f) for f in app.docker_manager.compose_file_handlers}
+
+    def validator(path:os.PathLike, content:str) -> list[dict]:
+        if os.path.realpath(path) not in managed:
+            return []
+        try:
+            document = yaml.safe_load(content)
+        except yaml.YAMLError:
+            return [] # Reported by the YAML save handler
+        if not isinstance(document, dict):
+            return [issue(ERROR, "invalid-document", None, "Compose file must be a mapping")]
+        return check_compose(app, path, document)["issues"]
+    return validator
@@ -0,0 +1,286 @@
+"""
+In-process compose resolution.
+Merges `extends`, override files and variable interpolation into the
+effective service model without shelling out to `docker compose config`.
+Parsed files and resolved models are cached and dropped per file through
+the shared file watcher.
+"""
+
+import logging
+import os
+import re
+import threading
+import yaml
+from pathlib import Path
+from app.extensions.common.file_watcher import get_file_watcher
+
+# Lowest to highest precedence, .env is what `docker compose` itself reads
+ENV_FILES = ("template.env", "master.env", ".env")
+
+# Sequences merged by key rather than appended
+_MAPPING_KEYS = {"environment", "labels", "annotations", "sysctls"}
+_MOUNT_KEYS = {"volumes", "devices", "tmpfs"}
+# Replaced outright by the extending / overriding service
+_REPLACE_KEYS = {"command", "entrypoint", "healthcheck", "image", "build"}
+
+_VARIABLE_RE = re.compile(
+    r"\$(?:(?P<escaped>\$)|\{(?P<braced>[A-Za-z_][A-Za-z0-9_]*)(?:(?P<op>:?[-?+])(?P<arg>[^}]*))?\}|(?P<named>[A-Za-z_][A-Za-z0-9_]*))"
+)
+
+
+class ComposeResolveError(ValueError):
+    pass
+
+
+def interpolate(value, env:dict):
+    """Substitutes $VAR, ${VAR}, ${VAR:-default}, ${VAR:?error} etc. in strings, lists and dict values"""
+    if isinstance(value, dict):
+        return {k: interpolate(v, env) for k, v in value.items()}
+    if isinstance(value, list):
+        return [interpolate(v, env) for v in value]
+    if not isinstance(value, str) or "$" not in value:
+        return value
+
+    def substitute(match:re.Match) -> str:
+        if match.group("escaped"):
+            return "$"
+        name = match.group("braced") or match.group("named")
+        op, arg = match.group("op"), match.group("arg")
+        current = env.get(name)
+        unset = current is None or (op is not None and op.startswith(":") and current == "")
+        if op and op.endswith("-"):
+            return interpolate(arg, env) if unset else current
+        if op and op.endswith("?"):
+            if unset:
+                raise ComposeResolveError(f"Required variable {name} is not set - {arg}")
+            return current
+        if op and op.endswith("+"):
+            return "" if unset else interpolate(arg, env)
+        return current or ""
+
+    return _VARIABLE_RE.sub(substitute, value)
+
+
+def parse_env_file(path:os.PathLike, env:dict|None=None) -> dict:
+    """
+    Reads KEY=VALUE lines, ignoring comments, quotes and trailing ` # notes`.
+    Values may reference variables defined earlier, or in `env`.
+    """
+    values = dict(env or {})
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            key = key.strip().removeprefix("export ").strip()
+            value = value.strip()
+            if value[:1] in ("'", '"') and value[-1:] == value[:1] and len(value) > 1:
+                value = value[1:-1]
+            else:
+                value = re.split(r"\s+#", value, 1)[0].strip()
+                value = interpolate(value, values)
+            values[key] = value
+    return values
+
+
+def _as_mapping(value) -> dict:
+    """environment / labels style sequences to a dict"""
+    if isinstance(value, dict):
+        return {k: "" if v is None else v for k, v in value.items()}
+    result = {}
+    for item in value or []:
+        key, _, val = str(item).partition("=")
+        result[key.strip()] = val
+    return result
+
+
+def _mount_target(mount) -> str:
+    if isinstance(mount, dict):
+        return mount.get("target", str(mount))
+    parts = str(mount).split(":")
+    return parts[1] if len(parts) > 1 else parts[0]
+
+
+def merge_service(base:dict, override:dict) -> dict:
+    """Merges two service definitions with compose's extends / override rules"""
+    merged = dict(base)
+    for key, value in override.items():
+        if key in _MAPPING_KEYS:
+            merged[key] = {**_as_mapping(merged.get(key)), **_as_mapping(value)}
+        elif key not in merged or key in _REPLACE_KEYS:
+            merged[key] = value
+        elif key in _MOUNT_KEYS and isinstance(value, list):
+            mounts = {_mount_target(m): m for m in merged[key] or []}
+            mounts.update({_mount_target(m): m for m in value})
+            merged[key] = list(mounts.values())
+        elif isinstance(value, dict) and isinstance(merged[key], dict):
+            merged[key] = merge_service(merged[key], value)
+        elif isinstance(value, list) and isinstance(merged[key], list):
+            merged[key] = merged[key] + [v for v in value if v not in merged[key]]
+        else:
+            merged[key] = value
+    return merged
+
+
+def override_file(path:Path) -> Path:
+    """docker-compose.yml -> docker-compose.override.yml"""
+    return path.with_name(f"{path.stem}.override{path.suffix}")
+
+
+class ComposeResolver:
+    """Resolves compose files under one project directory"""
+    def __init__(self, project_dir:os.PathLike):
+        self.project_dir = Path(project_dir).resolve()
+        self.logger = logging.getLogger(__name__ + ".ComposeResolver")
+        self.lock = threading.RLock()
+        self.env = None
+        self.documents = {} # path -> interpolated document, None if missing
+        self.resolved = {} # path -> (effective model, paths it depends on)
+        self.watches = {} # path -> file watcher subscription
+
+    def _watch(self, path:Path) -> None:
+        if path in self.watches or not path.parent.is_dir():
+            return
+        self.watches[path] = get_file_watcher().subscribe(path, self.on_file_event)
+
+    def on_file_event(self, event) -> None:
+        paths = {Path(p) for p in (event.src_path, getattr(event, "dest_path", None)) if p}
+        with self.lock:
+            if any(p.name in ENV_FILES and p.parent == self.project_dir for p in paths):
+                # Variables feed every file
+                self.env = None
+                self.documents = {}
+                self.resolved = {}
+                return
+            for path in paths:
+                self.documents.pop(path, None)
+            for target, (_, dependencies) in list(self.resolved.items()):
+                if dependencies & paths:
+                    del self.resolved[target]
+
+    def environment(self) -> dict:
+        with self.lock:
+            if self.env is None:
+                env = {}
+                for name in ENV_FILES:
+                    path = self.project_dir / name
+                    self._watch(path)
+                    if path.is_file():
+                        env = parse_env_file(path, env)
+                self.env = env
+            return self.env
+
+    def _document(self, path:Path, overrides:dict|None=None) -> dict|None:
+        if overrides and path in overrides:
+            return overrides[path]
+        with self.lock:
+            if path not in self.documents:
+                self._watch(path)
+                if path.is_file():
+                    try:
+                        document = yaml.safe_load(path.read_bytes()) or {}
+                    except yaml.YAMLError as e:
+                        raise ComposeResolveError(f"Error parsing {path} - {e}")
+                    self.documents[path] = interpolate(document, self.environment())
+                else:
+                    self.documents[path] = None
+            return self.documents[path]
+
+    def _resolve_service(
+        self,
+        path:Path,
+        name:str,
+        dependencies:set,
+        seen:tuple=(),
+        overrides:dict|None=None
+    ) -> dict:
+        if (path, name) in seen:
+            raise ComposeResolveError(f"Circular extends at {name} in {path}")
+        dependencies.add(path)
+        document = self._document(path, overrides)
+        services = (document or {}).get("services") or {}
+        if name not in services:
+            raise ComposeResolveError(f"Service {name} not found in {path}")
+        service = dict(services[name] or {})
+        extends = service.pop("extends", None)
+        if not extends:
+            # Same shape as `docker compose config`, mappings rather than KEY=VALUE lists
+            for key in _MAPPING_KEYS & service.keys():
+                service[key] = _as_mapping(service[key])
+            return service
+        if isinstance(extends, str):
+            extends = {"service": extends}
+        base_path = path
+        if extends.get("file"):
+            base_path = (path.parent / extends["file"]).resolve()
+        base = self._resolve_service(base_path, extends["service"], dependencies, seen + ((path, name),), overrides)
+        return merge_service(base, service)
+
+    def resolve(self, compose_file:os.PathLike, document:dict|None=None) -> dict:
+        """
+        Effective model of a compose file and its override file, cached until a
+        dependency changes. Passing `document` resolves unsaved content in place
+        of the file on disk, those results aren't cached.
+        """
+        path = Path(compose_file).resolve()
+        overrides = None
+        if document is not None:
+            overrides = {path: interpolate(document, self.environment())}
+        with self.lock:
+            cached = self.resolved.get(path)
+            if cached and overrides is None:
+                return cached[0]
+
+            dependencies = set()
+            model = {}
+            for layer in (path, override_file(path)):
+                dependencies.add(layer)
+                document = self._document(layer, overrides)
+                if document is None:
+                    if layer == path:
+                        raise ComposeResolveError(f"Compose file doesn't exist - {path}")
+                    continue
+                services = {
+                    name: self._resolve_service(layer, name, dependencies, overrides=overrides)
+                    for name in (document.get("services") or {})
+                }
+                for key, value in document.items():
+                    if key == "services":
+                        continue
+                    if isinstance(value, dict) and isinstance(model.get(key), dict):
+                        model[key] = {**model[key], **value}
+                    else:
+                        model[key] = value
+                model_services = model.setdefault("services", {})
+                for name, service in services.items():
+                    model_services[name] = (
+                        merge_service(model_services[name], service)
+                        if name in model_services else service
+                    )
+            if overrides is not None:
+                return model
+            self.resolved[path] = (model, frozenset(dependencies))
+            self.logger.info(f"Resolved {path} from {len(dependencies)} files")
+            return model
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "documents": len(self.documents),
+                "resolved": len(self.resolved),
+                "watched": len(self.watches),
+            }
+
+
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_compose_resolver(project_dir:os.PathLike) -> ComposeResolver:
+    """Shared resolver per project directory"""
+    key = Path(project_dir).resolve()
+    with _resolvers_lock:
+        if key not in _resolvers:
+            _resolvers[key] = ComposeResolver(key)
+        return _resolvers[key]
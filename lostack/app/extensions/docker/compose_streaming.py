@@ -2,6 +2,7 @@ import os
 from flask import Response
 from queue import Queue
 from .compose import DockerComposeHandler
+from .shell_streaming import LOG_QUEUE_SIZE
 from app.extensions.common.stream_handler import StreamHandler
 
 class DockerComposeHandlerStreaming(DockerComposeHandler):
@@ -13,8 +14,9 @@ class DockerComposeHandlerStreaming(DockerComposeHandler):
         self.stream_compose_stop : Response = StreamHandler.create_stream(self.compose_stop, context=context)
         self.stream_compose_down : Response = StreamHandler.create_stream(self.compose_down, context=context)
         self.stream_compose_kill : Response = StreamHandler.create_stream(self.compose_kill, context=context)
-        self.stream_compose_logs : Response = StreamHandler.create_stream(self.compose_logs, context=context)
-        self.stream_compose_follow : Response = StreamHandler.create_stream(self.compose_follow, context=context)
+        # Read only, bounded for backpressure and no service sync afterwards
+        self.stream_compose_logs : Response = StreamHandler.create_stream(self.compose_logs, context=context, queue_size=LOG_QUEUE_SIZE, force_sync=False)
+        self.stream_compose_follow : Response = StreamHandler.create_stream(self.compose_follow, context=context, queue_size=LOG_QUEUE_SIZE, force_sync=False)
         self.stream_compose_restart : Response = StreamHandler.create_stream(self.compose_restart, context=context)
         self.stream_compose_rm : Response = StreamHandler.create_stream(self.compose_rm, context=context)
         self.stream_compose_run : Response = StreamHandler.create_stream(self.compose_run, context=context)
\ No newline at end of file
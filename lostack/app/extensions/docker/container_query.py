@@ -0,0 +1,80 @@
+"""Filtering and sorting for Engine container lists"""
+
+from app.extensions.common.label_extractor import LabelExtractor as labext
+
+FILTER_ARGS = ("q", "state", "group", "image", "label")
+
+SORT_KEYS = {
+    "name": lambda c: c["Names"][0].lstrip("/").lower() if c.get("Names") else "",
+    "state": lambda c: c.get("State") or "",
+    "image": lambda c: (c.get("Image") or "").lower(),
+    "created": lambda c: c.get("Created") or 0,
+    "group": lambda c: (container_group(c) or "").lower(),
+}
+DEFAULT_SORT = "name"
+
+
+def container_group(container:dict) -> str|None:
+    """LoStack group of a container, falling back to its compose project"""
+    labels = container.get("Labels") or {}
+    return labels.get("lostack.group") or labels.get("com.docker.compose.project")
+
+
+def parse_query(args) -> dict:
+    """Reads filter and sort arguments, unknown sort keys fall back to name"""
+    query = {key: args.get(key, "").strip() for key in FILTER_ARGS}
+    sort = args.get("sort", DEFAULT_SORT)
+    query["sort"] = sort if sort in SORT_KEYS else DEFAULT_SORT
+    query["order"] = "desc" if args.get("order") == "desc" else "asc"
+    return query
+
+
+def has_filters(query:dict) -> bool:
+    return any(query.get(key) for key in FILTER_ARGS)
+
+
+def _matches(container:dict, query:dict) -> bool:
+    if (state := query.get("state")):
+        # "stopped" matches every state that isn't running
+        current = container.get("State")
+        if state == "stopped":
+            if current == "running":
+                return False
+        elif current != state:
+            return False
+    if (group := query.get("group")) and container_group(container) != group:
+        return False
+    if (image := query.get("image")) and image.lower() not in (container.get("Image") or "").lower():
+        return False
+    if (label := query.get("label")):
+        labels = labext.normalize_labels(container.get("Labels") or {})
+        key, has_value, value = label.partition("=")
+        if key not in labels or (has_value and labels[key] != value):
+            return False
+    if (text := query.get("q", "").lower()):
+        names = " ".join(container.get("Names") or []).lower()
+        if text not in names and text not in (container.get("Image") or "").lower():
+            return False
+    return True
+
+
+def filter_containers(containers, query:dict) -> list[dict]:
+    """Applies filters then sorts, all before anything is serialized"""
+    found = [c for c in containers if _matches(c, query)]
+    found.sort(key=SORT_KEYS[query.get("sort", DEFAULT_SORT)], reverse=query.get("order") == "desc")
+    return found
+
+
+def count_states(containers) -> dict:
+    counts = {"running": 0, "stopped": 0, "total": 0}
+    for container in containers:
+        counts["total"] += 1
+        if container.get("State") == "running":
+            counts["running"] += 1
+        elif container.get("State") == "exited":
+            counts["stopped"] += 1
+    return counts
+
+
+def list_groups(containers) -> list[str]:
+    return sorted({g for c in containers if (g := container_group(c))})
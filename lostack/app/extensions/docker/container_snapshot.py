@@ -0,0 +1,135 @@
+"""
+Versioned snapshot of the container list.
+Concurrent readers share one Engine call per TTL, the version only changes
+when a container does, so clients can revalidate with an ETag or ask for
+just the containers added, changed or removed since the version they hold.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import deque
+
+DEFAULT_TTL = 2.0
+# Versions of change history kept for delta responses
+DEFAULT_HISTORY = 64
+
+SLIM_FIELDS = ("Id", "Names", "Image", "State", "Status", "Created")
+
+
+def _digest(container:dict) -> str:
+    return hashlib.sha1(
+        json.dumps(container, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def parse_fields(value:str|None) -> tuple[str]|None:
+    """Parses a fields argument, 'slim' or a comma separated list of Engine keys"""
+    if not value:
+        return None
+    if value == "slim":
+        return SLIM_FIELDS
+    fields = tuple(f.strip() for f in value.split(",") if f.strip())
+    if "Id" not in fields:
+        fields = ("Id",) + fields
+    return fields
+
+
+def project(container:dict, fields:tuple[str]|None) -> dict:
+    """Keeps only the requested top level keys of a container"""
+    if not fields:
+        return container
+    return {k: container[k] for k in fields if k in container}
+
+
+class ContainerSnapshot:
+    """Shared, versioned view of api_client.containers(all=True)"""
+    def __init__(self, api_client, ttl:float=DEFAULT_TTL, history:int=DEFAULT_HISTORY):
+        self.api_client = api_client
+        self.ttl = ttl
+        # Distinguishes versions across restarts so stale ETags never match
+        self.instance = uuid.uuid4().hex[:8]
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.version = 0
+        self.fetched = 0
+        self.containers = {} # id -> container
+        self.digests = {} # id -> digest
+        self.changes = deque(maxlen=history) # (version, changed ids, removed ids)
+
+    @property
+    def etag(self) -> str:
+        return f"{self.instance}-{self.version}"
+
+    def invalidate(self) -> None:
+        """Forces the next read to query the Engine"""
+        self.fetched = 0
+
+    def refresh(self, force:bool=False) -> int:
+        """Re-reads containers if the snapshot is older than the TTL, returns the version"""
+        if not force and time.monotonic() - self.fetched < self.ttl:
+            return self.version
+        with self.refresh_lock:
+            # Another request may have refreshed while this one waited
+            if not force and time.monotonic() - self.fetched < self.ttl:
+                return self.version
+            containers = {c["Id"]: c for c in self.api_client.containers(all=True)}
+            digests = {cid: _digest(c) for cid, c in containers.items()}
+            changed = {cid for cid, d in digests.items() if self.digests.get(cid) != d}
+            removed = set(self.digests) - set(digests)
+            with self.lock:
+                if changed or removed:
+                    self.version += 1
+                    self.changes.append((self.version, changed, removed))
+                self.containers = containers
+                self.digests = digests
+                self.fetched = time.monotonic()
+            return self.version
+
+    def all(self) -> list[dict]:
+        with self.lock:
+            return list(self.containers.values())
+
+    def get(self, since:int|None=None, fields:tuple[str]|None=None, instance:str|None=None) -> dict:
+        """
+        Full snapshot, or a delta when `since` is a version still in history.
+        Delta responses list changed containers in full and removed ids.
+        Versions from another instance (before a restart) get a full snapshot.
+        """
+        if instance is not None and instance != self.instance:
+            since = None
+        with self.lock:
+            version = self.version
+            containers = self.containers
+            delta = None
+            if since is not None and since > version:
+                since = None # Counted by an earlier process
+            if since is not None and self.changes and since >= self.changes[0][0] - 1:
+                changed, removed = set(), set()
+                for change_version, change_ids, removed_ids in self.changes:
+                    if change_version <= since:
+                        continue
+                    changed = (changed | change_ids) - removed_ids
+                    removed = (removed | removed_ids) - change_ids
+                delta = (changed, removed)
+            elif since is not None and since == version:
+                delta = (set(), set())
+
+        if delta is None:
+            return {
+                "instance": self.instance,
+                "version": version,
+                "delta": False,
+                "containers": [project(c, fields) for c in containers.values()]
+            }
+        changed, removed = delta
+        return {
+            "instance": self.instance,
+            "version": version,
+            "since": since,
+            "delta": True,
+            "changed": [project(containers[cid], fields) for cid in changed if cid in containers],
+            "removed": sorted(removed)
+        }
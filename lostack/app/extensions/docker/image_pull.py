@@ -0,0 +1,52 @@
+"""
+Image pulls ahead of `compose up`. A batch of images is pulled in parallel
+so a multi-package install waits for the slowest image, not the sum of all.
+"""
+
+import docker
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from docker.utils import parse_repository_tag
+
+PULL_WORKERS = 4
+
+logger = logging.getLogger(__name__)
+
+
+class ImagePullError(RuntimeError):
+    pass
+
+
+def ensure_image(api_client, image:str, result_queue=None) -> bool:
+    """Pulls an image that isn't present locally. Returns True if it was pulled."""
+    try:
+        api_client.inspect_image(image)
+        return False
+    except docker.errors.ImageNotFound:
+        pass
+    repository, tag = parse_repository_tag(image)
+    if result_queue is not None:
+        result_queue.put_nowait(f"Pulling {image}")
+    logger.info(f"Pulling {image}")
+    for status in api_client.pull(repository, tag=tag or "latest", stream=True, decode=True):
+        if "error" in status:
+            raise ImagePullError(f"Could not pull {image} - {status['error']}")
+    if result_queue is not None:
+        result_queue.put_nowait(f"Pulled {image}")
+    return True
+
+
+def pull_images(api_client, images:list[str], result_queue=None, workers:int=PULL_WORKERS) -> dict[str:str]:
+    """Ensures every image is present, several at a time. Returns {image: error} for failures."""
+    failed = {}
+    if not images:
+        return failed
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ImagePull") as pool:
+        futures = {image: pool.submit(ensure_image, api_client, image, result_queue) for image in images}
+        for image, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                failed[image] = str(e)
+                logger.error(f"Error pulling {image} - {e}")
+    return failed
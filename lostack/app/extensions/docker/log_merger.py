@@ -0,0 +1,128 @@
+"""
+Merge log streams from several containers into one timestamp ordered stream.
+Used for package groups where related containers log at the same time.
+"""
+
+import heapq
+import queue
+import threading
+import time
+from collections import deque
+
+# Lines buffered per container before its reader blocks
+DEFAULT_BUFFER_SIZE = 500
+# How long a line may wait for quieter containers before it is sent anyway
+DEFAULT_LATENESS = 0.25
+
+_END = object()
+
+
+def _sort_key(streams):
+    """Wraps streams so lines without a timestamp inherit the previous one"""
+    def keyed(index, stream):
+        last = 0
+        for line in stream:
+            if line.timestamp is not None:
+                last = line.timestamp
+            yield last, index, line
+    return [keyed(i, s) for i, s in enumerate(streams)]
+
+
+def merge_history(streams, tail:int|str|None=None):
+    """
+    K-way merge of finished (non-followed) log streams by timestamp.
+    Each stream is already ordered so only one line per stream is held at a time.
+    With a numeric tail only the last `tail` merged lines are kept.
+    """
+    merged = (line for _, _, line in heapq.merge(*_sort_key(streams)))
+    if isinstance(tail, int):
+        yield from deque(merged, maxlen=tail)
+    else:
+        yield from merged
+
+
+class LiveMerger:
+    """
+    K-way merge of followed log streams.
+    Each container is read on its own thread into a bounded buffer. The head
+    line of every buffer sits in a heap, the oldest head is emitted once every
+    open container has a head or once it has waited longer than `lateness`.
+    """
+    def __init__(
+        self,
+        streams:list,
+        buffer_size:int=DEFAULT_BUFFER_SIZE,
+        lateness:float=DEFAULT_LATENESS
+    ):
+        self.streams = streams
+        self.lateness = lateness
+        self.buffers = [queue.Queue(buffer_size) for _ in streams]
+        self.wakeup = threading.Event()
+        self.closed = threading.Event()
+        self.threads = [
+            threading.Thread(target=self._read, args=(i,), daemon=True)
+            for i in range(len(streams))
+        ]
+
+    def _read(self, index:int) -> None:
+        buffer = self.buffers[index]
+        last = 0
+        try:
+            for line in self.streams[index]:
+                if line.timestamp is not None:
+                    last = line.timestamp
+                if not self._put(buffer, (last, time.monotonic(), line)):
+                    return
+        except Exception:
+            pass
+        finally:
+            self._put(buffer, _END)
+
+    def _put(self, buffer:queue.Queue, item) -> bool:
+        while not self.closed.is_set():
+            try:
+                buffer.put(item, timeout=0.5)
+                self.wakeup.set()
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self):
+        for thread in self.threads:
+            thread.start()
+        heap = []
+        missing = set(range(len(self.streams))) # Open streams with no line in the heap
+        try:
+            while (heap or missing) and not self.closed.is_set():
+                self.wakeup.clear()
+                for index in list(missing):
+                    try:
+                        item = self.buffers[index].get_nowait()
+                    except queue.Empty:
+                        continue
+                    missing.discard(index)
+                    if item is _END:
+                        continue
+                    timestamp, arrived, line = item
+                    heapq.heappush(heap, (timestamp, index, arrived, line))
+
+                if heap:
+                    waited = time.monotonic() - heap[0][2]
+                    if not missing or waited >= self.lateness:
+                        _, index, _, line = heapq.heappop(heap)
+                        missing.add(index)
+                        yield line
+                        continue
+                    self.wakeup.wait(self.lateness - waited)
+                else:
+                    self.wakeup.wait(0.5)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        for stream in self.streams:
+            stream.close()
@@ -0,0 +1,343 @@
+"""
+Read container logs straight from the Engine API.
+Demultiplexes the stdout / stderr frame stream without a docker CLI process.
+"""
+
+import datetime
+import logging
+import re
+import struct
+import time
+from collections import namedtuple
+from queue import Queue
+from .log_merger import LiveMerger, merge_history
+
+DEFAULT_LOG_TAIL = 150
+
+STREAM_NAMES = {0: "stdin", 1: "stdout", 2: "stderr"}
+_HEADER = struct.Struct(">BxxxL")
+_DURATION_RE = re.compile(r"^(\d+(?:\.\d+)?)(s|m|h|d)$")
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+LogLine = namedtuple("LogLine", ["container", "stream", "timestamp", "text"])
+
+
+def demux_frames(chunks, tty:bool=False):
+    """
+    Yields (stream_name, bytes) from an Engine log response body.
+    Non-TTY containers send 8 byte headers (stream type, 3 pad bytes, size)
+    before each payload, TTY containers send raw output.
+    """
+    if tty:
+        for chunk in chunks:
+            if chunk:
+                yield "stdout", chunk
+        return
+
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer.extend(chunk)
+        while len(buffer) >= _HEADER.size:
+            stream_type, size = _HEADER.unpack_from(buffer)
+            end = _HEADER.size + size
+            if len(buffer) < end:
+                break
+            payload = bytes(buffer[_HEADER.size:end])
+            del buffer[:end]
+            yield STREAM_NAMES.get(stream_type, "stdout"), payload
+
+
+def iter_lines(frames):
+    """Splits demultiplexed frames into decoded lines, buffering partial lines per stream"""
+    partial = {}
+    for stream, payload in frames:
+        data = partial.pop(stream, b"") + payload
+        *lines, rest = data.split(b"\n")
+        if rest:
+            partial[stream] = rest
+        for line in lines:
+            yield stream, line.rstrip(b"\r").decode("utf-8", errors="replace")
+    for stream, rest in partial.items():
+        yield stream, rest.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+def parse_timestamp(value:str) -> int:
+    """
+    Parses an RFC3339Nano Engine timestamp to integer nanoseconds since epoch.
+    Go trims trailing zeros from the fraction so these can't be compared as strings.
+    """
+    value = value.strip()
+    offset = 0
+    if value.endswith("Z"):
+        value = value[:-1]
+    elif len(value) > 6 and value[-6] in "+-" and value[-3] == ":":
+        sign = 1 if value[-6] == "+" else -1
+        offset = sign * (int(value[-5:-3]) * 3600 + int(value[-2:]) * 60)
+        value = value[:-6]
+    seconds, _, fraction = value.partition(".")
+    parsed = datetime.datetime.strptime(seconds, "%Y-%m-%dT%H:%M:%S")
+    epoch = int(parsed.replace(tzinfo=datetime.timezone.utc).timestamp()) - offset
+    return epoch * 1_000_000_000 + int((fraction or "0")[:9].ljust(9, "0"))
+
+
+def parse_time_arg(value) -> float|None:
+    """
+    Parses a since / until argument to unix seconds.
+    Accepts unix timestamps, relative durations (30s, 10m, 2h, 1d) and ISO datetimes.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    if (match := _DURATION_RE.match(value)):
+        amount, unit = match.groups()
+        return time.time() - float(amount) * _DURATION_UNITS[unit]
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid time value - {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_tail_arg(value) -> int|str:
+    """Parses a tail argument to an int or 'all'"""
+    if value is None or value == "":
+        return DEFAULT_LOG_TAIL
+    if str(value).lower() == "all":
+        return "all"
+    tail = int(value)
+    if tail < 0:
+        raise ValueError("Tail must be a positive integer or 'all'")
+    return tail
+
+
+def log_options_from_args(args) -> dict:
+    """Collects tail / since / until / timestamps options from request args"""
+    options = {"tail": parse_tail_arg(args.get("tail"))}
+    for key in ("since", "until"):
+        if args.get(key):
+            options[key] = parse_time_arg(args.get(key))
+    if args.get("timestamps"):
+        options["timestamps"] = args.get("timestamps").lower() in ("1", "true", "yes", "on")
+    return options
+
+
+def put_line(result_queue:Queue, message:str) -> bool:
+    """
+    Puts a message on a result queue.
+    Blocks on bounded stream queues so slow clients push back on the reader.
+    Returns False once the consumer has gone away.
+    """
+    if hasattr(result_queue, "put_blocking"):
+        return result_queue.put_blocking(message)
+    result_queue.put_nowait(message)
+    return True
+
+
+class LogStream:
+    """Iterable over the log lines of a single container"""
+    def __init__(self, response, container:str, name:str, tty:bool, timestamps:bool):
+        self.response = response
+        self.container = container
+        self.name = name
+        self.tty = tty
+        self.timestamps = timestamps
+        self.closed = False
+
+    def __iter__(self):
+        chunks = self.response.iter_content(chunk_size=None, decode_unicode=False)
+        try:
+            for stream, text in iter_lines(demux_frames(chunks, self.tty)):
+                timestamp = None
+                if self.timestamps:
+                    stamp, _, rest = text.partition(" ")
+                    try:
+                        timestamp = parse_timestamp(stamp)
+                        text = rest
+                    except ValueError:
+                        pass # Continuation without a timestamp
+                yield LogLine(self.name, stream, timestamp, text)
+        except Exception:
+            if not self.closed:
+                raise
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.response.close()
+        except Exception:
+            pass
+
+
+# Private APIClient methods used to get the raw, unbuffered log response.
+# Present in docker SDK 4 through 7, the version is pinned in the dockerfile.
+_CLIENT_METHODS = ("_url", "_get", "_raise_for_status", "_get_raw_response_socket", "_disable_socket_timeout")
+
+
+class LogStreamer:
+    """Opens container log streams using a low level docker APIClient"""
+    def __init__(self, api_client):
+        self.api_client = api_client
+        self.logger = logging.getLogger(__name__ + ".LogStreamer")
+
+    def open(
+        self,
+        container:str,
+        follow:bool=False,
+        tail:int|str=DEFAULT_LOG_TAIL,
+        since=None,
+        until=None,
+        timestamps:bool=False,
+        stdout:bool=True,
+        stderr:bool=True
+    ) -> LogStream:
+        """Opens a log stream for a container id or name"""
+        missing = [m for m in _CLIENT_METHODS if not hasattr(self.api_client, m)]
+        if missing:
+            raise RuntimeError(f"Unsupported docker SDK, APIClient has no {', '.join(missing)}")
+        info = self.api_client.inspect_container(container)
+        params = {
+            "follow": int(follow),
+            "stdout": int(stdout),
+            "stderr": int(stderr),
+            "timestamps": int(timestamps),
+            "tail": tail,
+        }
+        if (since := parse_time_arg(since)) is not None:
+            params["since"] = since
+        if (until := parse_time_arg(until)) is not None:
+            params["until"] = until
+
+        url = self.api_client._url("/containers/{0}/logs", container)
+        response = self.api_client._get(url, params=params, stream=True)
+        self.api_client._raise_for_status(response)
+        if follow:
+            # Followed streams can idle for a long time
+            try:
+                socket = self.api_client._get_raw_response_socket(response)
+                self.api_client._disable_socket_timeout(socket)
+            except Exception:
+                pass
+
+        return LogStream(
+            response,
+            info["Id"],
+            info["Name"].lstrip("/"),
+            info.get("Config", {}).get("Tty", False),
+            timestamps
+        )
+
+    def find_service_containers(self, service_names:list[str]) -> list[str]:
+        """Resolve compose service names to container ids, falling back to container names"""
+        found = []
+        for name in service_names:
+            matches = self.api_client.containers(
+                all=True,
+                filters={"label": f"com.docker.compose.service={name}"}
+            )
+            if matches:
+                found.extend(c["Id"] for c in matches)
+            else:
+                found.append(name)
+        return found
+
+    @staticmethod
+    def format_line(line:LogLine, prefix:bool=False, timestamps:bool=True) -> str:
+        """Format a log line for the terminal stream"""
+        text = line.text
+        if timestamps and line.timestamp is not None:
+            stamp = datetime.datetime.fromtimestamp(
+                line.timestamp / 1_000_000_000,
+                tz=datetime.timezone.utc
+            ).isoformat(timespec="milliseconds")
+            text = f"{stamp} {text}"
+        if prefix:
+            return f"{line.container} | {text}"
+        return f"{line.stream}: {text}"
+
+    def stream_to_queue(
+        self,
+        containers:list[str],
+        result_queue:Queue,
+        follow:bool=False,
+        tail:int|str=DEFAULT_LOG_TAIL,
+        timestamps:bool=False,
+        **options
+    ) -> None:
+        """
+        Pipe logs for one or more containers into a result queue.
+        Multiple containers are merged into a single timestamp ordered stream.
+        """
+        merged = len(containers) > 1
+        streams = []
+        for container in containers:
+            try:
+                stream = self.open(
+                    container,
+                    follow=follow,
+                    tail=tail,
+                    # Merging needs timestamps to order lines
+                    timestamps=timestamps or merged,
+                    **options
+                )
+            except Exception as e:
+                put_line(result_queue, f"Error opening logs for {container} - {e}")
+                continue
+            streams.append(stream)
+            if hasattr(result_queue, "on_close"):
+                result_queue.on_close(stream.close)
+
+        if not streams:
+            return
+        if not merged:
+            lines = streams[0]
+        elif follow:
+            lines = LiveMerger(streams)
+            if hasattr(result_queue, "on_close"):
+                result_queue.on_close(lines.close)
+        else:
+            lines = merge_history(streams, tail)
+
+        try:
+            for line in lines:
+                if not put_line(result_queue, self.format_line(line, merged, timestamps)):
+                    break
+        except Exception as e:
+            put_line(result_queue, f"Error reading logs - {e}")
+        finally:
+            for stream in streams:
+                stream.close()
+
+    def execute(
+        self,
+        containers:str|list[str],
+        result_queue:Queue,
+        complete:bool=True,
+        follow:bool=False,
+        **options
+    ) -> None:
+        """Stream logs to a result queue, mirrors DockerActionBase.execute"""
+        if isinstance(containers, str):
+            containers = [containers]
+        action = "Following" if follow else "Reading"
+        put_line(result_queue, f"{action} logs for: {containers}")
+        try:
+            self.stream_to_queue(containers, result_queue, follow=follow, **options)
+        except Exception as e:
+            self.logger.error(f"Error streaming logs for {containers} - {e}")
+            put_line(result_queue, f"Error streaming logs - {e}")
+        if complete:
+            put_line(result_queue, "__COMPLETE__")
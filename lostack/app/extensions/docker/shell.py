@@ -1,11 +1,15 @@
+import docker
 import logging
 import traceback
+from .log_streamer import LogStreamer, DEFAULT_LOG_TAIL
 from .shell_actions import DockerShellActions
 
 
 class DockerShellHandler:
     def __init__(self):
         self.logger = logging.getLogger(__name__ + ".DockerShellHandler")
+        # Logs are read from the Engine API, no CLI process per viewer
+        self.log_streamer = LogStreamer(docker.APIClient())
 
     def _handle_shell_action(
         self,
@@ -48,8 +52,8 @@ class DockerShellHandler:
     def shell_remove(self,container_id:str,result_queue:bool=None, complete:bool=True) -> None:
         return self._handle_shell_action("remove", container_id, result_queue, complete)
 
-    def shell_logs(self,container_id:str,result_queue:bool=None, complete:bool=True) -> None:
-        return self._handle_shell_action("logs", container_id, result_queue, complete)
+    def shell_logs(self,container_id:str,result_queue:bool=None, complete:bool=True, tail=DEFAULT_LOG_TAIL, **options) -> None:
+        return self.log_streamer.execute(container_id, result_queue, complete, follow=False, tail=tail, **options)
 
-    def shell_follow(self,container_id:str,result_queue:bool=None, complete:bool=True) -> None:
-        return self._handle_shell_action("follow", container_id, result_queue, complete)
\ No newline at end of file
+    def shell_follow(self,container_id:str,result_queue:bool=None, complete:bool=True, tail=DEFAULT_LOG_TAIL, **options) -> None:
+        return self.log_streamer.execute(container_id, result_queue, complete, follow=True, tail=tail, **options)
\ No newline at end of file
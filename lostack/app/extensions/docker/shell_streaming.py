@@ -4,6 +4,8 @@ from queue import Queue
 from .shell import DockerShellHandler
 from app.extensions.common.stream_handler import StreamHandler
 
+LOG_QUEUE_SIZE = 2000
+
 class DockerShellHandlerStreaming(DockerShellHandler):
     def __init__(self):
         DockerShellHandler.__init__(self)
@@ -11,5 +13,5 @@ class DockerShellHandlerStreaming(DockerShellHandler):
         self.stream_shell_start : Response = StreamHandler.create_stream(self.shell_start)
         self.stream_shell_stop : Response = StreamHandler.create_stream(self.shell_stop)
         self.stream_shell_remove : Response = StreamHandler.create_stream(self.shell_remove)
-        self.stream_shell_logs : Response = StreamHandler.create_stream(self.shell_logs)
-        self.stream_shell_follow : Response = StreamHandler.create_stream(self.shell_follow)
\ No newline at end of file
+        self.stream_shell_logs : Response = StreamHandler.create_stream(self.shell_logs, queue_size=LOG_QUEUE_SIZE)
+        self.stream_shell_follow : Response = StreamHandler.create_stream(self.shell_follow, queue_size=LOG_QUEUE_SIZE)
\ No newline at end of file
@@ -0,0 +1,274 @@
+"""
+Background sampler for container resource usage.
+One-shot stats for every running container are read concurrently on an
+interval into fixed size ring buffers so pages never wait on the daemon.
+"""
+
+import logging
+import math
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+import docker
+from docker.errors import InvalidVersion
+
+DEFAULT_INTERVAL = 5
+DEFAULT_HISTORY = 120
+DEFAULT_WORKERS = 8
+
+# Series kept per container, all stored as doubles
+SERIES = (
+    "cpu",          # Percent of one core
+    "memory",       # Bytes, excluding reclaimable page cache
+    "net_rx",       # Bytes per second
+    "net_tx",
+    "block_read",
+    "block_write",
+)
+
+
+class RingBuffer:
+    """Fixed size array backed ring buffer of floats"""
+    def __init__(self, size:int):
+        self.size = size
+        self.data = array("d", [math.nan]) * size
+        self.index = 0
+        self.count = 0
+
+    def append(self, value:float) -> None:
+        self.data[self.index] = value
+        self.index = (self.index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    @property
+    def last(self) -> float|None:
+        if not self.count:
+            return None
+        return self.data[(self.index - 1) % self.size]
+
+    def values(self, points:int|None=None) -> list[float]:
+        """Oldest to newest, optionally only the last `points` values"""
+        count = self.count if points is None else min(points, self.count)
+        start = (self.index - count) % self.size
+        if start + count <= self.size:
+            values = self.data[start:start + count]
+        else:
+            values = self.data[start:] + self.data[:self.index]
+        return values.tolist()
+
+
+class ContainerSeries:
+    """Ring buffers and raw counters for one container"""
+    def __init__(self, container_id:str, name:str, history:int):
+        self.id = container_id
+        self.name = name
+        self.times = RingBuffer(history)
+        self.series = {key: RingBuffer(history) for key in SERIES}
+        self.memory_limit = 0
+        self.pids = 0
+        self.previous = None # (read time, cpu total, system cpu, net rx, net tx, blk read, blk write)
+
+    def current(self) -> dict:
+        memory = self.series["memory"].last
+        return {
+            "id": self.id,
+            "name": self.name,
+            "timestamp": self.times.last,
+            "memory_limit": self.memory_limit,
+            "memory_percent": (
+                round(memory / self.memory_limit * 100, 2)
+                if memory is not None and self.memory_limit else None
+            ),
+            "pids": self.pids,
+            **{key: _clean(buffer.last) for key, buffer in self.series.items()}
+        }
+
+    def history(self, points:int|None=None) -> dict:
+        return {
+            "timestamps": self.times.values(points),
+            **{
+                key: [_clean(v) for v in buffer.values(points)]
+                for key, buffer in self.series.items()
+            }
+        }
+
+
+def _clean(value:float|None) -> float|None:
+    """NaN marks samples without a previous counter, JSON can't carry it"""
+    if value is None or math.isnan(value):
+        return None
+    return round(value, 2)
+
+
+def _network_totals(stats:dict) -> tuple[int, int]:
+    rx = tx = 0
+    for network in (stats.get("networks") or {}).values():
+        rx += network.get("rx_bytes", 0)
+        tx += network.get("tx_bytes", 0)
+    return rx, tx
+
+
+def _block_totals(stats:dict) -> tuple[int, int]:
+    read = write = 0
+    for entry in (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+        op = entry.get("op", "").lower()
+        if op == "read":
+            read += entry.get("value", 0)
+        elif op == "write":
+            write += entry.get("value", 0)
+    return read, write
+
+
+def _memory_usage(memory_stats:dict) -> int:
+    """Usage minus page cache, matching what `docker stats` reports"""
+    usage = memory_stats.get("usage", 0)
+    stats = memory_stats.get("stats") or {}
+    # cgroup v2 reports inactive_file, v1 total_inactive_file
+    cache = stats.get("inactive_file", stats.get("total_inactive_file", 0))
+    return max(usage - cache, 0)
+
+
+class StatsSampler:
+    """Samples container stats on a background thread"""
+    def __init__(
+        self,
+        api_client,
+        interval:float=DEFAULT_INTERVAL,
+        history:int=DEFAULT_HISTORY,
+        workers:int=DEFAULT_WORKERS
+    ):
+        self.api_client = api_client
+        self.interval = interval
+        self.history_size = history
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="StatsSampler")
+        self.logger = logging.getLogger(__name__ + ".StatsSampler")
+        self.lock = threading.Lock()
+        self.containers = {} # container id -> ContainerSeries
+        self.last_sample = None
+        self.last_duration = None
+        self.one_shot = True
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self._run, daemon=True, name="StatsSampler")
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.executor.shutdown(wait=False)
+
+    def _run(self) -> None:
+        while not self.stopped.is_set():
+            started = time.monotonic()
+            try:
+                self.sample()
+            except Exception as e:
+                self.logger.error(f"Error sampling container stats - {e}")
+            self.last_duration = time.monotonic() - started
+            self.stopped.wait(max(self.interval - self.last_duration, 0.5))
+
+    def sample(self) -> None:
+        """Reads stats for every running container concurrently"""
+        running = {
+            c["Id"]: c["Names"][0].lstrip("/")
+            for c in self.api_client.containers()
+        }
+        with self.lock:
+            for container_id in set(self.containers) - set(running):
+                del self.containers[container_id]
+            for container_id, name in running.items():
+                if container_id not in self.containers:
+                    self.containers[container_id] = ContainerSeries(container_id, name, self.history_size)
+            targets = [self.containers[c] for c in running]
+
+        for series, stats in zip(targets, self.executor.map(self._read_stats, targets)):
+            if stats:
+                self._record(series, stats)
+        self.last_sample = time.time()
+
+    def _read_stats(self, series:ContainerSeries) -> dict|None:
+        try:
+            if self.one_shot:
+                try:
+                    return self.api_client.stats(series.id, stream=False, one_shot=True)
+                except InvalidVersion:
+                    # Engine API older than 1.41, falls back to the slower two sample read
+                    self.one_shot = False
+            return self.api_client.stats(series.id, stream=False)
+        except Exception as e:
+            self.logger.debug(f"Error reading stats for {series.name} - {e}")
+            return None
+
+    def _record(self, series:ContainerSeries, stats:dict) -> None:
+        now = time.time()
+        cpu_stats = stats.get("cpu_stats") or {}
+        cpu_total = (cpu_stats.get("cpu_usage") or {}).get("total_usage", 0)
+        system_cpu = cpu_stats.get("system_cpu_usage", 0)
+        online_cpus = cpu_stats.get("online_cpus") or 1
+        memory_stats = stats.get("memory_stats") or {}
+        counters = (now, cpu_total, system_cpu, *_network_totals(stats), *_block_totals(stats))
+
+        values = dict.fromkeys(SERIES, math.nan)
+        values["memory"] = _memory_usage(memory_stats)
+        if series.previous:
+            # One-shot stats carry no precpu_stats, rates come from the previous sample
+            elapsed = now - series.previous[0]
+            cpu_delta = cpu_total - series.previous[1]
+            system_delta = system_cpu - series.previous[2]
+            if system_delta > 0 and cpu_delta >= 0:
+                values["cpu"] = cpu_delta / system_delta * online_cpus * 100
+            if elapsed > 0:
+                for key, current, previous in zip(
+                    ("net_rx", "net_tx", "block_read", "block_write"),
+                    counters[3:],
+                    series.previous[3:]
+                ):
+                    # Counters reset when a container restarts
+                    values[key] = max(current - previous, 0) / elapsed
+
+        with self.lock:
+            series.previous = counters
+            series.memory_limit = memory_stats.get("limit", 0)
+            series.pids = (stats.get("pids_stats") or {}).get("current", 0)
+            series.times.append(now)
+            for key in SERIES:
+                series.series[key].append(values[key])
+
+    def snapshot(self, points:int|None=None) -> dict:
+        """Current values for all containers, with the last `points` samples if set"""
+        with self.lock:
+            containers = {}
+            for container_id, series in self.containers.items():
+                entry = series.current()
+                if points:
+                    entry["history"] = series.history(points)
+                containers[container_id] = entry
+        return {
+            "interval": self.interval,
+            "sampled": self.last_sample,
+            "duration": self.last_duration,
+            "containers": containers
+        }
+
+    def container(self, container_id:str, points:int|None=None) -> dict|None:
+        """Current values and history for a container id, id prefix or name"""
+        with self.lock:
+            for series in self.containers.values():
+                if container_id in (series.id, series.name) or series.id.startswith(container_id):
+                    return {**series.current(), "history": series.history(points)}
+        return None
+
+
+def init_stats_sampler(app) -> StatsSampler|None:
+    """Starts the stats sampler if STATS_ENABLED is set"""
+    if not app.config.get("STATS_ENABLED"):
+        return None
+    sampler = StatsSampler(
+        docker.APIClient(),
+        interval=app.config["STATS_INTERVAL"],
+        history=app.config["STATS_HISTORY"]
+    )
+    sampler.start()
+    return sampler
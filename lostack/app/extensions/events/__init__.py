@@ -0,0 +1,28 @@
+import docker
+from flask import Flask
+from .bus import EventBus, Subscription
+from .docker_events import DockerEventWatcher
+from .model_events import watch_package_entries
+
+
+def init_events(app:Flask) -> EventBus:
+    """Creates the live event bus and starts the Docker / model event sources"""
+    bus = EventBus()
+
+    def on_package_change(data:dict) -> None:
+        # Installed packages drop out of / return to the depot page
+        app.docker_handler.depot_handler.installed_changed()
+
+    watch_package_entries(app.models.PackageEntry, bus, on_change=on_package_change)
+
+    def on_container_change(data:dict) -> None:
+        # Next poll of the container list should see the change immediately
+        app.container_snapshot.invalidate()
+
+    app.docker_event_watcher = DockerEventWatcher(
+        docker.APIClient(),
+        bus,
+        on_change=on_container_change
+    )
+    app.docker_event_watcher.start()
+    return bus
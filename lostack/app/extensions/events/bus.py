@@ -0,0 +1,73 @@
+"""In process publish / subscribe bus for live state events"""
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+
+# Events buffered per subscriber before the oldest are dropped
+DEFAULT_SUBSCRIBER_QUEUE = 256
+
+Event = namedtuple("Event", ["id", "type", "data", "time"])
+
+
+class Subscription:
+    """
+    Bounded queue of events for one consumer.
+    A slow consumer loses its oldest events and is flagged to resync
+    instead of blocking the publisher.
+    """
+    def __init__(self, bus:"EventBus", maxsize:int=DEFAULT_SUBSCRIBER_QUEUE):
+        self.bus = bus
+        self.queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event:Event) -> None:
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                self.overflowed = True
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout:float|None=None) -> Event|None:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.counter = itertools.count(1)
+        self.logger = logging.getLogger(__name__ + ".EventBus")
+
+    def subscribe(self, maxsize:int=DEFAULT_SUBSCRIBER_QUEUE) -> Subscription:
+        subscription = Subscription(self, maxsize)
+        with self.lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription:Subscription) -> None:
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def publish(self, event_type:str, data:dict) -> Event:
+        event = Event(next(self.counter), event_type, data, time.time())
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
+        self.logger.debug(f"Published {event_type} event to {len(subscribers)} subscribers")
+        return event
@@ -0,0 +1,93 @@
+"""Publishes container state changes from the Engine events stream"""
+
+import logging
+import threading
+import time
+
+# Engine container actions that change what the UI shows
+CONTAINER_ACTIONS = {
+    "create", "start", "restart", "stop", "die", "kill",
+    "pause", "unpause", "destroy", "rename", "oom"
+}
+HEALTH_PREFIX = "health_status"
+
+_RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+
+
+class DockerEventWatcher:
+    """
+    Follows the Engine events stream on a background thread and publishes
+    `container` events. Reconnects with backoff, resuming from the last event.
+    """
+    def __init__(self, api_client, bus, on_change=None):
+        self.api_client = api_client
+        self.bus = bus
+        self.on_change = on_change
+        self.logger = logging.getLogger(__name__ + ".DockerEventWatcher")
+        self.stopped = threading.Event()
+        self.stream = None
+        self.thread = None
+        self.last_time = None
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self._run, daemon=True, name="DockerEventWatcher")
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.stream is not None:
+            try:
+                self.stream.close()
+            except Exception:
+                pass
+
+    def _run(self) -> None:
+        failures = 0
+        while not self.stopped.is_set():
+            try:
+                self.stream = self.api_client.events(
+                    since=self.last_time,
+                    decode=True,
+                    filters={"type": "container"}
+                )
+                failures = 0
+                for event in self.stream:
+                    if self.stopped.is_set():
+                        break
+                    self.handle(event)
+            except Exception as e:
+                if self.stopped.is_set():
+                    break
+                self.logger.warning(f"Docker events stream closed - {e}")
+            delay = _RECONNECT_DELAYS[min(failures, len(_RECONNECT_DELAYS) - 1)]
+            failures += 1
+            self.stopped.wait(delay)
+
+    def handle(self, event:dict) -> None:
+        action = event.get("Action") or event.get("status") or ""
+        health = None
+        if action.startswith(HEALTH_PREFIX):
+            # "health_status: healthy"
+            health = action.partition(":")[2].strip()
+            action = HEALTH_PREFIX
+        elif action not in CONTAINER_ACTIONS:
+            return # exec_*, attach, top and similar
+
+        if (timestamp := event.get("time")):
+            self.last_time = timestamp
+        attributes = (event.get("Actor") or {}).get("Attributes") or {}
+        data = {
+            "id": (event.get("Actor") or {}).get("ID") or event.get("id"),
+            "name": attributes.get("name"),
+            "service": attributes.get("com.docker.compose.service"),
+            "action": action,
+            "health": health,
+            "exit_code": attributes.get("exitCode"),
+            "time": event.get("timeNano", (timestamp or time.time()) * 1_000_000_000) / 1_000_000_000,
+        }
+        if self.on_change:
+            try:
+                self.on_change(data)
+            except Exception as e:
+                self.logger.error(f"Error handling container event - {e}")
+        self.bus.publish("container", data)
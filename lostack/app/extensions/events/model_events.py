@@ -0,0 +1,52 @@
+"""Publishes PackageEntry changes once the session commits"""
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+_PENDING_KEY = "lostack_events"
+
+# model -> (bus, on_change). SQLAlchemy listeners are global, they are
+# registered once and a later app (tests, reloader) just replaces the target.
+_watched = {}
+
+
+def _queue_event(model, action:str):
+    def listener(mapper, connection, target):
+        session = object_session(target)
+        if session is None:
+            return
+        bus, on_change = _watched[model]
+        session.info.setdefault(_PENDING_KEY, []).append((bus, on_change, {
+            "action": action,
+            "id": target.id,
+            "name": target.name,
+        }))
+    return listener
+
+
+def _publish(session):
+    for bus, on_change, data in session.info.pop(_PENDING_KEY, []):
+        bus.publish("package", data)
+        if on_change:
+            on_change(data)
+
+
+def _discard(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def watch_package_entries(model, bus, on_change=None) -> None:
+    """
+    Queues package events on the session as rows are flushed and publishes them
+    after commit, so subscribers never see changes that get rolled back.
+    `on_change` is called with each published event's data.
+    """
+    if model not in _watched:
+        for action in ("insert", "update", "delete"):
+            event.listen(model, f"after_{action}", _queue_event(model, action))
+    _watched[model] = (bus, on_change)
+
+    if not event.contains(Session, "after_commit", _publish):
+        event.listen(Session, "after_commit", _publish)
+    if not event.contains(Session, "after_rollback", _discard):
+        event.listen(Session, "after_rollback", _discard)
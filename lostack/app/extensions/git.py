@@ -12,21 +12,37 @@ def _run_git(
     result_queue : Queue,
     complete : bool = True,
     work_dir : os.PathLike = "/"
-) -> Queue:
-    return RunBase(
+) -> bool:
+    """Runs git, returns True if it exited cleanly"""
+    runner = RunBase(
         ["git", *args],
         result_queue,
         complete=complete,
         work_dir=work_dir
-    ).run()
+    )
+    runner.run()
+    return runner.returncode == 0
 
 
 class RepoManager:
-    """Object to pull and keep a repo updated"""
-    def __init__(self, repo_path: str, repo_url: str, branch: str):
+    """
+    Object to pull and keep a repo updated.
+    In shallow mode only the tip of `branch` is fetched, and if `sparse_paths`
+    are given only those directories are checked out.
+    """
+    def __init__(
+        self,
+        repo_path: str,
+        repo_url: str,
+        branch: str,
+        shallow: bool = False,
+        sparse_paths: list[str]|None = None
+    ):
         self.repo_path = Path(repo_path)
         self.repo_url = repo_url
         self.branch = branch
+        self.shallow = shallow
+        self.sparse_paths = list(sparse_paths or [])
 
     def _run(
         self,
@@ -34,7 +50,7 @@ class RepoManager:
         result_queue : Queue,
         work_dir : bool=None,
         complete : bool=False
-    ) -> Queue:
+    ) -> bool:
         work_dir = work_dir or self.repo_path
         return _run_git(
             args,
@@ -43,22 +59,84 @@ class RepoManager:
             work_dir=str(work_dir)
         )
 
-    def ensure_repo(self, result_queue:Queue) -> None:
-        """Clone or update repo"""
+    def ensure_repo(self, result_queue:Queue) -> bool:
+        """Clone or update repo, returns True if every git command succeeded"""
+        if self.shallow:
+            return self._ensure_shallow_repo(result_queue)
         if not self.repo_path.exists():
             result_queue.put_nowait(f"Cloning {self.repo_url} into {self.repo_path}")
             parent_dir = self.repo_path.parent
-            _run_git(
+            return _run_git(
                 ["clone", "-b", self.branch, self.repo_url, str(self.repo_path)],
                 result_queue,
                 work_dir=str(parent_dir),
             )
         else:
             result_queue.put_nowait(f"Using existing repo at {self.repo_path}")
-            self._run(["fetch", "--all"], result_queue)
-            self._run(["checkout", self.branch], result_queue)
-            self._run(["reset", "--hard", "HEAD"], result_queue)
-            self._run(["pull", "origin", self.branch], result_queue)
+            results = [
+                self._run(["fetch", "--all"], result_queue),
+                self._run(["checkout", self.branch], result_queue),
+                self._run(["reset", "--hard", "HEAD"], result_queue),
+                self._run(["pull", "origin", self.branch], result_queue),
+            ]
+            return all(results)
+
+    def _ensure_sparse(self, result_queue:Queue) -> bool:
+        """Limits the checkout to sparse_paths, once per checkout"""
+        if not self.sparse_paths:
+            return True
+        sparse_file = self.repo_path / ".git" / "info" / "sparse-checkout"
+        if sparse_file.is_file():
+            wanted = {f"/{p.strip('/')}/" for p in self.sparse_paths}
+            if wanted <= set(sparse_file.read_text().split()):
+                return True
+        return self._run(["sparse-checkout", "set", "--cone", *self.sparse_paths], result_queue)
+
+    def _ensure_shallow_repo(self, result_queue:Queue) -> bool:
+        """
+        Depth 1 single branch clone, blobs outside the sparse paths are left
+        on the server. Updates are one fetch of the branch tip and a reset.
+        """
+        if not self.repo_path.exists():
+            result_queue.put_nowait(f"Shallow cloning {self.repo_url} into {self.repo_path}")
+            args = ["clone", "--depth=1", "--single-branch", "-b", self.branch]
+            if self.sparse_paths:
+                args += ["--filter=blob:none", "--sparse"]
+            return (
+                _run_git(
+                    [*args, self.repo_url, str(self.repo_path)],
+                    result_queue,
+                    complete=False,
+                    work_dir=str(self.repo_path.parent),
+                )
+                and self._ensure_sparse(result_queue)
+            )
+        result_queue.put_nowait(f"Updating shallow repo at {self.repo_path}")
+        return (
+            self._ensure_sparse(result_queue)
+            and self._run(["fetch", "--depth=1", "origin", self.branch], result_queue)
+            and self._run(["reset", "--hard", "FETCH_HEAD"], result_queue)
+        )
+
+    def head(self) -> str|None:
+        """Commit checked out, read from .git without running git"""
+        git_dir = self.repo_path / ".git"
+        try:
+            head = (git_dir / "HEAD").read_text().strip()
+            if not head.startswith("ref: "):
+                return head # Detached
+            ref = head[5:]
+            ref_file = git_dir / ref
+            if ref_file.is_file():
+                return ref_file.read_text().strip()
+            packed = git_dir / "packed-refs"
+            if packed.is_file():
+                for line in packed.read_text().splitlines():
+                    if line.endswith(" " + ref):
+                        return line.split(" ", 1)[0]
+        except OSError:
+            pass
+        return None
 
     def remove_repo(self, result_queue:Queue) -> None:
         """Removes the git repo"""
@@ -0,0 +1,22 @@
+import atexit
+import docker
+import logging
+from flask import Flask
+from .archiver import LogArchiver
+
+
+def init_log_archive(app:Flask) -> LogArchiver|None:
+    """Starts the log archiver if LOG_ARCHIVE_ENABLED is set"""
+    if not app.config.get("LOG_ARCHIVE_ENABLED"):
+        return None
+    archiver = LogArchiver(
+        docker.APIClient(),
+        app.config["LOG_ARCHIVE_DIR"],
+        max_bytes=app.config["LOG_ARCHIVE_MAX_MB"] * 1024 * 1024,
+        max_age=app.config["LOG_ARCHIVE_MAX_AGE_DAYS"] * 86400,
+    )
+    archiver.start()
+    # Flushes pending lines and writes the open segments' indexes
+    atexit.register(archiver.stop)
+    logging.info(f"Log archive enabled at {archiver.directory}")
+    return archiver
@@ -0,0 +1,245 @@
+"""Tails LoStack managed containers into the on-disk log archive"""
+
+import datetime
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from app.extensions.common.label_extractor import LabelExtractor as labext
+from app.extensions.docker.log_streamer import LogStreamer
+from .segment import Segment, SegmentWriter, SEGMENT_SUFFIX, tokenize
+
+_NANOSECONDS = 1_000_000_000
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _partition(timestamp:int) -> str:
+    """Hourly partition name for a nanosecond timestamp"""
+    return datetime.datetime.fromtimestamp(
+        timestamp / _NANOSECONDS,
+        tz=datetime.timezone.utc
+    ).strftime("%Y%m%d%H")
+
+
+def _partition_start(partition:str) -> int:
+    parsed = datetime.datetime.strptime(partition, "%Y%m%d%H")
+    return int(parsed.replace(tzinfo=datetime.timezone.utc).timestamp()) * _NANOSECONDS
+
+
+class LogArchiver:
+    """
+    Follows the logs of every running container labelled lostack.enable=true
+    and writes them to compressed hourly segments per container.
+    """
+    def __init__(
+        self,
+        api_client,
+        directory:os.PathLike,
+        max_bytes:int,
+        max_age:float,
+        discovery_interval:float=30,
+        flush_interval:float=10
+    ):
+        self.api_client = api_client
+        self.log_streamer = LogStreamer(api_client)
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.discovery_interval = discovery_interval
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger(__name__ + ".LogArchiver")
+
+        self.lock = threading.Lock()
+        self.writers = {} # container name -> (partition, SegmentWriter)
+        self.segments = {} # container name -> {partition: Segment} for sealed segments
+        self.last_seen = {} # container name -> last archived timestamp
+        self.tailing = {} # container name -> LogStream
+        self.stopped = threading.Event()
+        self.thread = None
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self) -> None:
+        """Registers segments already on disk"""
+        for container_dir in self.directory.iterdir():
+            if not container_dir.is_dir():
+                continue
+            segments = {}
+            for path in container_dir.glob("*" + SEGMENT_SUFFIX):
+                segments[path.stem] = Segment(path)
+            if segments:
+                self.segments[container_dir.name] = segments
+                latest = segments[max(segments)].load_index()
+                if latest.end:
+                    self.last_seen[container_dir.name] = latest.end
+        self.logger.info(f"Loaded log archive from {self.directory}")
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self._run, daemon=True, name="LogArchiver")
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        with self.lock:
+            for stream in list(self.tailing.values()):
+                if stream:
+                    stream.close()
+            for name, (partition, writer) in list(self.writers.items()):
+                self.segments.setdefault(name, {})[partition] = writer.close()
+            self.writers = {}
+
+    def _run(self) -> None:
+        last_discovery = 0
+        while not self.stopped.is_set():
+            now = time.monotonic()
+            if now - last_discovery >= self.discovery_interval:
+                last_discovery = now
+                try:
+                    self._discover()
+                except Exception as e:
+                    self.logger.error(f"Error discovering containers to archive - {e}")
+                try:
+                    self.apply_retention()
+                except Exception as e:
+                    self.logger.error(f"Error applying log retention - {e}")
+            with self.lock:
+                writers = [w for _, w in self.writers.values()]
+            for writer in writers:
+                writer.flush()
+            self.stopped.wait(self.flush_interval)
+
+    def _discover(self) -> None:
+        """Starts tailing any managed running container not already followed"""
+        for container in self.api_client.containers(filters={"label": "lostack.enable"}):
+            labels = labext.normalize_labels(container.get("Labels") or {})
+            try:
+                if not labext.parse_boolean(labels.get("lostack.enable", "false")):
+                    continue
+            except ValueError:
+                continue
+            name = _SAFE_NAME_RE.sub("_", container["Names"][0].strip("/"))
+            with self.lock:
+                if name in self.tailing:
+                    continue
+                self.tailing[name] = None
+            threading.Thread(
+                target=self._tail,
+                args=(container["Id"], name),
+                daemon=True,
+                name=f"LogArchiver.{name}"
+            ).start()
+
+    def _tail(self, container_id:str, name:str) -> None:
+        last = self.last_seen.get(name, 0)
+        try:
+            # tail defaults to the last few lines even with since
+            options = {"tail": "all", **({"since": last / _NANOSECONDS} if last else {})}
+            stream = self.log_streamer.open(container_id, follow=True, timestamps=True, **options)
+            with self.lock:
+                self.tailing[name] = stream
+            for line in stream:
+                if self.stopped.is_set():
+                    break
+                if line.timestamp is None or line.timestamp <= last:
+                    continue # Already archived (since only has second precision)
+                last = line.timestamp
+                self._writer_for(name, line.timestamp).append(line.timestamp, line.stream, line.text)
+                self.last_seen[name] = last
+        except Exception as e:
+            self.logger.info(f"Stopped archiving {name} - {e}")
+        finally:
+            with self.lock:
+                self.tailing.pop(name, None)
+
+    def _writer_for(self, name:str, timestamp:int) -> SegmentWriter:
+        """Gets the writer for a timestamp's partition, sealing the previous hour"""
+        partition = _partition(timestamp)
+        with self.lock:
+            current = self.writers.get(name)
+            if current and current[0] == partition:
+                return current[1]
+            if current:
+                self.segments.setdefault(name, {})[current[0]] = current[1].close()
+            writer = SegmentWriter(self.directory / name / (partition + SEGMENT_SUFFIX))
+            self.segments.get(name, {}).pop(partition, None)
+            self.writers[name] = (partition, writer)
+            return writer
+
+    def apply_retention(self) -> None:
+        """Drops sealed segments older than max_age, then the oldest until under max_bytes"""
+        cutoff = _partition(int((time.time() - self.max_age) * _NANOSECONDS))
+        with self.lock:
+            sealed = [
+                (partition, name, segment)
+                for name, segments in self.segments.items()
+                for partition, segment in segments.items()
+            ]
+            active_size = sum(w.segment.size for _, w in self.writers.values())
+        sealed.sort()
+        total = active_size + sum(s.size for _, _, s in sealed)
+        for partition, name, segment in sealed:
+            if partition >= cutoff and total <= self.max_bytes:
+                break
+            total -= segment.size
+            segment.remove()
+            with self.lock:
+                self.segments.get(name, {}).pop(partition, None)
+            self.logger.info(f"Removed archived logs {segment.path}")
+
+    def containers(self) -> list[str]:
+        with self.lock:
+            return sorted(set(self.segments) | set(self.writers))
+
+    def search(
+        self,
+        query:str="",
+        containers:list[str]|None=None,
+        start:float|None=None,
+        end:float|None=None,
+        limit:int=200
+    ) -> list[dict]:
+        """
+        Searches archived logs. Start / end are unix seconds. A line matches
+        when every word of the query starts one of its words.
+        Returns the newest `limit` matches in chronological order.
+        """
+        start_ns = int(start * _NANOSECONDS) if start is not None else None
+        end_ns = int(end * _NANOSECONDS) if end is not None else None
+        tokens = tokenize(query)
+        names = containers or self.containers()
+        with self.lock:
+            targets = []
+            for name in names:
+                for partition, segment in self.segments.get(name, {}).items():
+                    targets.append((partition, name, segment))
+                if name in self.writers:
+                    partition, writer = self.writers[name]
+                    targets.append((partition, name, writer))
+
+        results = []
+        previous = None
+        # Newest partitions first so the limit is reached without reading old history
+        for partition, name, source in sorted(targets, key=lambda t: t[0], reverse=True):
+            if len(results) >= limit and partition != previous:
+                break # Older partitions can't contain newer matches
+            previous = partition
+            partition_start = _partition_start(partition)
+            if end_ns is not None and partition_start > end_ns:
+                continue
+            if start_ns is not None and partition_start + 3600 * _NANOSECONDS <= start_ns:
+                continue
+            for timestamp, stream, text in source.search(tokens, start_ns, end_ns):
+                results.append((timestamp, name, stream, text))
+        results.sort()
+        return [
+            {
+                "timestamp": timestamp / _NANOSECONDS,
+                "container": name,
+                "stream": stream,
+                "text": text
+            }
+            for timestamp, name, stream, text in results[-limit:]
+        ]
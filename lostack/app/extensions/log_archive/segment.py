@@ -0,0 +1,314 @@
+"""
+Compressed, indexed log segment files.
+
+A segment holds one hour of logs for one container. Lines are written in
+blocks, each block is an independent gzip member so a search only has to
+decompress the blocks its index points at. The index sidecar maps every
+token to the blocks containing it, plus block offsets and time ranges.
+"""
+
+import bisect
+import gzip
+import json
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+BLOCK_LINES = 1000
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+# Read size when walking a segment to rebuild its index
+_REBUILD_CHUNK = 64 * 1024
+# Decoded indexes of sealed segments kept in memory
+INDEX_CACHE_SIZE = 64
+
+_TOKEN_RE = re.compile(r"\w{2,}")
+_MAX_TOKEN_LENGTH = 32
+
+
+def tokenize(text:str) -> set[str]:
+    """Lowercase word tokens used for the inverted index"""
+    return {t[:_MAX_TOKEN_LENGTH] for t in _TOKEN_RE.findall(text.lower())}
+
+
+def line_matches(tokens:set[str], text:str) -> bool:
+    """
+    True if every query token is a prefix of a token in the line, the same
+    rule the index uses to pick candidate blocks
+    """
+    if not tokens:
+        return True
+    line_tokens = tokenize(text)
+    return all(any(t.startswith(token) for t in line_tokens) for token in tokens)
+
+
+def encode_line(timestamp:int, stream:str, text:str) -> str:
+    return f"{timestamp}\t{stream}\t{text}\n"
+
+
+def decode_line(line:str) -> tuple[int, str, str]:
+    timestamp, stream, text = line.split("\t", 2)
+    return int(timestamp), stream, text
+
+
+class SegmentIndex:
+    """Block table and token postings for one segment"""
+    def __init__(self, blocks:list=None, postings:dict=None):
+        # [offset, length, start_ts, end_ts, line_count]
+        self.blocks = blocks or []
+        # token -> sorted list of block numbers
+        self.postings = postings or {}
+        self._sorted_tokens = None
+
+    @property
+    def start(self) -> int|None:
+        return self.blocks[0][2] if self.blocks else None
+
+    @property
+    def end(self) -> int|None:
+        return self.blocks[-1][3] if self.blocks else None
+
+    def add_block(self, offset:int, length:int, start:int, end:int, count:int, tokens:set[str]) -> None:
+        block = len(self.blocks)
+        self.blocks.append([offset, length, start, end, count])
+        for token in tokens:
+            self.postings.setdefault(token, []).append(block)
+        self._sorted_tokens = None
+
+    def blocks_for_token(self, token:str) -> set[int]:
+        """Blocks containing any indexed token starting with `token`"""
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self.postings)
+        tokens = self._sorted_tokens
+        found = set()
+        i = bisect.bisect_left(tokens, token)
+        while i < len(tokens) and tokens[i].startswith(token):
+            found.update(self.postings[tokens[i]])
+            i += 1
+        return found
+
+    def candidate_blocks(self, tokens:set[str], start:int|None=None, end:int|None=None) -> list[int]:
+        """Blocks that may contain every query token within a time range"""
+        candidates = None
+        for token in tokens:
+            blocks = self.blocks_for_token(token[:_MAX_TOKEN_LENGTH])
+            candidates = blocks if candidates is None else candidates & blocks
+            if not candidates:
+                return []
+        if candidates is None:
+            candidates = range(len(self.blocks))
+        return sorted(
+            b for b in candidates
+            if (start is None or self.blocks[b][3] >= start)
+            and (end is None or self.blocks[b][2] <= end)
+        )
+
+    def dump(self, path:os.PathLike) -> None:
+        """Writes the index atomically"""
+        tmp = Path(str(path) + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump({"blocks": self.blocks, "postings": self.postings}, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path:os.PathLike) -> "SegmentIndex":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["blocks"], data["postings"])
+
+
+class _IndexCache:
+    """Least recently used decoded segment indexes, keyed by index path"""
+    def __init__(self, size:int):
+        self.size = size
+        self.indexes = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, path:Path, load) -> SegmentIndex:
+        with self.lock:
+            index = self.indexes.get(path)
+            if index is not None:
+                self.indexes.move_to_end(path)
+                return index
+        index = load()
+        with self.lock:
+            self.indexes[path] = index
+            while len(self.indexes) > self.size:
+                self.indexes.popitem(last=False)
+        return index
+
+    def discard(self, path:Path) -> None:
+        with self.lock:
+            self.indexes.pop(path, None)
+
+
+_index_cache = _IndexCache(INDEX_CACHE_SIZE)
+
+
+class Segment:
+    """
+    A single segment file and its index. An open segment holds its index,
+    sealed segments load theirs through a shared LRU cache.
+    """
+    def __init__(self, path:os.PathLike, index:SegmentIndex=None):
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(INDEX_SUFFIX)
+        self.index = index
+
+    @property
+    def size(self) -> int:
+        size = 0
+        for path in (self.path, self.index_path):
+            try:
+                size += path.stat().st_size
+            except OSError:
+                pass
+        return size
+
+    def load_index(self) -> SegmentIndex:
+        if self.index is not None:
+            return self.index
+        return _index_cache.get(self.index_path, self._read_index)
+
+    def _read_index(self) -> SegmentIndex:
+        if self.index_path.exists():
+            return SegmentIndex.load(self.index_path)
+        return self.rebuild_index()
+
+    def rebuild_index(self) -> SegmentIndex:
+        """Recreates a missing index by walking the gzip members of the segment"""
+        index = SegmentIndex()
+        # Streamed in chunks, slicing the whole file per block is quadratic
+        with open(self.path, "rb") as f:
+            offset = 0
+            pending = b""
+            while True:
+                decompressor = zlib.decompressobj(31)
+                parts = []
+                length = 0
+                data = pending
+                try:
+                    while not decompressor.eof:
+                        if not data:
+                            data = f.read(_REBUILD_CHUNK)
+                            if not data:
+                                break
+                        parts.append(decompressor.decompress(data))
+                        length += len(data) - len(decompressor.unused_data)
+                        data = decompressor.unused_data
+                    text = b"".join(parts).decode("utf-8")
+                except Exception:
+                    break
+                if not decompressor.eof:
+                    break # End of file or truncated tail block
+                pending = data
+                lines = [decode_line(l) for l in text.splitlines() if l]
+                if lines:
+                    tokens = set()
+                    for _, _, line in lines:
+                        tokens |= tokenize(line)
+                    index.add_block(offset, length, lines[0][0], lines[-1][0], len(lines), tokens)
+                offset += length
+        index.dump(self.index_path)
+        return index
+
+    def read_block(self, block:int, index:SegmentIndex|None=None) -> list[tuple[int, str, str]]:
+        offset, length, *_ = (index or self.load_index()).blocks[block]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        return [decode_line(l) for l in gzip.decompress(data).decode("utf-8").splitlines() if l]
+
+    def search(self, tokens:set[str], start:int|None=None, end:int|None=None):
+        """Yields (timestamp, stream, text) lines matching every query token, see line_matches"""
+        index = self.load_index()
+        for block in index.candidate_blocks(tokens, start, end):
+            for timestamp, stream, text in self.read_block(block, index):
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp > end:
+                    continue
+                if not line_matches(tokens, text):
+                    continue
+                yield timestamp, stream, text
+
+    def remove(self) -> None:
+        _index_cache.discard(self.index_path)
+        for path in (self.path, self.index_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SegmentWriter:
+    """Appends lines to an open segment, one gzip member per block"""
+    def __init__(self, path:os.PathLike):
+        self.segment = Segment(path, SegmentIndex())
+        self.segment.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.tokens = set()
+        if self.segment.path.exists():
+            # Reopened after restart, keep complete blocks and drop a torn tail
+            self.segment.index = self.segment.rebuild_index()
+            blocks = self.segment.index.blocks
+            with open(self.segment.path, "r+b") as f:
+                f.truncate(blocks[-1][0] + blocks[-1][1] if blocks else 0)
+        self.file = open(self.segment.path, "ab")
+
+    def append(self, timestamp:int, stream:str, text:str) -> None:
+        with self.lock:
+            self.buffer.append((timestamp, stream, text))
+            self.tokens |= tokenize(text)
+            if len(self.buffer) >= BLOCK_LINES:
+                self._flush_block()
+
+    def flush(self) -> None:
+        with self.lock:
+            self._flush_block()
+
+    def _flush_block(self) -> None:
+        if not self.buffer:
+            return
+        data = gzip.compress("".join(encode_line(*l) for l in self.buffer).encode("utf-8"))
+        offset = self.file.tell()
+        self.file.write(data)
+        self.file.flush()
+        self.segment.index.add_block(
+            offset,
+            len(data),
+            self.buffer[0][0],
+            self.buffer[-1][0],
+            len(self.buffer),
+            self.tokens
+        )
+        self.buffer = []
+        self.tokens = set()
+
+    def search(self, tokens:set[str], start:int|None=None, end:int|None=None) -> list:
+        """Searches flushed blocks and lines still in the write buffer"""
+        with self.lock:
+            pending = list(self.buffer)
+            found = list(self.segment.search(tokens, start, end))
+        for timestamp, stream, text in pending:
+            if start is not None and timestamp < start:
+                continue
+            if end is not None and timestamp > end:
+                continue
+            if not line_matches(tokens, text):
+                continue
+            found.append((timestamp, stream, text))
+        return found
+
+    def close(self) -> Segment:
+        """Flushes, writes the index and returns the sealed segment"""
+        with self.lock:
+            self._flush_block()
+            self.file.close()
+            self.segment.index.dump(self.segment.index_path)
+        # Sealed, its index is loaded on demand from now on
+        return Segment(self.segment.path)
@@ -7,6 +7,9 @@ from queue import Queue
 from app.extensions.common.label_extractor import LabelExtractor as labext
 from app.extensions.depot_manager import DepotManager
 from app.extensions.docker.compose_file_manager import ComposeFileManager
+from app.extensions.depot_validator import lint_package
+from app.extensions.docker.compose_planner import ERROR, check_compose
+from app.extensions.docker.image_pull import pull_images
 
 class ServiceManager:
     """
@@ -170,13 +173,7 @@ class ServiceManager:
         packages = []
 
         for handler in current_app.docker_manager.compose_file_handlers.values():
-            for name, service in handler.content.get("services", {}).items():
-                if not isinstance(service, dict):
-                    continue
-                labels = labext.normalize_labels(service.get('labels', []))
-                primary = labext.parse_boolean(labext.get_label("lostack.primary"))
-                if primary:
-                    packages.append(name)
+            packages.extend(handler.index.primary.values())
         return packages
 
     def get_installable_packages(self) -> list[str]:
@@ -207,6 +204,24 @@ class ServiceManager:
         result_queue.put_nowait(f"Got package data")
         service_names = list(package_data.get("services", {}).keys())
         lostack_file_handler = current_app.docker_manager.compose_file_handlers.get("/docker/lostack-compose.yml")
+
+        # Dry run against the compose file as it would be after the install
+        result_queue.put_nowait(f"Validating services...")
+        snapshot = lostack_file_handler.snapshot
+        document = {
+            **snapshot.content,
+            "services": {**(snapshot.content.get("services") or {}), **package_data["services"]}
+        }
+        check = check_compose(current_app, lostack_file_handler.file, document, targets=service_names)
+        for issue in check["issues"]:
+            result_queue.put_nowait(f"{issue['level'].upper()}: {issue['message']}")
+        if not check["valid"]:
+            result_queue.put_nowait(f"Aborting...")
+            time.sleep(1) # Ensure result queue gets pushed to user before context ends
+            raise ValueError(f"Package {package_name} failed validation")
+        for step in check["plan"]:
+            result_queue.put_nowait(f"Plan: {step['action']} {step['service']} - {step['reason']}")
+
         try: 
             result_queue.put_nowait(f"Adding services {', '.join(service_names)}")
             lostack_file_handler.add_services_from_package_data(package_data)
@@ -219,6 +234,125 @@ class ServiceManager:
         result_queue.put_nowait(f"Added services: {service_names}")
         return service_names
     
+    def plan_depot_packages(self, package_names:list[str], result_queue) -> dict[str:dict]:
+        """
+        Validates a batch of depot packages together, as the compose file would
+        be with all of them added. Returns the services to add, raises a
+        ValueError after reporting every problem found.
+        """
+        lostack_file_handler = current_app.docker_manager.compose_file_handlers.get(self.lostack_file)
+        installed = {
+            name
+            for handler in current_app.docker_manager.compose_file_handlers.values()
+            for name in handler.services
+        }
+        problems = []
+        services = {}
+        owners = {} # service name -> package adding it
+        for package_name in dict.fromkeys(package_names):
+            package_data = self.depot_handler.get_package_data(package_name)
+            if not package_data:
+                problems.append(f"{package_name}: Not found in the depot")
+                continue
+            if package_name in installed:
+                problems.append(f"{package_name}: Already installed")
+                continue
+            problems.extend(
+                f"{package_name}: {issue['message']}"
+                for issue in lint_package(package_name, package_data)
+                if issue["level"] == ERROR
+            )
+            for service_name, service in (package_data.get("services") or {}).items():
+                if service_name in owners:
+                    problems.append(f"{package_name}: Service {service_name} is also added by {owners[service_name]}")
+                    continue
+                owners[service_name] = package_name
+                services[service_name] = service
+
+        if services:
+            result_queue.put_nowait(f"Validating {len(services)} services...")
+            snapshot = lostack_file_handler.snapshot
+            document = {
+                **snapshot.content,
+                "services": {**(snapshot.content.get("services") or {}), **services}
+            }
+            check = check_compose(current_app, lostack_file_handler.file, document, targets=list(services))
+            for issue in check["issues"]:
+                if issue["level"] == ERROR:
+                    problems.append(issue["message"])
+                else:
+                    result_queue.put_nowait(f"{issue['level'].upper()}: {issue['message']}")
+            for step in check["plan"]:
+                result_queue.put_nowait(f"Plan: {step['action']} {step['service']} - {step['reason']}")
+
+        for problem in problems:
+            result_queue.put_nowait(f"ERROR: {problem}")
+        if problems or not services:
+            raise ValueError(f"Batch failed validation with {len(problems)} problem(s), nothing was changed")
+        return services
+
+    def install_depot_packages(self, package_names:list[str], result_queue, complete=True) -> bool:
+        """
+        Installs several depot packages as one operation. Everything is
+        validated up front, images are pulled in parallel, then the services
+        are added in a single compose write and started by one `compose up`.
+        If that fails the services are removed again. Returns True on success.
+        """
+        installed = False
+        added = []
+        with self.app.app_context():
+            lostack_file_handler = current_app.docker_manager.compose_file_handlers.get(self.lostack_file)
+            try:
+                result_queue.put_nowait(f"Installing depot packages: {', '.join(package_names)}")
+                services = self.plan_depot_packages(package_names, result_queue)
+
+                images = list(dict.fromkeys(
+                    service["image"] for service in services.values()
+                    if service.get("image") and "$" not in service["image"]
+                ))
+                result_queue.put_nowait(f"Pulling {len(images)} images...")
+                failed = pull_images(self.api_client, images, result_queue)
+                for image, error in failed.items():
+                    result_queue.put_nowait(f"ERROR: {error}")
+                if failed:
+                    raise RuntimeError(f"Failed to pull {len(failed)} image(s), nothing was changed")
+
+                result_queue.put_nowait(f"Adding services {', '.join(services)}")
+                lostack_file_handler.add_services_from_package_data({"services": services})
+                added = list(services)
+
+                if not lostack_file_handler.compose_up(added, result_queue, complete=False):
+                    raise RuntimeError("docker compose up failed")
+                installed = True
+                result_queue.put_nowait(f"Installed depot packages: {', '.join(package_names)}")
+            except Exception as e:
+                result_queue.put_nowait(f"Error installing depot packages - {e}")
+                if added:
+                    self._rollback_services(added, result_queue)
+            finally:
+                if complete:
+                    result_queue.put_nowait("__COMPLETE__")
+        return installed
+
+    def _rollback_services(self, service_names:list[str], result_queue) -> None:
+        """Stops and removes the containers of just-added services, then takes them out of the compose file"""
+        result_queue.put_nowait(f"Rolling back services: {', '.join(service_names)}")
+        docker_manager = current_app.docker_manager
+        lostack_file_handler = docker_manager.compose_file_handlers.get(self.lostack_file)
+        try:
+            containers = docker_manager.get_services_info(service_names) or {}
+            existing = [name for name, info in containers.items() if info is not None]
+            if existing:
+                lostack_file_handler.compose_stop(existing, result_queue, complete=False)
+                docker_manager.shell_remove(existing, result_queue, complete=False)
+        except Exception as e:
+            result_queue.put_nowait(f"Warning: Could not remove containers - {e}")
+        try:
+            lostack_file_handler.remove_services(service_names)
+            result_queue.put_nowait("Restored LoStack compose file")
+        except Exception as e:
+            result_queue.put_nowait(f"Error restoring LoStack compose file - {e}")
+
     def remove_depot_package(self, service_db_id:str, result_queue: Queue, complete=False) -> Queue:
         """
         Remove a package.
@@ -267,15 +401,9 @@ class ServiceManager:
                 # Update compose file
                 result_queue.put_nowait(f"Updating {lostack_file_handler.file}...")
                 try:
-                    compose_data = lostack_file_handler.content.copy()
-                    services_to_remove = []
-                    for service_name in docker_service_names:
-                        if service_name in compose_data.get("services", {}):
-                            services_to_remove.append(service_name)
-                            del compose_data["services"][service_name]
+                    services_to_remove = lostack_file_handler.remove_services(docker_service_names)
 
                     if services_to_remove:
-                        lostack_file_handler.write(compose_data)
                         result_queue.put_nowait(f"Removed services from LoStack compose file: {', '.join(services_to_remove)}")
                     else:
                         result_queue.put_nowait("No services found in LoStack compose file to remove")
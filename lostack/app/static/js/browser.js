@@ -236,26 +236,42 @@ function updateSaveStatus() {
     }
 }
 
-function saveCurrentFile() {
-    if (!currentFile || !editor || !hasUnsavedChanges) return;
-
+function postFileSave(force = false) {
     const formData = new FormData();
     formData.append('filepath', currentFile.filepath);
     formData.append('filename', currentFile.filename);
     formData.append('filecontent', editor.getValue());
+    if (force) formData.append('force', '1');
 
-    fetch('/files/file/save', {
+    return fetch('/files/file/save', {
         method: 'POST',
         body: formData
     })
     .then(response => response.json())
+    .then(data => {
+        // Compose validation failures can be overridden
+        if (!data?.success && data?.issues && !force) {
+            const proceed = confirm(
+                'Validation found problems:\n\n' + data.message + '\n\nSave anyway?'
+            );
+            if (proceed) return postFileSave(true);
+            return { success: false, cancelled: true };
+        }
+        return data;
+    });
+}
+
+function saveCurrentFile() {
+    if (!currentFile || !editor || !hasUnsavedChanges) return;
+
+    postFileSave()
     .then(data => {
         if (data?.success) {
             originalContent = editor.getValue();
             hasUnsavedChanges = false;
             updateSaveStatus();
             showSaveConfirmation();
-        } else {
+        } else if (!data?.cancelled) {
             alert('Error saving file: ' + (data?.message || 'Unknown error'));
         }
     })
@@ -280,16 +296,7 @@ function showSaveConfirmation() {
 function saveAndProceed() {
     if (!currentFile || !editor || !hasUnsavedChanges) return;
 
-    const formData = new FormData();
-    formData.append('filepath', currentFile.filepath);
-    formData.append('filename', currentFile.filename);
-    formData.append('filecontent', editor.getValue());
-
-    fetch('/files/file/save', {
-        method: 'POST',
-        body: formData
-    })
-    .then(response => response.json())
+    postFileSave()
     .then(data => {
         if (data?.success) {
             originalContent = editor.getValue();
@@ -297,7 +304,7 @@ function saveAndProceed() {
             updateSaveStatus();
             unsavedChangesModal.hide();
             executePendingNavigation();
-        } else {
+        } else if (!data?.cancelled) {
             alert('Error saving file: ' + (data?.message || 'Unknown error'));
         }
     })
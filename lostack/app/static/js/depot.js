@@ -1,13 +1,12 @@
-function addServiceIcons(packages) {
-    if (!packages) return;
-    Object.entries(packages).forEach(([packageName, packageData]) => {
-        const serviceCard = document.querySelector(`[data-name="${packageName.toLowerCase()}"] .card-header`);
-        if (!serviceCard) return;
-        const iconName = extractIconFromLabels(packageData.labels) || packageName.toLowerCase();
-        const iconElement = createServiceIcon(iconName, 50);
+function addServiceIcons(root) {
+    if (!root) return;
+    root.querySelectorAll('.service-item:not([data-icon-added])').forEach(item => {
+        item.dataset.iconAdded = '1';
+        const headerContent = item.querySelector('.card-header .d-flex');
+        if (!headerContent) return;
+        const iconElement = createServiceIcon(item.dataset.icon || item.dataset.name, 50);
         iconElement.classList.add('ms-2');
-        const headerContent = serviceCard.querySelector('.d-flex');
-        if (headerContent) headerContent.appendChild(iconElement);
+        headerContent.appendChild(iconElement);
     });
 }
 
@@ -49,31 +48,79 @@ function updateTagsSummary() {
     }
 }
 
+let searchTimer = null;
+let searchController = null;
+let loadingPage = false;
+
 function performSearch() {
-    const searchTerm = document.getElementById('Search').value.toLowerCase();
-    const serviceItems = document.querySelectorAll('.service-item');
-    const noResultsDiv = document.getElementById('noResults');
-    let visibleCount = 0;
-
-    serviceItems.forEach(item => {
-        const matchesSearch = !searchTerm || 
-            ['name', 'title', 'description', 'group', 'tags']
-                .some(attr => (item.dataset[attr] || '').toLowerCase().includes(searchTerm));
-        const matchesGroup = currentGroup === 'all' || 
-            (item.dataset.group && item.dataset.group.trim() === currentGroup.trim());
-        const matchesTag = currentTag === 'all' || 
-            (item.dataset.tags && item.dataset.tags.split(',').some(tag => 
-                tag.trim().toLowerCase() === currentTag.toLowerCase()));
-
-        if (matchesSearch && matchesGroup && matchesTag) {
-            item.classList.remove('d-none');
-            visibleCount++;
-        } else {
-            item.classList.add('d-none');
-        }
-    });
+    // Debounced, the server ranks and filters against the depot search index
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(runSearch, 150);
+}
+
+function searchParams(extra) {
+    const params = new URLSearchParams({ q: document.getElementById('Search').value.trim() });
+    if (currentGroup !== 'all') params.set('group', currentGroup);
+    if (currentTag !== 'all') params.set('tag', currentTag);
+    Object.entries(extra || {}).forEach(([key, value]) => params.set(key, value));
+    return params;
+}
+
+async function runSearch() {
+    if (searchController) searchController.abort();
+    searchController = new AbortController();
+    const signal = searchController.signal;
+    try {
+        const [, facets] = await Promise.all([
+            loadPackagePage(1, true, signal),
+            fetch(`${depotSearchUrl}?${searchParams({ per_page: 1 })}`, { signal }).then(r => r.json())
+        ]);
+        updateFacetCounts('.group-tag', 'group', facets.facets.groups);
+        updateFacetCounts('.tag-filter', 'tag', facets.facets.tags);
+    } catch (error) {
+        if (error.name !== 'AbortError') console.error(error);
+    }
+}
+
+async function loadPackagePage(page, replace, signal) {
+    // Cards arrive as server rendered fragments, one page at a time
+    const grid = document.getElementById('serviceGrid');
+    const sentinel = document.getElementById('depotSentinel');
+    loadingPage = true;
+    try {
+        const response = await fetch(`${depotPackagesUrl}?${searchParams({ page })}`, { signal });
+        if (!response.ok) throw new Error(`Loading packages failed: ${response.status}`);
+        const html = await response.text();
+        if (replace) grid.innerHTML = html;
+        else grid.insertAdjacentHTML('beforeend', html);
+        addServiceIcons(grid);
+        sentinel.dataset.nextPage = response.headers.get('X-Next-Page') || '';
+        const total = parseInt(response.headers.get('X-Total-Count') || '0', 10);
+        document.getElementById('noResults').classList.toggle('d-none', total > 0);
+    } finally {
+        loadingPage = false;
+    }
+}
 
-    noResultsDiv.classList.toggle('d-none', visibleCount > 0);
+function watchDepotSentinel() {
+    const sentinel = document.getElementById('depotSentinel');
+    if (!sentinel) return;
+    new IntersectionObserver(entries => {
+        if (!entries.some(entry => entry.isIntersecting)) return;
+        if (loadingPage || !sentinel.dataset.nextPage) return;
+        // Shares the search's signal so a new search cancels a stale page
+        loadPackagePage(sentinel.dataset.nextPage, false, searchController?.signal).catch(error => {
+            if (error.name !== 'AbortError') console.error(error);
+        });
+    }, { rootMargin: '600px' }).observe(sentinel);
+}
+
+function updateFacetCounts(selector, key, counts) {
+    document.querySelectorAll(selector).forEach(button => {
+        const badge = button.querySelector('.badge');
+        if (!badge || button.dataset[key] === 'all') return;
+        badge.textContent = counts[button.dataset[key]] || 0;
+    });
 }
 
 function updateFilterButtons(selector, activeValue, activeClass, defaultClass) {
@@ -109,4 +156,23 @@ function clearSearch(input) {
     updateFilterButtons('.tag-filter', 'all', 'btn-success', 'btn-outline-success');
     updateTagsSummary();
     performSearch();
-}
\ No newline at end of file
+}
+async function importDepotBundle(input) {
+    const file = input.files[0];
+    input.value = '';
+    if (!file) return;
+    try {
+        // Sent as the raw body so the server can stream it into docker load
+        const response = await fetch(depotBundleImportUrl, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/x-tar' },
+            body: file
+        });
+        const data = await response.json();
+        if (!response.ok) throw new Error(data.error || `Import failed: ${response.status}`);
+        alert(`Imported ${data.packages.join(', ')} with ${data.images.length} images`);
+        window.location.reload();
+    } catch (error) {
+        alert(error.message);
+    }
+}
@@ -423,4 +423,43 @@ function launchTerminalWithButtonAnimation(streamUrl, buttonElement = null) {
         }, 2000);
     }
     launchTerminalModal(streamUrl);
-}
\ No newline at end of file
+}
+// Shared live event channel, one EventSource per tab
+let liveEventSource = null;
+const liveEventHandlers = {};
+
+function subscribeLiveEvents(handlers) {
+    Object.entries(handlers).forEach(([type, handler]) => {
+        if (!liveEventHandlers[type]) {
+            liveEventHandlers[type] = [];
+            if (liveEventSource) liveEventSource.addEventListener(type, dispatchLiveEvent);
+        }
+        liveEventHandlers[type].push(handler);
+    });
+    if (liveEventSource) return liveEventSource;
+
+    liveEventSource = new EventSource('/events/stream');
+    Object.keys(liveEventHandlers).forEach(type => liveEventSource.addEventListener(type, dispatchLiveEvent));
+    window.addEventListener('beforeunload', () => liveEventSource && liveEventSource.close());
+    return liveEventSource;
+}
+
+function dispatchLiveEvent(event) {
+    let data = {};
+    try {
+        data = JSON.parse(event.data);
+    } catch (error) {
+        console.error('Invalid live event:', event.data);
+        return;
+    }
+    (liveEventHandlers[event.type] || []).forEach(handler => handler(data, event));
+}
+
+// Collapses bursts of events (compose up starting many containers) into one call
+function debounce(callback, delay = 250) {
+    let timer = null;
+    return (...args) => {
+        clearTimeout(timer);
+        timer = setTimeout(() => callback(...args), delay);
+    };
+}
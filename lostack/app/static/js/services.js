@@ -52,4 +52,61 @@ document.addEventListener('DOMContentLoaded', function() {
       this.classList.remove('shadow-sm');
     });
   });
-});
\ No newline at end of file
+});
+
+// Live container state from /events/stream
+const CONTAINER_EVENT_STATUS = {
+  start: 'Up',
+  restart: 'Up',
+  unpause: 'Up',
+  create: 'Created',
+  pause: 'Paused',
+  stop: 'Exited',
+  die: 'Exited',
+  kill: 'Exited',
+  oom: 'Exited',
+  destroy: 'Not Found'
+};
+
+function statusBadgeClass(status) {
+  if (status.includes('Up')) return 'bg-success';
+  if (status.includes('Starting')) return 'bg-primary';
+  if (status.includes('Exited')) return 'bg-secondary';
+  return 'bg-danger';
+}
+
+function updateContainerStatus(data) {
+  let status = CONTAINER_EVENT_STATUS[data.action];
+  if (data.action === 'health_status') status = `Up (${data.health})`;
+  if (!status) return;
+  if (status === 'Exited' && data.exit_code !== null && data.exit_code !== undefined) {
+    status = `Exited (${data.exit_code})`;
+  }
+  const badges = document.querySelectorAll(`.container-status[data-container-name="${CSS.escape(data.name || '')}"]`);
+  badges.forEach(badge => {
+    badge.classList.remove('bg-success', 'bg-primary', 'bg-secondary', 'bg-danger');
+    badge.classList.add(statusBadgeClass(status));
+    badge.textContent = status;
+    updateServiceUpCount(badge.closest('.service-card'));
+  });
+}
+
+function updateServiceUpCount(card) {
+  if (!card) return;
+  const badge = card.querySelector('.service-up-count');
+  const statuses = Array.from(card.querySelectorAll('.container-status')).map(b => b.textContent);
+  const up = statuses.filter(s => s.includes('Up')).length;
+  const allUp = statuses.length > 0 && up === statuses.length;
+  badge.classList.toggle('bg-success', allUp);
+  badge.classList.toggle('bg-secondary', !allUp);
+  badge.innerHTML = `<i class="bi bi-hdd-stack me-1"></i>${allUp ? 'All Up' : `${up}/${statuses.length} Up`}`;
+}
+
+// Package entries changed, reload unless a terminal stream is open
+function reloadWhenIdle() {
+  if (document.querySelector('.modal.show')) {
+    setTimeout(reloadWhenIdle, 2000);
+    return;
+  }
+  location.reload();
+}